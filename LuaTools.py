@@ -1,23 +1,27 @@
 
-import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext, filedialog
-import tkinter.font as tkfont
-import winreg
 import os
 import sys
-import httpx
 import re
 import json
+import asyncio
+import contextlib
+import hashlib
+import heapq
+import struct
+import select
+import stat
+import queue
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 import zipfile
 import tempfile
 import shutil
 import subprocess
-import psutil
 from pathlib import Path
 import urllib.request
 import urllib.error
+import urllib.parse
 
 # Try to import Windows API for drag and drop
 try:
@@ -57,24 +61,2192 @@ try:
     
     # Enable drag and drop
     DND_AVAILABLE = True
-except ImportError:
+except (ImportError, AttributeError, OSError):
     DND_AVAILABLE = False
-    print("Windows API not available, drag and drop disabled")
+    # stderr so headless JSON output on stdout stays clean
+    print("Windows API not available, drag and drop disabled", file=sys.stderr)
+
+# Try to import archive libraries
+try:
+    import rarfile
+except ImportError:
+    rarfile = None
+
+try:
+    import py7zr
+except ImportError:
+    py7zr = None
+
+# Version and repository configuration
+__version__ = "2.6"  # Your current version
+__github_repo__ = "madoiscool/LuaTools"  # Replace with your actual repo
+
+def load_app_modules():
+    """Import the GUI, registry and network modules only the full app needs"""
+    # Kept out of module import so headless mode starts fast and runs anywhere
+    global tk, ttk, messagebox, scrolledtext, filedialog, tkfont, winreg, httpx, psutil
+    import tkinter as tk
+    from tkinter import ttk, messagebox, scrolledtext, filedialog
+    import tkinter.font as tkfont
+    import winreg
+    import httpx
+    import psutil
+
+# Marker line written at the top of a .lua file when its updates are disabled
+UPDATES_DISABLED_MARKER = '-- LUATOOLS: UPDATES DISABLED!'
+
+# Leading whitespace as str.strip() sees it, spelled out as UTF-8 byte sequences
+_LUA_LEADING_WS = (rb'(?:[ \t\x0b\x0c\x1c-\x1f]|\xc2[\x85\xa0]|\xe1\x9a\x80'
+                   rb'|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]|\xe2\x81\x9f|\xe3\x80\x80)*')
+
+# One scan finds everything patching cares about: the marker, any addappid, and setManifestid lines
+_LUA_PATCH_PATTERN = re.compile(
+    rb'(?P<marker>' + re.escape(UPDATES_DISABLED_MARKER.encode('utf-8')) + rb')'
+    rb'|(?P<addappid>(?i:addappid))'
+    rb'|^(?P<indent>' + _LUA_LEADING_WS + rb')(?P<comment>--)?setManifestid',
+    re.MULTILINE
+)
+
+def patch_lua_content(data):
+    """Patch raw .lua bytes in a single scan, returns (result, new_data or None if unchanged)"""
+    # Match text-mode reads: \r\n and lone \r are line breaks too
+    if b'\r' in data:
+        data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    
+    has_marker = False
+    has_addappid = False
+    commented = []  # (line_start, match_end) of --setManifestid lines
+    uncommented = []  # line_start of setManifestid lines
+    for match in _LUA_PATCH_PATTERN.finditer(data):
+        if match.lastgroup == 'marker':
+            has_marker = True
+        elif match.lastgroup == 'addappid':
+            has_addappid = True
+        elif match.group('comment'):
+            commented.append((match.start(), match.end()))
+        else:
+            uncommented.append(match.start())
+    
+    pieces = []
+    position = 0
+    if has_marker:
+        # Updates are disabled, so uncomment any --setManifestid lines instead
+        if not commented:
+            return "updates_disabled", None
+        for line_start, match_end in commented:
+            # Drop the first two characters of the line, exactly like line[2:]
+            prefix = data[line_start:match_end].decode('utf-8')[2:].encode('utf-8')
+            pieces.append(data[position:line_start])
+            pieces.append(prefix)
+            position = match_end
+        result = "updates_disabled_modified"
+    else:
+        if not has_addappid:
+            return "no_addappid", None
+        if not uncommented:
+            return False, None
+        for line_start in uncommented:
+            pieces.append(data[position:line_start])
+            pieces.append(b'--')
+            position = line_start
+        result = True
+    pieces.append(data[position:])
+    new_data = b''.join(pieces)
+    
+    # Text-mode writes used the platform line ending and rejected invalid UTF-8
+    new_data.decode('utf-8')
+    if os.linesep != '\n':
+        new_data = new_data.replace(b'\n', os.linesep.encode('ascii'))
+    return result, new_data
+
+
+# Directive patterns for the line parser (ASCII case folding, same as the byte-level patcher)
+_ADDAPPID_PATTERN = re.compile(r'addappid', re.IGNORECASE | re.ASCII)
+_ADDAPPID_CALL_PATTERN = re.compile(r'addappid\s*\(\s*(\d+)([^)]*)\)', re.IGNORECASE | re.ASCII)
+_SETMANIFESTID_CALL_PATTERN = re.compile(r'setManifestid\s*\(\s*(\d+)\s*,\s*"?(\d+)"?')
+
+def parse_lua_model(data):
+    """Parse raw .lua bytes into a model of the directives LuaTools cares about"""
+    text = data.decode('utf-8')
+    
+    # Same line breaks as a text-mode read
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    lines = text.split('\n')
+    
+    model = {
+        'updates_disabled': False,
+        'addappid': [],  # List of {line, depot_id, commented, has_key}
+        'manifests': [],  # List of {line, depot_id, manifest_id, commented}
+        'unknown_lines': [],  # Line numbers that aren't directives, comments or blank
+        'line_count': len(lines)
+    }
+    
+    for number, line in enumerate(lines, 1):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        known = False
+        
+        if UPDATES_DISABLED_MARKER in line:
+            model['updates_disabled'] = True
+            known = True
+        
+        if stripped.startswith('--setManifestid') or stripped.startswith('setManifestid'):
+            match = _SETMANIFESTID_CALL_PATTERN.search(stripped)
+            model['manifests'].append({
+                'line': number,
+                'depot_id': match.group(1) if match else None,
+                'manifest_id': match.group(2) if match else None,
+                'commented': stripped.startswith('--')
+            })
+            known = True
+        
+        if _ADDAPPID_PATTERN.search(line):
+            match = _ADDAPPID_CALL_PATTERN.search(stripped)
+            model['addappid'].append({
+                'line': number,
+                'depot_id': match.group(1) if match else None,
+                'commented': stripped.startswith('--'),
+                'has_key': bool(match and match.group(2).count(',') >= 2)
+            })
+            known = True
+        
+        if not known and not stripped.startswith('--'):
+            model['unknown_lines'].append(number)
+    
+    return model
+
+def lua_model_patch_result(model):
+    """Work out what patching would do from a parsed model, returns (result, needs_write)"""
+    commented = sum(1 for manifest in model['manifests'] if manifest['commented'])
+    if model['updates_disabled']:
+        if commented:
+            return "updates_disabled_modified", True
+        return "updates_disabled", False
+    
+    if not model['addappid']:
+        return "no_addappid", False
+    if commented == len(model['manifests']):
+        return False, False
+    return True, True
+
+class LuaModelCache:
+    """Parsed .lua models cached by (path, mtime, size)"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.models = {}  # Dict of {path: (mtime_ns, size, model)}
+    
+    def _fresh(self, path, stat):
+        with self.lock:
+            cached = self.models.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        return None
+    
+    def peek(self, path):
+        """Return the cached model for a .lua file if it is still current, without parsing anything"""
+        try:
+            return self._fresh(path, os.stat(path))
+        except OSError:
+            return None
+    
+    def get(self, path):
+        """Return the model for a .lua file, parsing it only if it changed, or None if unreadable"""
+        try:
+            stat = os.stat(path)
+            model = self._fresh(path, stat)
+            if model is not None:
+                return model
+            
+            with open(path, 'rb') as f:
+                model = parse_lua_model(f.read())
+        except Exception as e:
+            print(f"[CACHE] Could not parse {path}: {e}")
+            return None
+        
+        with self.lock:
+            self.models[path] = (stat.st_mtime_ns, stat.st_size, model)
+        return model
+    
+    def forget(self, path):
+        """Drop the cached model for a file"""
+        with self.lock:
+            self.models.pop(path, None)
+
+def parse_depot_query(text):
+    """Parse a 'depot:<id>' or 'manifest:<id>' search query, returns (kind, id) or None"""
+    match = re.match(r'^\s*(depot|manifest)\s*[:=]\s*(\d+)\s*$', text, re.IGNORECASE)
+    if not match:
+        return None
+    return match.group(1).lower(), match.group(2)
+
+class DepotIndex:
+    """Inverted index from depot IDs and manifest IDs to the .lua files that reference them"""
+    
+    def __init__(self, models):
+        self.models = models
+        self.lock = threading.Lock()
+        self.path = None  # stplug-in path the index was built for, None until built
+        self.depots = {}  # Dict of {depot_id: set of filenames}
+        self.manifests = {}  # Dict of {manifest_id: set of filenames}
+        self.file_keys = {}  # Dict of {filename: (depot_ids, manifest_ids)}
+        self.app_ids = {}  # Dict of {filename: app_id}
+        self.building = None  # stplug-in path a build() is running for
+        self.build_generation = 0  # Bumped by each build() and invalidate(), so stale builds are dropped
+        self.pending_files = set()  # Filenames changed while that build was running
+    
+    def is_built(self, stplugin_path):
+        with self.lock:
+            return self.path == stplugin_path
+    
+    def invalidate(self):
+        """Throw the index away so the next use rebuilds it"""
+        with self.lock:
+            self.path = None
+            self.building = None  # A build still running is already out of date
+            self.build_generation += 1
+    
+    @staticmethod
+    def model_keys(model):
+        """Return the (depot_ids, manifest_ids) a parsed model references"""
+        depot_ids = {item['depot_id'] for item in model['addappid'] if item['depot_id'] and not item['commented']}
+        depot_ids.update(item['depot_id'] for item in model['manifests'] if item['depot_id'])
+        manifest_ids = {item['manifest_id'] for item in model['manifests'] if item['manifest_id']}
+        return depot_ids, manifest_ids
+    
+    def build(self, stplugin_path, entries, max_workers=8):
+        """Parse every .lua in parallel and rebuild the index from scratch"""
+        def parse(entry):
+            return entry['filename'], entry['app_id'], self.models.get(entry['path'])
+        
+        with self.lock:
+            self.build_generation += 1
+            generation = self.build_generation
+            self.building = stplugin_path
+            self.pending_files = set()
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(parse, list(entries.values())))
+            
+            with self.lock:
+                if generation != self.build_generation:
+                    return  # Invalidated or superseded while parsing
+                self.depots = {}
+                self.manifests = {}
+                self.file_keys = {}
+                self.app_ids = {}
+                for filename, app_id, model in results:
+                    if model is not None:
+                        self._add_file(filename, app_id, model)
+                self.path = stplugin_path
+        finally:
+            with self.lock:
+                if generation != self.build_generation:
+                    pending_files = set()
+                else:
+                    self.building = None
+                    pending_files, self.pending_files = self.pending_files, set()
+        print(f"[CACHE] Depot index built: {len(self.depots)} depots, {len(self.manifests)} manifests")
+        
+        # Files the watcher reported mid-build may have been parsed before they changed
+        if pending_files:
+            self.update_files(stplugin_path, pending_files)
+    
+    def update_files(self, stplugin_path, filenames):
+        """Re-index just the given files (added, removed, renamed or modified)"""
+        with self.lock:
+            if self.building == stplugin_path:
+                # Applied once the running build finishes
+                self.pending_files.update(filenames)
+                return
+            if self.path != stplugin_path:
+                return
+        
+        for file in filenames:
+            parsed = parse_lua_filename(file)
+            if not parsed:
+                continue
+            path = os.path.join(stplugin_path, file)
+            model = self.models.get(path) if os.path.exists(path) else None
+            
+            with self.lock:
+                self._remove_file(file)
+                if model is not None:
+                    self._add_file(file, parsed[0], model)
+    
+    def _add_file(self, filename, app_id, model):
+        depot_ids, manifest_ids = self.model_keys(model)
+        for depot_id in depot_ids:
+            self.depots.setdefault(depot_id, set()).add(filename)
+        for manifest_id in manifest_ids:
+            self.manifests.setdefault(manifest_id, set()).add(filename)
+        self.file_keys[filename] = (depot_ids, manifest_ids)
+        self.app_ids[filename] = app_id
+    
+    def _remove_file(self, filename):
+        keys = self.file_keys.pop(filename, None)
+        self.app_ids.pop(filename, None)
+        if not keys:
+            return
+        for key_id, table in [(depot_id, self.depots) for depot_id in keys[0]] + [(manifest_id, self.manifests) for manifest_id in keys[1]]:
+            files = table.get(key_id)
+            if files:
+                files.discard(filename)
+                if not files:
+                    del table[key_id]
+    
+    def lookup(self, kind, key_id):
+        """Return the sorted filenames referencing a depot or manifest ID"""
+        with self.lock:
+            table = self.depots if kind == 'depot' else self.manifests
+            return sorted(table.get(str(key_id), ()))
+    
+    def lookup_app_ids(self, kind, key_id):
+        """Return the set of app IDs whose .lua references a depot or manifest ID"""
+        with self.lock:
+            table = self.depots if kind == 'depot' else self.manifests
+            return {self.app_ids[filename] for filename in table.get(str(key_id), ())}
+    
+    def to_dict(self):
+        """Export the index as a JSON-ready dict"""
+        with self.lock:
+            return {
+                'depots': {depot_id: sorted(files) for depot_id, files in sorted(self.depots.items(), key=lambda item: int(item[0]))},
+                'manifests': {manifest_id: sorted(files) for manifest_id, files in sorted(self.manifests.items(), key=lambda item: int(item[0]))}
+            }
+
+def current_umask():
+    """The process umask (os.umask can only be read by setting it, so call this once at startup)"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+class AtomicFileWriter:
+    """Write-if-changed file layer: temp file + os.replace, with fsyncs batched per operation"""
+    
+    NEW_FILE_MODE = 0o666 & ~current_umask()  # What open() would give a new file
+    
+    def __init__(self, sync=True):
+        self.sync = sync
+        self.lock = threading.Lock()  # Files may be staged from several worker threads
+        self.pending = []  # List of (temp_path, final_path) waiting to be swapped in
+        self.removals = []  # Paths to delete once the staged files are in place
+        self.committed = []  # Paths swapped into place so far, kept even if a later swap fails
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+        return False
+    
+    @staticmethod
+    def is_unchanged(path, data):
+        """Check if a file already holds exactly these bytes"""
+        try:
+            if os.path.getsize(path) != len(data):
+                return False
+            with open(path, 'rb') as f:
+                return f.read() == data
+        except OSError:
+            return False
+    
+    def write(self, path, data):
+        """Stage bytes for a file, returns False if it already has this content"""
+        if self.is_unchanged(path, data):
+            return False
+        
+        # Temp file lives in the same directory so os.replace stays atomic
+        fd, temp_path = tempfile.mkstemp(
+            prefix='.' + os.path.basename(path) + '.',
+            suffix='.tmp',
+            dir=os.path.dirname(path) or '.'
+        )
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            # mkstemp makes the file 0600 - give it the mode the replaced file had, as a plain write would
+            os.chmod(temp_path, self.file_mode(path))
+        except Exception:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        
+        with self.lock:
+            self.pending.append((temp_path, path))
+        return True
+    
+    @classmethod
+    def file_mode(cls, path):
+        """Permission bits for a file written to path: the existing file's, or the default for new files"""
+        try:
+            return stat.S_IMODE(os.stat(path).st_mode)
+        except OSError:
+            return cls.NEW_FILE_MODE
+    
+    def write_text(self, path, text):
+        """Stage text for a file with the same encoding and newlines as a text-mode write"""
+        return self.write(path, text.replace('\n', os.linesep).encode('utf-8'))
+    
+    def remove(self, path):
+        """Stage a file for deletion"""
+        with self.lock:
+            self.removals.append(path)
+    
+    def commit(self):
+        """Flush all staged files in one batch, then swap them into place"""
+        pending, self.pending = self.pending, []
+        removals, self.removals = self.removals, []
+        
+        try:
+            if self.sync:
+                for temp_path, _ in pending:
+                    with open(temp_path, 'rb+') as f:
+                        os.fsync(f.fileno())
+            for temp_path, path in pending:
+                os.replace(temp_path, path)
+                self.committed.append(path)
+        except Exception:
+            self._remove_temp_files(pending)
+            raise
+        
+        for path in removals:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        
+        # Make the renames themselves durable (one fsync per directory)
+        if self.sync and (pending or removals):
+            directories = {os.path.dirname(path) or '.' for _, path in pending}
+            directories.update(os.path.dirname(path) or '.' for path in removals)
+            for directory in directories:
+                self._sync_directory(directory)
+    
+    def discard(self):
+        """Drop everything staged without touching the real files"""
+        self._remove_temp_files(self.pending)
+        self.pending = []
+        self.removals = []
+    
+    @staticmethod
+    def _remove_temp_files(pending):
+        for temp_path, _ in pending:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+    
+    @staticmethod
+    def _sync_directory(directory):
+        # Windows can't open directories for fsync, NTFS journals the rename anyway
+        if os.name == 'nt':
+            return
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+
+
+class LuaFileStateIndex:
+    """Persistent index of .lua file states and their last patch result"""
+    
+    # Results that mean the file needed no change the last time it was seen
+    NO_CHANGE_RESULTS = ("no_change", "updates_disabled", "no_addappid")
+    
+    def __init__(self, index_file):
+        self.index_file = index_file
+        self.entries = {}  # Dict of {filename: {size, mtime_ns, hash, result}}
+        self.dirty = False
+        self.load()
+    
+    def load(self):
+        """Load the index from JSON file"""
+        try:
+            if os.path.exists(self.index_file):
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self.entries = data.get('files', {})
+        except Exception as e:
+            print(f"[CACHE] Error loading patch index: {e}")
+            self.entries = {}
+    
+    def save(self):
+        """Save the index to JSON file if anything changed"""
+        if not self.dirty:
+            return
+        try:
+            with AtomicFileWriter(sync=False) as writer:
+                writer.write_text(self.index_file, json.dumps({'version': 1, 'files': self.entries}, ensure_ascii=False))
+            self.dirty = False
+        except Exception as e:
+            print(f"[CACHE] Error saving patch index: {e}")
+    
+    @staticmethod
+    def hash_file(file_path):
+        """Return the SHA-1 hex digest of a file's contents"""
+        digest = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def lookup(self, file_path):
+        """Return the cached no-change result for an unchanged file, or None if it must be patched"""
+        filename = os.path.basename(file_path)
+        entry = self.entries.get(filename)
+        if not entry or entry.get('result') not in self.NO_CHANGE_RESULTS:
+            return None
+        try:
+            stat = os.stat(file_path)
+            if stat.st_size != entry.get('size'):
+                return None
+            if stat.st_mtime_ns == entry.get('mtime_ns'):
+                return entry['result']
+            # Timestamp changed but size didn't - only trust the entry if the content is the same
+            if self.hash_file(file_path) == entry.get('hash'):
+                entry['mtime_ns'] = stat.st_mtime_ns
+                self.dirty = True
+                return entry['result']
+        except Exception:
+            pass
+        return None
+    
+    def record(self, file_path, patch_result):
+        """Record the state a file was left in after patching"""
+        # A file that couldn't be read or patched must be tried again next run
+        if patch_result == "error":
+            if self.entries.pop(os.path.basename(file_path), None) is not None:
+                self.dirty = True
+            return
+        
+        # A patched file needs no further change, so store the state it will be found in next run
+        if patch_result is True or patch_result is False:
+            result = "no_change"
+        elif patch_result == "updates_disabled_modified":
+            result = "updates_disabled"
+        else:
+            result = patch_result
+        try:
+            stat = os.stat(file_path)
+            self.entries[os.path.basename(file_path)] = {
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'hash': self.hash_file(file_path),
+                'result': result
+            }
+            self.dirty = True
+        except Exception as e:
+            print(f"[CACHE] Error indexing {file_path}: {e}")
+    
+    def prune(self, file_paths):
+        """Drop entries for files that no longer exist"""
+        keep = {os.path.basename(path) for path in file_paths}
+        for filename in list(self.entries.keys()):
+            if filename not in keep:
+                del self.entries[filename]
+                self.dirty = True
+
+class UpdatesDisabledSet:
+    """Persistent set of app IDs whose .lua has updates disabled, with the file state it was seen in"""
+    
+    def __init__(self, state_file):
+        self.state_file = state_file
+        self.lock = threading.Lock()
+        self.apps = {}  # Dict of {app_id: {size, mtime_ns}}
+        self.loaded = False  # False until the set has been loaded from disk or seeded by a full scan
+        self.dir_mtime_ns = None  # stplug-in directory mtime when the set was last checked against it
+        self.dirty = False
+        self.load()
+    
+    def load(self):
+        """Load the set from JSON file"""
+        try:
+            if os.path.exists(self.state_file):
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self.apps = data.get('apps', {})
+                    self.dir_mtime_ns = data.get('dir_mtime_ns')
+                    self.loaded = True
+        except Exception as e:
+            print(f"[CACHE] Error loading updates-disabled set: {e}")
+            self.apps = {}
+    
+    def save(self):
+        """Save the set to JSON file if anything changed"""
+        with self.lock:
+            if not self.dirty:
+                return
+            data = json.dumps({'version': 1, 'apps': self.apps, 'dir_mtime_ns': self.dir_mtime_ns}, ensure_ascii=False)
+            self.dirty = False
+        try:
+            with AtomicFileWriter(sync=False) as writer:
+                writer.write_text(self.state_file, data)
+        except Exception as e:
+            print(f"[CACHE] Error saving updates-disabled set: {e}")
+    
+    def set_state(self, app_id, is_disabled, stat=None):
+        """Record whether an app has updates disabled (stat is the file's os.stat when known)"""
+        app_id = str(app_id)
+        with self.lock:
+            if is_disabled:
+                state = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns} if stat else {}
+                if self.apps.get(app_id) != state:
+                    self.apps[app_id] = state
+                    self.dirty = True
+            elif app_id in self.apps:
+                del self.apps[app_id]
+                self.dirty = True
+    
+    def replace_all(self, apps):
+        """Replace the whole set after a full scan"""
+        with self.lock:
+            self.apps = dict(apps)
+            self.loaded = True
+            self.dirty = True
+    
+    def is_current(self, dir_mtime_ns):
+        """Check the set was last checked against the directory as it is now"""
+        with self.lock:
+            return self.loaded and self.dir_mtime_ns == dir_mtime_ns
+    
+    def mark_checked(self, dir_mtime_ns):
+        """Remember the directory mtime the set was just checked against"""
+        with self.lock:
+            if self.dir_mtime_ns != dir_mtime_ns:
+                self.dir_mtime_ns = dir_mtime_ns
+                self.dirty = True
+    
+    def items(self):
+        """Return a snapshot list of (app_id, state)"""
+        with self.lock:
+            return list(self.apps.items())
+
+class ApiStats:
+    """Persistent per-API download statistics (keyed by URL template) for ranking APIs by expected time-to-success"""
+    
+    EWMA_ALPHA = 0.3  # Weight of the newest sample in the latency averages
+    DEFAULT_TIME = 2.0  # Seconds assumed for an API with no samples yet
+    
+    def __init__(self, state_file):
+        self.state_file = state_file
+        self.lock = threading.Lock()
+        self.apis = {}  # Dict of {url_template: stats dict}
+        self.dirty = False
+        self.load()
+    
+    def load(self):
+        """Load the statistics from JSON file"""
+        try:
+            if os.path.exists(self.state_file):
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self.apis = data.get('apis', {})
+        except Exception as e:
+            print(f"[DOWNLOAD] Error loading API statistics: {e}")
+            self.apis = {}
+    
+    def save(self):
+        """Save the statistics to JSON file if anything changed"""
+        with self.lock:
+            if not self.dirty:
+                return
+            data = json.dumps({'version': 1, 'apis': self.apis}, ensure_ascii=False)
+            self.dirty = False
+        try:
+            with AtomicFileWriter(sync=False) as writer:
+                writer.write_text(self.state_file, data)
+        except Exception as e:
+            print(f"[DOWNLOAD] Error saving API statistics: {e}")
+    
+    def _entry(self, api_url):
+        return self.apis.setdefault(api_url, {
+            'attempts': 0, 'successes': 0, 'unavailable': 0, 'errors': 0, 'timeouts': 0,
+            'ewma_latency': None, 'ewma_failure_time': None
+        })
+    
+    def record(self, api_url, outcome, elapsed):
+        """Record one attempt: outcome is 'success', 'unavailable', 'error' or 'timeout'"""
+        alpha = self.EWMA_ALPHA
+        with self.lock:
+            stats = self._entry(api_url)
+            stats['attempts'] += 1
+            if outcome == 'success':
+                stats['successes'] += 1
+                key = 'ewma_latency'
+            else:
+                stats[{'unavailable': 'unavailable', 'timeout': 'timeouts'}.get(outcome, 'errors')] += 1
+                key = 'ewma_failure_time'
+            previous = stats[key]
+            stats[key] = elapsed if previous is None else alpha * elapsed + (1 - alpha) * previous
+            stats['last_used'] = time.time()
+            self.dirty = True
+    
+    def record_queue_delay(self, api_url, wait):
+        """Record how long an attempt waited on the rate limiter (kept out of the latency figures)"""
+        alpha = self.EWMA_ALPHA
+        with self.lock:
+            stats = self._entry(api_url)
+            previous = stats.get('ewma_queue_delay')
+            stats['ewma_queue_delay'] = wait if previous is None else alpha * wait + (1 - alpha) * previous
+            stats['queue_wait_total'] = stats.get('queue_wait_total', 0.0) + wait
+            self.dirty = True
+    
+    def get(self, api_url):
+        """Return a copy of an API's statistics, or None if it has never been tried"""
+        with self.lock:
+            stats = self.apis.get(api_url)
+            return dict(stats) if stats else None
+    
+    def expected_time_to_success(self, api_url):
+        """Expected seconds spent on this API per successful download (lower is better)"""
+        stats = self.get(api_url) or {'attempts': 0, 'successes': 0}
+        
+        # Smoothed success rate so one lucky/unlucky try doesn't decide the order
+        success_rate = (stats['successes'] + 1) / (stats['attempts'] + 2)
+        latency = stats.get('ewma_latency') or self.DEFAULT_TIME
+        failure_time = stats.get('ewma_failure_time') or self.DEFAULT_TIME
+        cost_per_try = success_rate * latency + (1 - success_rate) * failure_time
+        return cost_per_try / success_rate
+    
+    def rank(self, apis):
+        """Order API entries by expected time-to-success (stable, so ties keep the manual order)"""
+        return sorted(apis, key=lambda api: self.expected_time_to_success(api.get('url', '').strip()))
+
+class NegativeCache:
+    """Persistent record of (API URL template, app ID) pairs that answered 'unavailable', skipped until the TTL runs out"""
+    
+    def __init__(self, state_file, ttl_hours=24):
+        self.state_file = state_file
+        self.ttl = ttl_hours * 3600
+        self.lock = threading.Lock()
+        self.entries = {}  # Dict of {api_url: {app_id: recorded_at}}
+        self.dirty = False
+        self.load()
+    
+    def load(self):
+        """Load the cache from JSON file"""
+        try:
+            if os.path.exists(self.state_file):
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self.entries = data.get('entries', {})
+        except Exception as e:
+            print(f"[DOWNLOAD] Error loading unavailable cache: {e}")
+            self.entries = {}
+    
+    def save(self):
+        """Save the cache to JSON file if anything changed, dropping expired entries"""
+        with self.lock:
+            if not self.dirty:
+                return
+            now = time.time()
+            for api_url in list(self.entries):
+                apps = {app_id: at for app_id, at in self.entries[api_url].items() if now - at < self.ttl}
+                if apps:
+                    self.entries[api_url] = apps
+                else:
+                    del self.entries[api_url]
+            data = json.dumps({'version': 1, 'entries': self.entries}, ensure_ascii=False)
+            self.dirty = False
+        try:
+            with AtomicFileWriter(sync=False) as writer:
+                writer.write_text(self.state_file, data)
+        except Exception as e:
+            print(f"[DOWNLOAD] Error saving unavailable cache: {e}")
+    
+    def set_ttl(self, ttl_hours):
+        """Apply the TTL from settings (0 turns the cache off)"""
+        self.ttl = max(0.0, float(ttl_hours)) * 3600
+    
+    def is_unavailable(self, api_url, app_id):
+        """Return True if this API said the app was unavailable within the TTL"""
+        with self.lock:
+            recorded_at = self.entries.get(api_url, {}).get(str(app_id))
+            return recorded_at is not None and time.time() - recorded_at < self.ttl
+    
+    def add(self, api_url, app_id):
+        """Remember that this API doesn't have the app"""
+        if self.ttl <= 0:
+            return
+        with self.lock:
+            self.entries.setdefault(api_url, {})[str(app_id)] = time.time()
+            self.dirty = True
+    
+    def discard(self, api_url, app_id):
+        """Forget an entry (the API delivered the app after all)"""
+        with self.lock:
+            if self.entries.get(api_url, {}).pop(str(app_id), None) is not None:
+                self.dirty = True
+    
+    def purge(self):
+        """Forget everything, returns how many entries were dropped"""
+        with self.lock:
+            count = sum(len(apps) for apps in self.entries.values())
+            self.entries = {}
+            self.dirty = True
+        self.save()
+        return count
+    
+    def __len__(self):
+        with self.lock:
+            now = time.time()
+            return sum(1 for apps in self.entries.values() for at in apps.values() if now - at < self.ttl)
+
+class ApiCircuitBreakers:
+    """Per-API circuit breakers: N consecutive timeouts/network errors open one, a cool-down later a single probe is let through"""
+    
+    def __init__(self, failure_threshold=3, cooldown=60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+        self.breakers = {}  # Dict of {url_template: {state, failures, opened_at, probing}}
+    
+    def configure(self, failure_threshold, cooldown):
+        """Apply thresholds from settings"""
+        with self.lock:
+            self.failure_threshold = max(1, int(failure_threshold))
+            self.cooldown = max(1.0, float(cooldown))
+    
+    def _breaker(self, api_url):
+        return self.breakers.setdefault(api_url, {'state': 'closed', 'failures': 0, 'opened_at': 0.0, 'probing': False})
+    
+    def allow(self, api_url):
+        """Return True if a request to this API may go out now (claims the probe when half-open)"""
+        with self.lock:
+            breaker = self._breaker(api_url)
+            if breaker['state'] == 'open':
+                if time.time() - breaker['opened_at'] < self.cooldown:
+                    return False
+                breaker['state'] = 'half_open'
+                breaker['probing'] = False
+            if breaker['state'] == 'half_open':
+                if breaker['probing']:
+                    return False
+                breaker['probing'] = True
+            return True
+    
+    def record_success(self, api_url):
+        """The API answered (any HTTP response counts - the host is up): close the breaker"""
+        with self.lock:
+            breaker = self._breaker(api_url)
+            if breaker['state'] != 'closed':
+                print(f"[DOWNLOAD] Circuit closed for {api_url}")
+            breaker.update(state='closed', failures=0, probing=False)
+    
+    def record_failure(self, api_url):
+        """Timeout or network error: count it and open the breaker at the threshold (or on a failed probe)"""
+        with self.lock:
+            breaker = self._breaker(api_url)
+            breaker['failures'] += 1
+            breaker['probing'] = False
+            if breaker['state'] == 'half_open' or breaker['failures'] >= self.failure_threshold:
+                if breaker['state'] != 'open':
+                    print(f"[DOWNLOAD] Circuit opened for {api_url} after {breaker['failures']} consecutive failures")
+                breaker['state'] = 'open'
+                breaker['opened_at'] = time.time()
+    
+    def release(self, api_url):
+        """Give back a half-open probe that was cancelled before it got an answer"""
+        with self.lock:
+            breaker = self.breakers.get(api_url)
+            if breaker and breaker['state'] == 'half_open':
+                breaker['probing'] = False
+    
+    def status(self, api_url):
+        """Return (state, seconds until a probe is allowed) for display"""
+        with self.lock:
+            breaker = self.breakers.get(api_url)
+            if not breaker:
+                return 'closed', 0
+            if breaker['state'] == 'open':
+                remaining = self.cooldown - (time.time() - breaker['opened_at'])
+                if remaining <= 0:
+                    return 'half_open', 0
+                return 'open', remaining
+            return breaker['state'], 0
+
+def parse_lua_filename(file):
+    """Return (app_id, is_disabled) for an app .lua filename, or None for anything else"""
+    if file.endswith('.lua'):
+        # Only include files that end exactly with .lua (no additional text before .lua)
+        # This excludes files like "filename.text.lua" and only includes "filename.lua"
+        # Skip Steamtools.lua file
+        if file.count('.') != 1 or file.lower() == 'steamtools.lua':
+            return None
+        return file[:-4], False
+    if file.endswith('.lua.disabled'):
+        # Two dots: filename.lua.disabled, skip Steamtools.lua.disabled file
+        if file.count('.') != 2 or file.lower() == 'steamtools.lua.disabled':
+            return None
+        return file[:-13], True
+    return None
+
+def make_lua_entry(path, file, app_id, is_disabled, stat):
+    """Build an index entry for a .lua file"""
+    return {
+        'path': path,
+        'filename': file,
+        'app_id': app_id,
+        'is_disabled': is_disabled,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns
+    }
+
+def scan_stplugin_dir(stplugin_path):
+    """Scan a stplug-in directory with os.scandir, returns {filename: entry} for every app .lua"""
+    entries = {}
+    with os.scandir(stplugin_path) as it:
+        for dir_entry in it:
+            parsed = parse_lua_filename(dir_entry.name)
+            if not parsed:
+                continue
+            try:
+                stat = dir_entry.stat()
+            except OSError:
+                continue
+            entries[dir_entry.name] = make_lua_entry(dir_entry.path, dir_entry.name, parsed[0], parsed[1], stat)
+    return entries
+
+def split_lua_entries(entries):
+    """Split scanned entries into (lua_files, disabled_files) full paths"""
+    lua_files = []
+    disabled_files = []
+    for entry in entries.values():
+        if entry['is_disabled']:
+            disabled_files.append(entry['path'])
+        else:
+            lua_files.append(entry['path'])
+    return lua_files, disabled_files
+
+def list_lua_files(stplugin_path):
+    """List the enabled and disabled .lua files in a stplug-in directory"""
+    return split_lua_entries(scan_stplugin_dir(stplugin_path))
+
+class StplugInIndex:
+    """Cached snapshot of the stplug-in directory, rescanned only when its mtime changes.
+    Editing a file in place leaves the directory mtime alone, so entry sizes and mtimes are only as fresh as
+    the last scan or watcher event - use refresh() where they are compared."""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.path = None
+        self.dir_mtime_ns = None
+        self.entries = {}  # Dict of {filename: entry}
+        self.by_app_id = {}  # Dict of {app_id: entry}, enabled file wins over disabled
+        self.lua_files = []
+        self.disabled_files = []
+    
+    def snapshot(self, stplugin_path):
+        """Return the current {filename: entry} dict (treat it as read-only)"""
+        with self.lock:
+            dir_mtime_ns = os.stat(stplugin_path).st_mtime_ns
+            if stplugin_path != self.path or dir_mtime_ns != self.dir_mtime_ns:
+                entries = scan_stplugin_dir(stplugin_path)
+                by_app_id = {}
+                for entry in entries.values():
+                    if entry['app_id'] not in by_app_id or not entry['is_disabled']:
+                        by_app_id[entry['app_id']] = entry
+                
+                self.entries = entries
+                self.by_app_id = by_app_id
+                self.lua_files, self.disabled_files = split_lua_entries(entries)
+                self.path = stplugin_path
+                self.dir_mtime_ns = dir_mtime_ns
+                print(f"[CACHE] Indexed stplug-in: {len(self.lua_files)} enabled, {len(self.disabled_files)} disabled")
+            return self.entries
+    
+    def find_lua_files(self, stplugin_path):
+        """Return (lua_files, disabled_files) from the current snapshot"""
+        self.snapshot(stplugin_path)
+        with self.lock:
+            return list(self.lua_files), list(self.disabled_files)
+    
+    def get(self, stplugin_path, app_id):
+        """Return the entry for an app ID, or None if it has no .lua file"""
+        self.snapshot(stplugin_path)
+        with self.lock:
+            return self.by_app_id.get(str(app_id))
+    
+    def peek(self, app_id):
+        """Return the entry for an app ID from the last snapshot without touching the disk"""
+        with self.lock:
+            return self.by_app_id.get(str(app_id))
+    
+    def refresh(self, app_id):
+        """Return the entry for an app ID with its size and mtime re-read from disk, or None if it is gone"""
+        with self.lock:
+            entry = self.by_app_id.get(str(app_id))
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(entry['path'])
+        except OSError:
+            return None  # Deleted - the directory mtime changed, so the next snapshot rescans
+        if (stat.st_size, stat.st_mtime_ns) == (entry['size'], entry['mtime_ns']):
+            return entry
+        
+        fresh = make_lua_entry(entry['path'], entry['filename'], entry['app_id'], entry['is_disabled'], stat)
+        with self.lock:
+            # Copy-on-write, same as apply_changes (the directory mtime is left alone so pending rescans still happen)
+            if self.entries.get(entry['filename']) is entry:
+                self.entries = dict(self.entries)
+                self.entries[entry['filename']] = fresh
+            if self.by_app_id.get(entry['app_id']) is entry:
+                self.by_app_id = dict(self.by_app_id)
+                self.by_app_id[entry['app_id']] = fresh
+        return fresh
+    
+    def apply_changes(self, stplugin_path, filenames):
+        """Restat just the changed files instead of rescanning, returns the affected app IDs"""
+        with self.lock:
+            # Nothing indexed yet - the next snapshot() will scan from scratch anyway
+            if stplugin_path != self.path:
+                return set()
+            
+            # Copy-on-write so snapshots already handed out stay consistent
+            entries = dict(self.entries)
+            by_app_id = dict(self.by_app_id)
+            app_ids = set()
+            
+            for file in filenames:
+                parsed = parse_lua_filename(file)
+                if not parsed:
+                    continue
+                app_id, is_disabled = parsed
+                path = os.path.join(stplugin_path, file)
+                try:
+                    entries[file] = make_lua_entry(path, file, app_id, is_disabled, os.stat(path))
+                except OSError:
+                    entries.pop(file, None)
+                app_ids.add(app_id)
+            
+            # Enabled file wins over disabled, same as a full scan
+            for app_id in app_ids:
+                entry = entries.get(f"{app_id}.lua") or entries.get(f"{app_id}.lua.disabled")
+                if entry:
+                    by_app_id[app_id] = entry
+                else:
+                    by_app_id.pop(app_id, None)
+            
+            self.entries = entries
+            self.by_app_id = by_app_id
+            self.lua_files, self.disabled_files = split_lua_entries(entries)
+            try:
+                self.dir_mtime_ns = os.stat(stplugin_path).st_mtime_ns
+            except OSError:
+                self.dir_mtime_ns = None
+            return app_ids
+    
+    def invalidate(self):
+        """Force a rescan on next access"""
+        with self.lock:
+            self.dir_mtime_ns = None
+
+class StplugInWatcher:
+    """Watches stplug-in for changes: inotify on Linux, ReadDirectoryChangesW on Windows, adaptive polling otherwise"""
+    
+    DEBOUNCE = 0.25  # Seconds of quiet before a batch of changes is delivered
+    POLL_MIN_INTERVAL = 0.5
+    POLL_MAX_INTERVAL = 10.0
+    
+    def __init__(self, stplugin_path, on_changes):
+        self.stplugin_path = stplugin_path
+        self.on_changes = on_changes  # Called with a set of filenames, or None when a full rescan is needed
+        self.events = queue.Queue()
+        self.stop_event = threading.Event()
+        self.backend = None
+        self._win_handle = None
+    
+    def start(self):
+        """Start the watcher and dispatcher threads"""
+        threading.Thread(target=self._run_backend, daemon=True).start()
+        threading.Thread(target=self._dispatch_loop, daemon=True).start()
+    
+    def stop(self):
+        """Stop watching"""
+        self.stop_event.set()
+        if self._win_handle:
+            try:
+                import ctypes
+                ctypes.windll.kernel32.CancelIoEx(self._win_handle, None)
+            except Exception:
+                pass
+    
+    def _run_backend(self):
+        native = None
+        if os.name == 'nt':
+            native = self._watch_windows
+        elif sys.platform.startswith('linux'):
+            native = self._watch_inotify
+        
+        if native:
+            try:
+                native()
+                return
+            except Exception as e:
+                if self.stop_event.is_set():
+                    return
+                print(f"[WATCHER] Native change notifications unavailable ({e}), falling back to polling")
+                # Anything may have changed while the native watcher was failing
+                self.events.put(None)
+        
+        self._watch_polling()
+    
+    def _dispatch_loop(self):
+        """Coalesce raw events into batches and hand them to the callback"""
+        while not self.stop_event.is_set():
+            try:
+                first = self.events.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            
+            filenames = set()
+            full_rescan = first is None
+            if first is not None:
+                filenames.add(first)
+            
+            # Keep collecting until things go quiet for a moment
+            while True:
+                try:
+                    item = self.events.get(timeout=self.DEBOUNCE)
+                except queue.Empty:
+                    break
+                if item is None:
+                    full_rescan = True
+                else:
+                    filenames.add(item)
+            
+            try:
+                self.on_changes(None if full_rescan else filenames)
+            except Exception as e:
+                print(f"[WATCHER] Error handling changes: {e}")
+    
+    def _watch_inotify(self):
+        """Linux backend using inotify"""
+        import ctypes
+        import ctypes.util
+        
+        IN_MODIFY = 0x2
+        IN_ATTRIB = 0x4
+        IN_CLOSE_WRITE = 0x8
+        IN_MOVED_FROM = 0x40
+        IN_MOVED_TO = 0x80
+        IN_CREATE = 0x100
+        IN_DELETE = 0x200
+        IN_DELETE_SELF = 0x400
+        IN_MOVE_SELF = 0x800
+        IN_Q_OVERFLOW = 0x4000
+        IN_IGNORED = 0x8000
+        
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        
+        try:
+            mask = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+                    IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+            if libc.inotify_add_watch(fd, os.fsencode(self.stplugin_path), mask) < 0:
+                raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+            
+            self.backend = "inotify"
+            print(f"[WATCHER] Watching {self.stplugin_path} with inotify")
+            
+            while not self.stop_event.is_set():
+                readable, _, _ = select.select([fd], [], [], 1.0)
+                if not readable:
+                    continue
+                try:
+                    data = os.read(fd, 65536)
+                except BlockingIOError:
+                    continue
+                
+                offset = 0
+                while offset + 16 <= len(data):
+                    _, event_mask, _, name_len = struct.unpack_from('iIII', data, offset)
+                    name = data[offset + 16:offset + 16 + name_len].rstrip(b'\0')
+                    offset += 16 + name_len
+                    
+                    if event_mask & IN_Q_OVERFLOW:
+                        self.events.put(None)
+                    elif event_mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                        raise OSError("stplug-in directory was removed or moved")
+                    elif name:
+                        self.events.put(os.fsdecode(name))
+        finally:
+            os.close(fd)
+    
+    def _watch_windows(self):
+        """Windows backend using ReadDirectoryChangesW"""
+        import ctypes
+        from ctypes import wintypes
+        
+        FILE_LIST_DIRECTORY = 0x0001
+        FILE_SHARE_ALL = 0x00000001 | 0x00000002 | 0x00000004
+        OPEN_EXISTING = 3
+        FILE_FLAG_BACKUP_SEMANTICS = 0x02000000
+        FILE_NOTIFY_CHANGE_FILE_NAME = 0x00000001
+        FILE_NOTIFY_CHANGE_SIZE = 0x00000008
+        FILE_NOTIFY_CHANGE_LAST_WRITE = 0x00000010
+        
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        kernel32.CreateFileW.restype = wintypes.HANDLE
+        kernel32.CreateFileW.argtypes = [wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, ctypes.c_void_p,
+                                         wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE]
+        kernel32.ReadDirectoryChangesW.restype = wintypes.BOOL
+        kernel32.ReadDirectoryChangesW.argtypes = [wintypes.HANDLE, ctypes.c_void_p, wintypes.DWORD, wintypes.BOOL,
+                                                   wintypes.DWORD, ctypes.POINTER(wintypes.DWORD), ctypes.c_void_p,
+                                                   ctypes.c_void_p]
+        
+        handle = kernel32.CreateFileW(self.stplugin_path, FILE_LIST_DIRECTORY, FILE_SHARE_ALL, None,
+                                      OPEN_EXISTING, FILE_FLAG_BACKUP_SEMANTICS, None)
+        if not handle or handle == ctypes.c_void_p(-1).value:
+            raise ctypes.WinError(ctypes.get_last_error())
+        
+        self._win_handle = handle
+        buffer = ctypes.create_string_buffer(65536)
+        bytes_returned = wintypes.DWORD()
+        notify_filter = FILE_NOTIFY_CHANGE_FILE_NAME | FILE_NOTIFY_CHANGE_SIZE | FILE_NOTIFY_CHANGE_LAST_WRITE
+        
+        try:
+            self.backend = "ReadDirectoryChangesW"
+            print(f"[WATCHER] Watching {self.stplugin_path} with ReadDirectoryChangesW")
+            
+            while not self.stop_event.is_set():
+                ok = kernel32.ReadDirectoryChangesW(handle, buffer, len(buffer), False, notify_filter,
+                                                    ctypes.byref(bytes_returned), None, None)
+                if self.stop_event.is_set():
+                    return
+                if not ok:
+                    raise ctypes.WinError(ctypes.get_last_error())
+                
+                # Zero bytes means the change buffer overflowed
+                if bytes_returned.value == 0:
+                    self.events.put(None)
+                    continue
+                
+                data = buffer.raw[:bytes_returned.value]
+                offset = 0
+                while True:
+                    next_offset, _, name_len = struct.unpack_from('III', data, offset)
+                    self.events.put(data[offset + 12:offset + 12 + name_len].decode('utf-16-le'))
+                    if next_offset == 0:
+                        break
+                    offset += next_offset
+        finally:
+            self._win_handle = None
+            kernel32.CloseHandle(handle)
+    
+    def _watch_polling(self):
+        """Fallback backend: poll each file's size and mtime, backing off while nothing changes"""
+        self.backend = "polling"
+        print(f"[WATCHER] Polling {self.stplugin_path} for changes")
+        
+        def take_snapshot():
+            # In-place edits leave the directory mtime alone, so every file is compared (scandir has the stat data on Windows)
+            try:
+                return {name: (entry['size'], entry['mtime_ns']) for name, entry in scan_stplugin_dir(self.stplugin_path).items()}
+            except OSError:
+                return {}
+        
+        previous = take_snapshot()
+        interval = self.POLL_MIN_INTERVAL
+        
+        while not self.stop_event.wait(interval):
+            current = take_snapshot()
+            changed = {name for name in previous.keys() | current.keys() if previous.get(name) != current.get(name)}
+            if not changed:
+                # Quiet directory - poll less often
+                interval = min(interval * 1.5, self.POLL_MAX_INTERVAL)
+                continue
+            
+            for name in changed:
+                self.events.put(name)
+            previous = current
+            interval = self.POLL_MIN_INTERVAL
+
+def disable_updates_text(content):
+    """Add the updates-disabled marker and uncomment setManifestid lines, returns None if already disabled"""
+    if UPDATES_DISABLED_MARKER in content:
+        return None
+    
+    lines = content.split('\n')
+    
+    # Add the updates disabled marker at the beginning
+    lines.insert(0, UPDATES_DISABLED_MARKER)
+    
+    # Uncomment all setManifestid lines (remove -- prefix)
+    for i, line in enumerate(lines):
+        if line.strip().startswith('--setManifestid'):
+            lines[i] = line[2:]
+    return '\n'.join(lines)
+
+def enable_updates_text(content):
+    """Remove the updates-disabled marker and comment out setManifestid lines"""
+    lines = content.split('\n')
+    
+    # Remove the updates disabled marker
+    if UPDATES_DISABLED_MARKER in lines:
+        lines.remove(UPDATES_DISABLED_MARKER)
+    
+    # Comment all setManifestid lines (add -- prefix)
+    for i, line in enumerate(lines):
+        if line.strip().startswith('setManifestid'):
+            lines[i] = '--' + line
+    return '\n'.join(lines)
+
+def set_lua_updates_disabled(file_path, disable, writer):
+    """Disable or enable updates for one .lua file through writer, returns a status string"""
+    if not os.path.exists(file_path):
+        return "missing"
+    
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    if disable:
+        new_content = disable_updates_text(content)
+        if new_content is None:
+            return "already_disabled"
+        writer.write_text(file_path, new_content)
+        return "disabled"
+    
+    if UPDATES_DISABLED_MARKER not in content:
+        return "not_disabled"
+    writer.write_text(file_path, enable_updates_text(content))
+    return "enabled"
+
+def _app_id_from_token(token):
+    token = token.strip().strip('"\'')
+    match = re.search(r'/app/(\d+)', token)
+    if match:
+        return match.group(1)
+    return token if token.isdigit() else None
+
+def parse_app_id_list(text):
+    """Pull app IDs out of pasted text or a file (IDs, CSV rows or Steam store links), in order without duplicates.
+    Returns (app_ids, skipped_lines) where skipped_lines are the non-empty lines with no ID in them."""
+    app_ids = []
+    seen = set()
+    skipped_lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        tokens = [token for token in re.split(r'[\s,;]+', line) if token]
+        if not tokens:
+            continue
+        line_ids = [_app_id_from_token(token) for token in tokens]
+        
+        # A line of nothing but IDs/links is a list, otherwise it is a CSV/text row with one ID in it:
+        # the first field that is an ID (names can come first), or the leading word of a plain text row
+        if not all(line_ids):
+            fields = [field for field in re.split(r'[,;\t]', line) if field.strip()]
+            row_id = next((app_id for app_id in map(_app_id_from_token, fields) if app_id), None) or line_ids[0]
+            if not row_id:
+                skipped_lines.append(line)
+                continue
+            line_ids = [row_id]
+        for app_id in line_ids:
+            if app_id not in seen:
+                seen.add(app_id)
+                app_ids.append(app_id)
+    return app_ids, skipped_lines
+
+def batch_lua_file_action(stplugin_path, snapshot, app_ids, action):
+    """Enable, disable or delete the .lua files for many app IDs in one pass over an stplug-in snapshot"""
+    results = {}  # Dict of {app_id: (success, message)}
+    changed_files = []  # Renamed/deleted filenames, for StplugInIndex.apply_changes()
+    
+    for app_id in app_ids:
+        lua_name = f"{app_id}.lua"
+        disabled_name = f"{app_id}.lua.disabled"
+        has_lua = lua_name in snapshot
+        has_disabled = disabled_name in snapshot
+        
+        try:
+            if action == "disable":
+                if not has_lua:
+                    results[app_id] = (True, "Already disabled") if has_disabled else (False, f"Lua file not found for {app_id}")
+                    continue
+                if has_disabled:
+                    results[app_id] = (False, f"Disabled file already exists for {app_id}")
+                    continue
+                os.rename(os.path.join(stplugin_path, lua_name), os.path.join(stplugin_path, disabled_name))
+                changed_files.extend((lua_name, disabled_name))
+                results[app_id] = (True, "Disabled")
+            elif action == "enable":
+                if not has_disabled:
+                    results[app_id] = (True, "Already enabled") if has_lua else (False, f"Disabled file not found for {app_id}")
+                    continue
+                if has_lua:
+                    results[app_id] = (False, f"Lua file already exists for {app_id}")
+                    continue
+                os.rename(os.path.join(stplugin_path, disabled_name), os.path.join(stplugin_path, lua_name))
+                changed_files.extend((lua_name, disabled_name))
+                results[app_id] = (True, "Enabled")
+            elif action == "delete":
+                if not has_lua and not has_disabled:
+                    results[app_id] = (False, f"Lua file not found for {app_id}")
+                    continue
+                # Same as delete_lua_file: the enabled file first, otherwise the disabled one
+                file = lua_name if has_lua else disabled_name
+                os.remove(os.path.join(stplugin_path, file))
+                changed_files.append(file)
+                results[app_id] = (True, "Deleted")
+            else:
+                raise ValueError(f"Unknown action: {action}")
+        except OSError as e:
+            print(f"[{action.upper()}] ERROR: Failed to {action} {app_id}: {e}")
+            results[app_id] = (False, f"Error: {e}")
+    
+    return results, changed_files
+
+def is_app_lua_filename(filename):
+    """Check if filename is valid (only numbers + .lua)"""
+    if not filename.lower().endswith('.lua'):
+        return False
+    
+    # Check if name part (without .lua) contains only digits
+    return filename[:-4].isdigit()
+
+def patch_lua_path(file_path, writer=None, models=None):
+    """Patch a .lua file on disk, returns the patch result"""
+    # A model that is already cached answers files with nothing to change without reading them again
+    # (a cold cache is not filled here - that would read and parse the file on top of the patch scan)
+    if models is not None:
+        model = models.peek(file_path)
+        if model is not None:
+            result, needs_write = lua_model_patch_result(model)
+            if not needs_write:
+                return result
+    
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    
+    result, new_data = patch_lua_content(data)
+    
+    # Files with nothing to change are left untouched
+    if new_data is not None:
+        if writer is None:
+            with AtomicFileWriter() as single_writer:
+                single_writer.write(file_path, new_data)
+        else:
+            writer.write(file_path, new_data)
+    return result
+
+def install_lua_bytes(filename, data, stplugin_path, writer):
+    """Patch .lua bytes and stage them into stplug-in, returns (status, detail)"""
+    try:
+        patch_result, patched_data = patch_lua_content(data)
+    except Exception:
+        # Unpatchable content is still installed as-is
+        patch_result, patched_data = False, None
+    
+    if patch_result in ("updates_disabled", "updates_disabled_modified", "no_addappid"):
+        return patch_result, None
+    
+    # Install the patched file (or the original if no changes were needed)
+    dest_path = os.path.join(stplugin_path, filename)
+    writer.write(dest_path, patched_data if patched_data is not None else data)
+    
+    # Also remove any disabled version of the same file (e.g., 500.lua.disabled)
+    disabled_path = dest_path + ".disabled"
+    if os.path.exists(disabled_path):
+        writer.remove(disabled_path)
+        return "installed", os.path.basename(disabled_path)
+    return "installed", None
+
+def install_lua_files(lua_files, stplugin_path, writer, lua_blobs=()):
+    """Install .lua files (paths, plus in-memory (filename, data) pairs) into stplug-in, returns a list of (filename, app_id, status, detail)"""
+    results = []
+    for lua_file in lua_files:
+        filename = os.path.basename(lua_file)
+        app_id = filename[:-4]  # Remove .lua extension
+        try:
+            with open(lua_file, 'rb') as f:
+                data = f.read()
+            status, detail = install_lua_bytes(filename, data, stplugin_path, writer)
+        except Exception as e:
+            status, detail = "error", str(e)
+        results.append((filename, app_id, status, detail))
+    
+    for filename, data in lua_blobs:
+        try:
+            status, detail = install_lua_bytes(filename, data, stplugin_path, writer)
+        except Exception as e:
+            status, detail = "error", str(e)
+        results.append((filename, filename[:-4], status, detail))
+    return results
+
+def read_lua_archive(archive_path):
+    """Read the app .lua members of an archive into memory, returns [(filename, data)] or None if unsupported"""
+    archive_lower = archive_path.lower()
+    lua_blobs = []
+    
+    # Only <digits>.lua members are read - everything else in the archive is never touched
+    if archive_lower.endswith('.zip'):
+        with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+            for info in zip_ref.infolist():
+                filename = os.path.basename(info.filename)
+                if not info.is_dir() and is_app_lua_filename(filename):
+                    lua_blobs.append((filename, zip_ref.read(info)))
+    elif archive_lower.endswith('.rar'):
+        if not rarfile:
+            return None
+        with rarfile.RarFile(archive_path, 'r') as rar_ref:
+            for info in rar_ref.infolist():
+                filename = os.path.basename(info.filename)
+                if not info.is_dir() and is_app_lua_filename(filename):
+                    lua_blobs.append((filename, rar_ref.read(info)))
+    elif archive_lower.endswith('.7z'):
+        if not py7zr:
+            return None
+        with py7zr.SevenZipFile(archive_path, 'r') as sz_ref:
+            targets = [name for name in sz_ref.getnames() if is_app_lua_filename(os.path.basename(name))]
+            if not targets:
+                return []
+            if hasattr(sz_ref, 'read'):
+                for name, member in sz_ref.read(targets).items():
+                    lua_blobs.append((os.path.basename(name), member.read()))
+            else:
+                # Newer py7zr has no in-memory read - extract just the selected members
+                with tempfile.TemporaryDirectory() as temp_dir:
+                    sz_ref.extract(path=temp_dir, targets=targets)
+                    for name in targets:
+                        member_path = os.path.join(temp_dir, name)
+                        if os.path.isfile(member_path):
+                            with open(member_path, 'rb') as f:
+                                lua_blobs.append((os.path.basename(name), f.read()))
+    return lua_blobs
+
+# Leading bytes of the archive formats downloads may arrive as
+DOWNLOAD_SIGNATURES = (
+    (b'PK\x03\x04', '.zip'),
+    (b'Rar!\x1a\x07', '.rar'),
+    (b'7z\xbc\xaf\x27\x1c', '.7z'),
+)
+
+def sniff_download_extension(head):
+    """Pick the download's file extension from its first bytes, returns None if it is neither an archive nor lua text"""
+    for signature, extension in DOWNLOAD_SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    
+    # Anything else has to look like lua: non-empty UTF-8 text, not an HTML error page
+    if not head.strip() or b'\x00' in head or head.lstrip().startswith(b'<'):
+        return None
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # The first chunk may end in the middle of a multi-byte character
+        if e.start < len(head) - 3:
+            return None
+    return '.lua'
+
+DOWNLOAD_WRITE_BATCH = 1024 * 1024  # Bytes of a streamed archive collected before each disk write
+
+_CONTENT_RANGE_PATTERN = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+)', re.IGNORECASE)
+
+class PartialDownload:
+    """An archive download in progress under the download directory, keyed by source and app ID so it can be resumed"""
+    
+    def __init__(self, download_dir, api_url, app_id):
+        source_key = hashlib.sha1(api_url.encode('utf-8')).hexdigest()[:12]
+        self.path = os.path.join(download_dir, f"{app_id}_{source_key}.partial")
+        self.meta_path = self.path + '.json'
+        self.meta = None  # {'validator', 'total', 'extension'} when the source can resume this file
+        self.offset = 0  # Bytes already on disk that a Range request can continue from
+        self.expected_total = None  # Final length to verify against, when the server told us
+        self.resuming = False
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            size = os.path.getsize(self.path)
+        except (OSError, ValueError):
+            return
+        if meta.get('validator') and meta.get('extension') and 0 < size < meta.get('total', 0):
+            self.meta = meta
+            self.offset = size
+    
+    def request_headers(self):
+        """Range headers to continue the partial file, or an empty dict for a full download"""
+        if not self.offset:
+            return {}
+        return {'Range': f"bytes={self.offset}-", 'If-Range': self.meta['validator']}
+    
+    def start(self, response):
+        """Match a response against the partial file, returns True if it continues it"""
+        headers = response.headers
+        if self.offset and response.status_code == 206:
+            match = _CONTENT_RANGE_PATTERN.match(headers.get('content-range', ''))
+            if match and int(match.group(1)) == self.offset and int(match.group(3)) == self.meta['total']:
+                self.resuming = True
+                self.expected_total = self.meta['total']
+                return True
+        
+        # Anything else is the whole file again (the source changed, or ignored the Range)
+        self.offset = 0
+        self.meta = None
+        self.resuming = False
+        self.expected_total = None
+        
+        # Decoded bytes don't line up with Content-Length, so encoded bodies can't be verified or resumed
+        if headers.get('content-encoding', 'identity').lower() != 'identity':
+            return False
+        content_length = headers.get('content-length', '')
+        if content_length.isdigit():
+            self.expected_total = int(content_length)
+        
+        # If-Range needs a strong validator
+        etag = headers.get('etag', '')
+        validator = etag if etag and not etag.startswith('W/') else headers.get('last-modified')
+        if headers.get('accept-ranges', '').lower() == 'bytes' and validator and self.expected_total:
+            self.meta = {'validator': validator, 'total': self.expected_total}
+        return False
+    
+    def open(self, extension):
+        """Open the partial file for writing - appending when resuming"""
+        if self.resuming:
+            return open(self.path, 'ab')
+        if self.meta is not None:
+            self.meta['extension'] = extension
+            with AtomicFileWriter(sync=False) as writer:
+                writer.write_text(self.meta_path, json.dumps(self.meta))
+        else:
+            self._remove(self.meta_path)
+        return open(self.path, 'wb')
+    
+    def is_complete(self):
+        """Check the partial file has the length the server announced"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return False
+        return self.expected_total is None or size == self.expected_total
+    
+    def finish(self, file_path):
+        """Move the completed download to file_path"""
+        os.replace(self.path, file_path)
+        self._remove(self.meta_path)
+    
+    def release(self):
+        """Give up on this attempt: keep what can be resumed later, delete the rest"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        if self.meta is not None and 0 < size < self.meta['total']:
+            print(f"[DOWNLOAD] Kept {size} of {self.meta['total']} bytes for resuming")
+            return
+        self._remove(self.path)
+        self._remove(self.meta_path)
+    
+    @staticmethod
+    def discard_all(download_dir, app_id):
+        """Delete every partial download of an app, from any source"""
+        prefix = f"{app_id}_"
+        try:
+            names = os.listdir(download_dir)
+        except OSError:
+            return
+        for name in names:
+            if name.startswith(prefix) and name.endswith(('.partial', '.partial.json')):
+                PartialDownload._remove(os.path.join(download_dir, name))
+    
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+QUEUE_DISPLAY_LIMIT = 100  # Rows the download manager shows per list (queued, completed, failed)
+
+class DownloadQueue:
+    """Queued download items: a heap ordered by (priority, order) plus an app ID -> item map, removals are lazy"""
+    
+    def __init__(self):
+        self._heap = []  # (priority, order, app_id_str), stale entries are skipped on pop
+        self._items = {}  # {app_id_str: item}
+        self._keys = {}  # {app_id_str: (priority, order)} of each item's live heap entry
+        self._next_order = 0  # Counts up for appends
+        self._front_order = 0  # Counts down for move-to-front
+    
+    def __len__(self):
+        return len(self._items)
+    
+    def __contains__(self, app_id):
+        return str(app_id) in self._items
+    
+    def __iter__(self):
+        """Items in the order they will start, paused ones last"""
+        return iter(sorted(self._items.values(), key=lambda item: (item.get('paused', False), self._keys.get(str(item['app_id']), (0, 0)))))
+    
+    def get(self, app_id):
+        return self._items.get(str(app_id))
+    
+    def _schedule(self, app_id_str, priority, order):
+        self._keys[app_id_str] = (priority, order)
+        heapq.heappush(self._heap, (priority, order, app_id_str))
+        
+        # Rebuild once stale entries from moves and cancels outnumber the live ones
+        if len(self._heap) > 2 * len(self._keys) + 64:
+            self._heap = [(key[0], key[1], queued_id) for queued_id, key in self._keys.items()]
+            heapq.heapify(self._heap)
+    
+    def push(self, item, priority=0, front=False):
+        """Queue an item, returns False if its app ID is already queued"""
+        app_id_str = str(item['app_id'])
+        if app_id_str in self._items:
+            return False
+        item['priority'] = priority
+        item['paused'] = False
+        self._items[app_id_str] = item
+        self._schedule(app_id_str, priority, self._take_order(front))
+        return True
+    
+    def _take_order(self, front):
+        if front:
+            self._front_order -= 1
+            return self._front_order
+        self._next_order += 1
+        return self._next_order
+    
+    def pop(self):
+        """Take the next item that isn't paused, or None"""
+        while self._heap:
+            priority, order, app_id_str = heapq.heappop(self._heap)
+            if self._keys.get(app_id_str) != (priority, order):
+                continue  # Cancelled, paused or moved since this entry was pushed
+            del self._keys[app_id_str]
+            return self._items.pop(app_id_str)
+        return None
+    
+    def remove(self, app_id):
+        """Drop an item from the queue (its heap entry goes stale), returns it or None"""
+        app_id_str = str(app_id)
+        self._keys.pop(app_id_str, None)
+        return self._items.pop(app_id_str, None)
+    
+    def move_to_front(self, app_id):
+        """Start this item next among its priority, returns False if it isn't queued or is paused"""
+        app_id_str = str(app_id)
+        item = self._items.get(app_id_str)
+        if item is None or item.get('paused'):
+            return False
+        self._schedule(app_id_str, item['priority'], self._take_order(True))
+        return True
+    
+    def pause(self, app_id):
+        """Keep an item queued but skip it until resumed"""
+        app_id_str = str(app_id)
+        item = self._items.get(app_id_str)
+        if item is None or item.get('paused'):
+            return False
+        item['paused'] = True
+        self._keys.pop(app_id_str, None)
+        return True
+    
+    def resume(self, app_id, front=False):
+        """Make a paused item eligible to start again"""
+        app_id_str = str(app_id)
+        item = self._items.get(app_id_str)
+        if item is None or not item.get('paused'):
+            return False
+        item['paused'] = False
+        self._schedule(app_id_str, item['priority'], self._take_order(front))
+        return True
+    
+    def head(self, count):
+        """The first `count` items in start order, without sorting the whole queue"""
+        return heapq.nsmallest(count, self._items.values(), key=lambda item: (item.get('paused', False), self._keys.get(str(item['app_id']), (0, 0))))
+    
+    def runnable_count(self):
+        """Number of queued items that aren't paused"""
+        return len(self._keys)
+    
+    def clear(self):
+        self._heap.clear()
+        self._items.clear()
+        self._keys.clear()
 
-# Try to import archive libraries
-try:
-    import rarfile
-except ImportError:
-    rarfile = None
+class DownloadQueueJournal:
+    """Append-only JSON-lines log of download queue events, replayed at startup so a queue survives restarts and crashes"""
+    
+    RESULT_FIELDS = ('file_size_mb', 'speed_mbps', 'time_taken', 'filename', 'api_used', 'error_message')
+    
+    def __init__(self, journal_file):
+        self.journal_file = journal_file
+        self.lock = threading.Lock()
+        self.handle = None  # Opened for appending on the first event
+    
+    def replay(self):
+        """Rebuild the queue from the journal, returns download items (in-flight ones come back as queued)"""
+        entries = {}  # {app_id_str: item} in the order they were added
+        next_order = 0
+        front_order = 0
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            print(f"[QUEUE] Error reading download queue journal: {e}")
+            return []
+        
+        for line in lines:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue  # Torn last line from a crash
+            if not isinstance(event, dict):
+                continue
+            op = event.get('op')
+            app_id_str = str(event.get('app_id'))
+            
+            if op == 'clear':
+                entries.clear()
+            elif op == 'clear_finished':
+                entries = {key: item for key, item in entries.items() if item['status'] not in ('completed', 'failed')}
+            elif op == 'add':
+                next_order += 1
+                entries.pop(app_id_str, None)
+                entries[app_id_str] = {
+                    'app_id': event.get('app_id'),
+                    'game_name': event.get('game_name', ''),
+                    'status': 'queued',
+                    'progress': 0,
+                    'priority': event.get('priority', 0),
+                    'order': next_order
+                }
+            elif app_id_str in entries:
+                item = entries[app_id_str]
+                if op == 'start':
+                    item['status'] = 'downloading'
+                elif op == 'done':
+                    item['status'] = 'completed' if event.get('success') else 'failed'
+                    item.update({key: event[key] for key in self.RESULT_FIELDS if key in event})
+                elif op == 'pause':
+                    item['status'] = 'paused'
+                elif op == 'resume':
+                    item['status'] = 'queued'
+                elif op == 'front':
+                    front_order -= 1
+                    item['order'] = front_order
+                elif op == 'remove':
+                    del entries[app_id_str]
+        
+        items = sorted(entries.values(), key=lambda item: (item['priority'], item['order']))
+        for item in items:
+            del item['order']
+            if item['status'] == 'downloading':
+                item['status'] = 'queued'  # Was in flight when the app stopped
+        return items
+    
+    def rewrite(self, items):
+        """Replace the journal with the shortest event list that replays to these items"""
+        events = []
+        for item in items:
+            events.append({'op': 'add', 'app_id': item['app_id'], 'game_name': item['game_name'], 'priority': item.get('priority', 0)})
+            if item['status'] == 'paused':
+                events.append({'op': 'pause', 'app_id': item['app_id']})
+            elif item['status'] in ('completed', 'failed'):
+                events.append(self.done_event(item, item['status'] == 'completed'))
+        
+        with self.lock:
+            self._close()
+            try:
+                with AtomicFileWriter() as writer:
+                    writer.write_text(self.journal_file, ''.join(json.dumps(event, ensure_ascii=False) + '\n' for event in events))
+            except Exception as e:
+                print(f"[QUEUE] Error compacting download queue journal: {e}")
+    
+    def done_event(self, item, success):
+        event = {'op': 'done', 'app_id': item['app_id'], 'success': success}
+        event.update({key: item[key] for key in self.RESULT_FIELDS if key in item})
+        return event
+    
+    def record(self, *events):
+        """Append events and flush them to disk before returning"""
+        if not events:
+            return
+        data = ''.join(json.dumps(event, ensure_ascii=False) + '\n' for event in events)
+        with self.lock:
+            try:
+                if self.handle is None:
+                    self.handle = open(self.journal_file, 'a', encoding='utf-8')
+                self.handle.write(data)
+                self.handle.flush()
+                os.fsync(self.handle.fileno())
+            except Exception as e:
+                print(f"[QUEUE] Error writing download queue journal: {e}")
+    
+    def close(self):
+        with self.lock:
+            self._close()
+    
+    def _close(self):
+        if self.handle is not None:
+            try:
+                self.handle.close()
+            except OSError:
+                pass
+            self.handle = None
 
-try:
-    import py7zr
-except ImportError:
-    py7zr = None
+class TokenBucket:
+    """Token bucket rate limiter: `rate` requests per second with bursts of up to `burst`"""
+    
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def reserve(self):
+        """Take a token, returns how many seconds the caller must wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1.0
+            # A negative balance is a queue of callers that already reserved future tokens
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
 
-# Version and repository configuration
-__version__ = "2.6"  # Your current version
-__github_repo__ = "madoiscool/LuaTools"  # Replace with your actual repo
+class HttpLayer:
+    """Shared HTTP clients for every request: one pool per host with HTTP/2, keep-alive, the same default timeouts
+    and a per-host token bucket rate limiter"""
+    
+    HEADERS = {"User-Agent": "Mozilla/5.0"}
+    # Hosts with known limits of their own, capping the configured rate limit (store API: about 200 requests per 5 minutes)
+    HOST_RATE_LIMITS = {'store.steampowered.com': (1.0, 5)}
+    
+    def __init__(self, timeout=10.0, connect_timeout=5.0, max_connections=8, max_keepalive=4, keepalive_expiry=30.0,
+                 rate_limit=0, burst=1):
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.lock = threading.Lock()
+        self.clients = {}  # {host: httpx.Client}
+        self.async_clients = {}  # {host: httpx.AsyncClient}, only used from the download engine's loop
+        self.buckets = {}  # {host: TokenBucket}
+        self.rate_limit = 0.0
+        self.burst = 1
+        self.configure_rate_limit(rate_limit, burst)
+    
+    def configure_rate_limit(self, rate_limit, burst):
+        """Set the requests per second (0 = unlimited) and burst size every host gets"""
+        rate_limit = max(0.0, float(rate_limit))
+        burst = max(1, int(burst))
+        with self.lock:
+            if (rate_limit, burst) != (self.rate_limit, self.burst):
+                self.rate_limit = rate_limit
+                self.burst = burst
+                self.buckets = {}
+    
+    def host_rate_limit(self, host):
+        """The (requests per second, burst) applying to a host, rate 0 means unlimited"""
+        host_limit = self.HOST_RATE_LIMITS.get(host)
+        if host_limit is None:
+            return self.rate_limit, self.burst
+        if self.rate_limit <= 0:
+            return host_limit
+        return min(self.rate_limit, host_limit[0]), min(self.burst, host_limit[1])
+    
+    def reserve(self, url):
+        """Take a rate limiter token for the URL's host, returns the seconds to wait before sending"""
+        host = self.host_of(url)
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                rate_limit, burst = self.host_rate_limit(host)
+                if rate_limit <= 0:
+                    return 0.0
+                bucket = self.buckets[host] = TokenBucket(rate_limit, burst)
+            return bucket.reserve()
+    
+    def throttle(self, url):
+        """Block until the URL's host may be sent another request, returns the seconds waited"""
+        wait = self.reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+    
+    async def async_throttle(self, url):
+        """Async throttle for the download engine's loop"""
+        wait = self.reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+    
+    @staticmethod
+    def host_of(url):
+        return urllib.parse.urlsplit(url).netloc.lower()
+    
+    def _client_options(self):
+        return {
+            'http2': True,
+            'follow_redirects': True,
+            'headers': self.HEADERS,
+            'timeout': httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            'limits': httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry
+            )
+        }
+    
+    def client(self, url):
+        """The pooled client for a URL's host (created on first use)"""
+        host = self.host_of(url)
+        with self.lock:
+            client = self.clients.get(host)
+            if client is None:
+                client = httpx.Client(**self._client_options())
+                self.clients[host] = client
+            return client
+    
+    def request(self, method, url, **kwargs):
+        self.throttle(url)
+        return self.client(url).request(method, url, **kwargs)
+    
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+    
+    def stream(self, method, url, throttle=True, **kwargs):
+        """Streaming request context manager, same as httpx.Client.stream (throttle=False if already throttled)"""
+        if throttle:
+            self.throttle(url)
+        return self.client(url).stream(method, url, **kwargs)
+    
+    def async_client(self, url):
+        """The pooled async client for a URL's host - call from the download engine's loop"""
+        host = self.host_of(url)
+        client = self.async_clients.get(host)
+        if client is None:
+            client = httpx.AsyncClient(**self._client_options())
+            self.async_clients[host] = client
+        return client
+    
+    @contextlib.asynccontextmanager
+    async def async_stream(self, method, url, throttle=True, **kwargs):
+        """Streaming request async context manager, same as httpx.AsyncClient.stream (throttle=False if already throttled)"""
+        if throttle:
+            await self.async_throttle(url)
+        async with self.async_client(url).stream(method, url, **kwargs) as response:
+            yield response
+    
+    async def aclose_async(self):
+        """Close the async clients (on the loop that created them)"""
+        clients, self.async_clients = list(self.async_clients.values()), {}
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception:
+                pass
+    
+    def close(self):
+        """Close the blocking clients"""
+        with self.lock:
+            clients, self.clients = list(self.clients.values()), {}
+        for client in clients:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+class AsyncDownloadEngine:
+    """Runs downloads as coroutines on one background asyncio loop, using the HTTP layer's async clients"""
+    
+    def __init__(self, http, max_concurrent=3, blocking_workers=4):
+        self.http = http
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.blocking_workers = blocking_workers
+        self.loop = None
+        self.thread = None
+        self.semaphore = None
+        self.executor = None  # Small fixed pool for file processing/installing
+        self.lock = threading.Lock()
+    
+    def start(self):
+        """Start the event loop thread if it isn't running yet"""
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            
+            ready = threading.Event()
+            self.executor = ThreadPoolExecutor(max_workers=self.blocking_workers, thread_name_prefix="download-io")
+            
+            def run_loop():
+                self.loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(self.loop)
+                self.semaphore = asyncio.Semaphore(self.max_concurrent)
+                ready.set()
+                try:
+                    self.loop.run_forever()
+                    self.loop.run_until_complete(self.http.aclose_async())
+                except Exception as e:
+                    print(f"[DOWNLOAD] Engine loop error: {e}")
+                finally:
+                    self.loop.close()
+            
+            self.thread = threading.Thread(target=run_loop, name="download-engine", daemon=True)
+            self.thread.start()
+            ready.wait()
+            print(f"[DOWNLOAD] Download engine started ({self.max_concurrent} concurrent)")
+    
+    def set_max_concurrent(self, max_concurrent):
+        """Change the concurrency limit (downloads already running keep their slot)"""
+        max_concurrent = max(1, int(max_concurrent))
+        if max_concurrent == self.max_concurrent:
+            return
+        self.max_concurrent = max_concurrent
+        if self.loop and self.thread and self.thread.is_alive():
+            def swap():
+                self.semaphore = asyncio.Semaphore(max_concurrent)
+            self.loop.call_soon_threadsafe(swap)
+    
+    def submit(self, coro_func, *args):
+        """Schedule coro_func(http, *args) on the loop, returns a concurrent.futures.Future"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._run(coro_func, args), self.loop)
+    
+    async def _run(self, coro_func, args):
+        async with self.semaphore:
+            return await coro_func(self.http, *args)
+    
+    def run_blocking(self, func, *args):
+        """Await a blocking call (disk I/O, extracting, installing) on the engine's worker pool"""
+        return asyncio.get_running_loop().run_in_executor(self.executor, lambda: func(*args))
+    
+    def stop(self):
+        """Stop the loop and close the async clients"""
+        with self.lock:
+            if self.loop and self.thread and self.thread.is_alive():
+                self.loop.call_soon_threadsafe(self.loop.stop)
+                self.thread.join(timeout=2)
+            if self.executor:
+                self.executor.shutdown(wait=False)
+            self.thread = None
 
 class SteamStyleApp:
     def __init__(self, root):
@@ -186,6 +2358,32 @@ class SteamStyleApp:
         # Load settings
         self.settings = self.load_settings()
         
+        # Index of .lua file states so repeat patch runs only touch changed files
+        self.patch_index = LuaFileStateIndex(os.path.join(application_path, 'melly-patch-index.json'))
+        
+        # Shared cached listing of the stplug-in directory
+        self.stplugin_index = StplugInIndex()
+        
+        # Parsed .lua models shared by patching, the update disabler and listings
+        self.lua_models = LuaModelCache()
+        
+        # Depot/manifest ID -> .lua file index for God Mode search and export
+        self.depot_index = DepotIndex(self.lua_models)
+        
+        # App IDs with updates disabled, so the Update Disabler opens without reading files
+        self.updates_disabled_apps = UpdatesDisabledSet(os.path.join(application_path, 'melly-updates-disabled.json'))
+        
+        # Per-API latency/success statistics for auto-ordering the manifest APIs
+        self.api_stats = ApiStats(os.path.join(application_path, 'melly-api-stats.json'))
+        self.negative_cache = NegativeCache(
+            os.path.join(application_path, 'melly-unavailable-cache.json'),
+            self.settings.get('negative_cache_ttl_hours', 24)
+        )
+        self.api_breakers = ApiCircuitBreakers(
+            self.settings.get('breaker_failure_threshold', 3),
+            self.settings.get('breaker_cooldown_seconds', 60)
+        )
+        
         # Enable drag and drop if available
         if DND_AVAILABLE:
             self.enable_drag_drop()
@@ -202,8 +2400,11 @@ class SteamStyleApp:
         # Set up Steam directories on first launch
         self.setup_steam_directories()
         
+        # Watch stplug-in so changes from any tool show up without a manual refresh
+        self.start_stplugin_watcher()
+        
         # Initialize download queue
-        self.download_queue = []
+        self.download_queue = DownloadQueue()
         self.completed_downloads = []
         self.failed_downloads = []
         self.current_download = None
@@ -212,21 +2413,26 @@ class SteamStyleApp:
         # Track queued games for persistent state
         self.queued_games = set()  # Set of app_ids that are queued or downloading
         
+        # God Mode multi-select for batch enable/disable/delete
+        self.god_mode_selected = set()  # Set of selected app_ids
+        self.god_mode_select_boxes = {}  # Dict of {app_id: checkbox} for cards on screen
+        
         # Multi-threaded download management
         self.active_downloads = {}  # Dict of {app_id: download_item} for currently downloading items
-        self.download_threads = {}  # Dict of {app_id: thread} for active download threads
+        self.download_threads = {}  # Dict of {app_id: future} for downloads running on the engine
         self.current_batch_completed = []
         self.current_batch_failed = []
         
-        # Persistent HTTP client for downloads (keeps connections warm, supports HTTP/2)
-        try:
-            self.http_client = httpx.Client(
-                http2=True,
-                follow_redirects=True,
-                headers={"User-Agent": "Mozilla/5.0"}
-            )
-        except Exception:
-            self.http_client = None
+        # Every request goes through one HTTP layer (pooled per host, HTTP/2, keep-alive)
+        self.http = HttpLayer()
+        self.apply_rate_limit_settings()
+        
+        # Queued downloads run as coroutines on one background event loop (started on first use)
+        self.download_engine = AsyncDownloadEngine(self.http, int(self.settings.get('max_download_threads', 3)))
+        
+        # Queue events are journaled so a queue survives restarts and crashes
+        self.queue_journal = DownloadQueueJournal(os.path.join(application_path, 'melly-download-queue.journal'))
+        self.restore_download_queue()
         
         # Apply minimize behavior based on settings
         self.apply_minimize_setting()
@@ -766,6 +2972,14 @@ class SteamStyleApp:
             'auto_restart_steam': False,
             'api_timeout': 10,
             'max_download_threads': 3,  # New setting for concurrent downloads
+            'hedged_downloads': False,  # Race the next API if the current one is slow to answer
+            'api_auto_order': False,  # Try APIs by observed expected time-to-success instead of list order
+            'breaker_failure_threshold': 3,  # Consecutive timeouts/network errors before an API is skipped
+            'breaker_cooldown_seconds': 60,  # How long a tripped API is skipped before one probe is allowed
+            'negative_cache_ttl_hours': 24,  # How long an API's "not available" answer for an app is trusted (0 = off)
+            'hedge_delay_ms': 1000,  # How long to wait before launching the next API in hedged mode
+            'rate_limit_per_second': 5,  # Requests per second sent to any one host (0 = unlimited)
+            'rate_limit_burst': 10,  # Requests a host may get back to back before the rate limit applies
             'theme': 'steam_dark',
             'minimize_to_tray': False,
             # Legacy single API settings (for backward compatibility)
@@ -1467,93 +3681,44 @@ class SteamStyleApp:
         
     def find_lua_files(self, stplugin_path):
         """Find all .lua files in the stplug-in directory"""
-        lua_files = []
-        disabled_files = []
         try:
-            for file in os.listdir(stplugin_path):
-                if file.endswith('.lua'):
-                    # Only include files that end exactly with .lua (no additional text before .lua)
-                    # This excludes files like "filename.text.lua" and only includes "filename.lua"
-                    if file.count('.') == 1:  # Only one dot, which should be the .lua extension
-                        # Skip Steamtools.lua file
-                        if file.lower() != 'steamtools.lua':
-                            lua_files.append(os.path.join(stplugin_path, file))
-                elif file.endswith('.lua.disabled'):
-                    # Check for disabled files
-                    if file.count('.') == 2:  # Two dots: filename.lua.disabled
-                        # Skip Steamtools.lua.disabled file
-                        if file.lower() != 'steamtools.lua.disabled':
-                            disabled_files.append(os.path.join(stplugin_path, file))
+            return self.stplugin_index.find_lua_files(stplugin_path)
         except Exception as e:
             self.log_message(f"Error reading stplug-in directory: {e}", self.colors['error'])
-        return lua_files, disabled_files
+            return [], []
         
     def extract_app_id(self, file_path):
         """Extract app ID from filename (e.g., 613100.lua -> 613100)"""
         filename = os.path.basename(file_path)
         return filename.replace('.lua', '')
         
-    def patch_lua_file(self, file_path):
+    def patch_lua_file(self, file_path, writer=None):
         """Patch a single .lua file by commenting out setManifestid lines"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            lines = content.split('\n')
-            
-            # Check if file contains LUATOOLS: UPDATES DISABLED! line
-            if any('-- LUATOOLS: UPDATES DISABLED!' in line for line in lines):
-                # If updates are disabled, uncomment any --setManifestid lines
-                modified = False
-                for i, line in enumerate(lines):
-                    if line.strip().startswith('--setManifestid'):
-                        lines[i] = line[2:]  # Remove the -- prefix
-                        modified = True
-                
-                if modified:
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write('\n'.join(lines))
-                    return "updates_disabled_modified"
-                return "updates_disabled"
-            
-            # Check if file contains addappid line
-            has_addappid = any('addappid' in line.lower() for line in lines)
-            if not has_addappid:
-                return "no_addappid"
-            
-            modified = False
-            for i, line in enumerate(lines):
-                if line.strip().startswith('setManifestid'):
-                    lines[i] = '--' + line
-                    modified = True
-                    
-            if modified:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write('\n'.join(lines))
-                return True
-            return False
+            result = patch_lua_path(file_path, writer, self.lua_models)
+            self.record_updates_disabled_state(file_path, result in ("updates_disabled", "updates_disabled_modified"))
+            return result
             
         except Exception as e:
             self.log_message(f"Error patching {file_path}: {e}", self.colors['error'])
-            return False
+            return "error"
             
     def get_steam_app_info(self, app_id):
         """Get app information from Steam API"""
         try:
             url = f"https://store.steampowered.com/api/appdetails?appids={app_id}"
             timeout = self.settings.get('api_timeout', 10)
-            with httpx.Client(timeout=timeout) as client:
-                response = client.get(url)
-                response.raise_for_status()
-                data = response.json()
-                
-                if data.get(str(app_id), {}).get('success'):
-                    app_data = data[str(app_id)]['data']
-                    app_type = app_data.get('type', 'unknown')
-                    app_name = app_data.get('name', 'Unknown')
-                    return app_name, app_type
-                else:
-                    return f"Unknown (ID: {app_id})", "unknown"
+            response = self.http.get(url, timeout=timeout)
+            response.raise_for_status()
+            data = response.json()
+            
+            if data.get(str(app_id), {}).get('success'):
+                app_data = data[str(app_id)]['data']
+                app_type = app_data.get('type', 'unknown')
+                app_name = app_data.get('name', 'Unknown')
+                return app_name, app_type
+            else:
+                return f"Unknown (ID: {app_id})", "unknown"
                     
         except Exception as e:
             self.log_message(f"Error fetching info for app {app_id}: {e}", self.colors['error'])
@@ -1723,30 +3888,64 @@ class SteamStyleApp:
             # Step 6: Patch files
             self.update_status("Patching .lua files...", 60)
             modified_files = []
-            
-            for i, file_path in enumerate(lua_files):
-                if self.cancelled:
-                    return
-                    
-                app_id = self.extract_app_id(file_path)
-                self.log_message(f"Processing {app_id}.lua...")
-                
-                patch_result = self.patch_lua_file(file_path)
-                if patch_result == "updates_disabled":
-                    self.log_message(f"⏸️ Skipped {app_id}.lua - Updates disabled", self.colors['warning'])
-                elif patch_result == "updates_disabled_modified":
-                    self.log_message(f"⏸️ Skipped {app_id}.lua - Updates disabled (uncommented setManifestid)", self.colors['warning'])
-                elif patch_result == "no_addappid":
-                    invalid_files.append(app_id)
-                    self.log_message(f"✗ Skipped {app_id}.lua - No addappid line found", self.colors['error'])
-                elif patch_result:
-                    modified_files.append(app_id)
-                    self.log_message(f"✓ Patched {app_id}.lua")
-                else:
-                    self.log_message(f"- No changes needed for {app_id}.lua")
-                    
-                progress = 60 + (i + 1) * 20 / len(lua_files)
-                self.update_status(f"Patching files... ({i+1}/{len(lua_files)})", progress)
+            skipped_count = 0
+            self.patch_index.prune(lua_files)
+            
+            # All rewrites are staged and flushed to disk together when the batch ends
+            patched_files = []
+            with self.own_stplugin_writes(stplugin_path):
+                with AtomicFileWriter() as writer:
+                    for i, file_path in enumerate(lua_files):
+                        if self.cancelled:
+                            break
+                        
+                        app_id = self.extract_app_id(file_path)
+                        
+                        # Skip files that haven't changed since they last needed no change
+                        cached_result = self.patch_index.lookup(file_path)
+                        if cached_result is not None:
+                            skipped_count += 1
+                            if cached_result == "no_addappid":
+                                invalid_files.append(app_id)
+                            self.record_updates_disabled_state(file_path, cached_result == "updates_disabled")
+                            continue
+                        
+                        self.log_message(f"Processing {app_id}.lua...")
+                        
+                        patch_result = self.patch_lua_file(file_path, writer)
+                        patched_files.append((file_path, patch_result))
+                        if patch_result == "updates_disabled":
+                            self.log_message(f"⏸️ Skipped {app_id}.lua - Updates disabled", self.colors['warning'])
+                        elif patch_result == "updates_disabled_modified":
+                            self.log_message(f"⏸️ Skipped {app_id}.lua - Updates disabled (uncommented setManifestid)", self.colors['warning'])
+                        elif patch_result == "no_addappid":
+                            invalid_files.append(app_id)
+                            self.log_message(f"✗ Skipped {app_id}.lua - No addappid line found", self.colors['error'])
+                        elif patch_result == "error":
+                            pass  # Already logged, and left out of the index so it is retried next run
+                        elif patch_result:
+                            modified_files.append(app_id)
+                            self.log_message(f"✓ Patched {app_id}.lua")
+                        else:
+                            self.log_message(f"- No changes needed for {app_id}.lua")
+                        
+                        progress = 60 + (i + 1) * 20 / len(lua_files)
+                        self.update_status(f"Patching files... ({i+1}/{len(lua_files)})", progress)
+                
+                # Index the files only once the batch is on disk
+                for file_path, patch_result in patched_files:
+                    self.patch_index.record(file_path, patch_result)
+                    if patch_result == "updates_disabled_modified":
+                        self.record_updates_disabled_state(file_path, True)
+                self.depot_index.update_files(stplugin_path, [
+                    os.path.basename(file_path) for file_path, patch_result in patched_files
+                    if patch_result is True or patch_result == "updates_disabled_modified"
+                ])
+            self.patch_index.save()
+            if self.cancelled:
+                return
+            if skipped_count:
+                self.log_message(f"Skipped {skipped_count} unchanged .lua files")
                 
             # Step 7: Get Steam API info for modified files
             if modified_files:
@@ -2083,6 +4282,93 @@ class SteamStyleApp:
             "Maximum number of simultaneous downloads (1-10). Higher values download faster but use more resources"
         )
         
+        # Auto order APIs setting
+        self.create_checkbox_setting(
+            downloader_container,
+            "Auto Order APIs",
+            "api_auto_order",
+            "Try APIs in order of expected time to a successful download (from their observed speed, success rate and timeouts) instead of the list order below"
+        )
+        
+        # Circuit breaker settings
+        self.create_spinbox_setting(
+            downloader_container,
+            "API Failure Threshold",
+            "breaker_failure_threshold",
+            1, 20, 1,
+            "Consecutive timeouts or network errors before an API is skipped for the cool-down"
+        )
+        
+        self.create_spinbox_setting(
+            downloader_container,
+            "API Cool-down (seconds)",
+            "breaker_cooldown_seconds",
+            5, 3600, 5,
+            "How long a failing API is skipped before a single test request is allowed through"
+        )
+        
+        # Unavailable cache setting
+        self.create_spinbox_setting(
+            downloader_container,
+            "Unavailable Cache (hours)",
+            "negative_cache_ttl_hours",
+            0, 720, 1,
+            "How long to remember that an API doesn't have a game and skip asking it again (0 = always ask)"
+        )
+        
+        purge_frame = tk.Frame(downloader_container, bg=self.colors['bg'])
+        purge_frame.pack(fill=tk.X, padx=20, pady=(0, 10))
+        
+        purge_cache_button = tk.Button(
+            purge_frame,
+            text=f"Purge Unavailable Cache ({len(self.negative_cache)})",
+            font=('Segoe UI', 10),
+            bg=self.colors['button_bg'],
+            fg=self.colors['text'],
+            activebackground=self.colors['button_hover'],
+            activeforeground=self.colors['text'],
+            relief=tk.FLAT,
+            padx=20,
+            pady=5,
+            cursor='hand2'
+        )
+        purge_cache_button.config(command=lambda: self.purge_negative_cache(purge_cache_button))
+        purge_cache_button.pack(side=tk.LEFT)
+        
+        # Hedged downloads setting
+        self.create_checkbox_setting(
+            downloader_container,
+            "Hedged Downloads",
+            "hedged_downloads",
+            "Start the next API if the current one hasn't answered after the hedge delay. The first API to deliver a working file wins and the rest are cancelled"
+        )
+        
+        # Hedge delay setting
+        self.create_spinbox_setting(
+            downloader_container,
+            "Hedge Delay (ms)",
+            "hedge_delay_ms",
+            100, 10000, 100,
+            "How long to wait for an API before also trying the next one (hedged downloads only)"
+        )
+        
+        # Rate limit settings
+        self.create_spinbox_setting(
+            downloader_container,
+            "Rate Limit (requests/second per host)",
+            "rate_limit_per_second",
+            0, 100, 1,
+            "How many requests per second any one server gets, so big batches don't get throttled with HTTP 429 (0 = unlimited). Steam store lookups always stay at 1 per second or less"
+        )
+        
+        self.create_spinbox_setting(
+            downloader_container,
+            "Rate Limit Burst",
+            "rate_limit_burst",
+            1, 100, 1,
+            "How many requests a server can get back to back before the rate limit kicks in"
+        )
+        
         # API Management Section
         api_section_label = tk.Label(
             downloader_container,
@@ -2217,7 +4503,7 @@ class SteamStyleApp:
         def load_thread():
             try:
                 # Call Steam API
-                response = httpx.get('https://api.steampowered.com/ISteamApps/GetAppList/v2/')
+                response = self.http.get('https://api.steampowered.com/ISteamApps/GetAppList/v2/')
                 response.raise_for_status()
                 steam_data = response.json()
                 
@@ -2622,6 +4908,37 @@ class SteamStyleApp:
         )
         unavail_spin.pack(side=tk.LEFT, padx=(5, 0))
         unavail_var.trace('w', lambda *args: self.update_api_unavailable_code(index, unavail_var.get()))
+        
+        # Observed statistics row
+        stats_label = tk.Label(
+            api_card,
+            text=self.format_api_stats(api.get('url', '').strip()),
+            bg=self.colors['secondary_bg'],
+            fg=self.colors['text_secondary'],
+            font=('Segoe UI', 8),
+            anchor='w'
+        )
+        stats_label.pack(fill=tk.X, padx=10, pady=(0, 8))
+    
+    def format_api_stats(self, api_url):
+        """One-line summary of an API's observed download statistics"""
+        stats = self.api_stats.get(api_url)
+        if not stats or not stats['attempts']:
+            return "Stats: no downloads yet"
+        
+        attempts = stats['attempts']
+        parts = [
+            f"{attempts} tries",
+            f"{stats['successes'] / attempts:.0%} success",
+            f"{stats['unavailable'] / attempts:.0%} not found",
+            f"{stats['timeouts']} timeouts"
+        ]
+        if stats.get('ewma_latency') is not None:
+            parts.append(f"avg {stats['ewma_latency']:.1f}s")
+        if stats.get('queue_wait_total'):
+            parts.append(f"rate limit wait {stats['ewma_queue_delay']:.1f}s avg")
+        parts.append(f"expected {self.api_stats.expected_time_to_success(api_url):.1f}s per success")
+        return "Stats: " + " · ".join(parts)
     
     def add_new_api(self):
         """Add a new API to the list"""
@@ -2685,22 +5002,8 @@ class SteamStyleApp:
         import json  # Import json for manual parsing
         
         try:
-            # Safety check: ensure http_client is initialized and valid
-            if not hasattr(self, 'http_client') or self.http_client is None:
-                print("[WARNING] http_client not initialized or None, initializing now...")
-                try:
-                    self.http_client = httpx.Client(
-                        http2=True,
-                        follow_redirects=True,
-                        headers={"User-Agent": "Mozilla/5.0"}
-                    )
-                    print("[WARNING] http_client initialized successfully")
-                except Exception as e:
-                    print(f"[WARNING] Failed to initialize http_client: {e}")
-                    self.http_client = None
-            
-            # Use persistent HTTP client for speed
-            client = self.http_client or httpx.Client(http2=True, follow_redirects=True, headers={"User-Agent": "Mozilla/5.0"})
+            # Shared HTTP layer (pooled per host, keeps connections warm)
+            client = self.http
             
             # Load APIs from GitHub raw link
             url = 'https://raw.githubusercontent.com/madoiscool/lt_api_links/refs/heads/main/load_free_manifest_apis'
@@ -2817,22 +5120,8 @@ class SteamStyleApp:
         
         def load_thread():
             try:
-                # Safety check: ensure http_client is initialized and valid
-                if not hasattr(self, 'http_client') or self.http_client is None:
-                    print("[WARNING] http_client not initialized or None, initializing now...")
-                    try:
-                        self.http_client = httpx.Client(
-                            http2=True,
-                            follow_redirects=True,
-                            headers={"User-Agent": "Mozilla/5.0"}
-                        )
-                        print("[WARNING] http_client initialized successfully")
-                    except Exception as e:
-                        print(f"[WARNING] Failed to initialize http_client: {e}")
-                        self.http_client = None
-                
-                # Use persistent HTTP client for speed
-                client = self.http_client or httpx.Client(http2=True, follow_redirects=True, headers={"User-Agent": "Mozilla/5.0"})
+                # Shared HTTP layer (pooled per host, keeps connections warm)
+                client = self.http
                 
                 # Load APIs from GitHub raw link
                 url = 'https://raw.githubusercontent.com/madoiscool/lt_api_links/refs/heads/main/load_free_manifest_apis'
@@ -3036,7 +5325,7 @@ class SteamStyleApp:
         def load_thread():
             try:
                 # Call Steam API
-                response = httpx.get('https://api.steampowered.com/ISteamApps/GetAppList/v2/')
+                response = self.http.get('https://api.steampowered.com/ISteamApps/GetAppList/v2/')
                 response.raise_for_status()
                 steam_data = response.json()
                 
@@ -3569,6 +5858,43 @@ class SteamStyleApp:
         # Update button states based on current queue status
         self.update_god_mode_buttons()
         
+        # Multi-select bar for batch enable/disable/delete
+        self.god_mode_selected = set()
+        self.god_mode_select_boxes = {}
+        selection_frame = tk.Frame(content_frame, bg=self.colors['bg'])
+        selection_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.god_mode_selection_label = tk.Label(
+            selection_frame,
+            text="0 selected",
+            font=('Segoe UI', 10),
+            fg=self.colors['text_secondary'],
+            bg=self.colors['bg']
+        )
+        self.god_mode_selection_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        for button_text, button_command, button_bg, button_hover in (
+            ("Select All", lambda: self.set_all_games_selected(True), self.colors['button_bg'], self.colors['button_hover']),
+            ("Clear", lambda: self.set_all_games_selected(False), self.colors['button_bg'], self.colors['button_hover']),
+            ("✅ Enable", lambda: self.run_batch_game_action("enable"), self.colors['success'], self.colors['success_hover']),
+            ("❌ Disable", lambda: self.run_batch_game_action("disable"), self.colors['warning'], self.colors['warning_hover']),
+            ("🗑 Delete", lambda: self.run_batch_game_action("delete"), self.colors['error'], self.colors['error_hover'])
+        ):
+            tk.Button(
+                selection_frame,
+                text=button_text,
+                font=('Segoe UI', 9),
+                bg=button_bg,
+                fg=self.colors['text'],
+                activebackground=button_hover,
+                activeforeground=self.colors['text'],
+                relief=tk.FLAT,
+                padx=8,
+                pady=2,
+                cursor='hand2',
+                command=button_command
+            ).pack(side=tk.LEFT, padx=(0, 5))
+        
         # Create scrollable frame for games
         canvas = tk.Canvas(content_frame, bg=self.colors['bg'], highlightthickness=0)
         scrollbar = ttk.Scrollbar(content_frame, orient="vertical", command=canvas.yview)
@@ -3642,6 +5968,31 @@ class SteamStyleApp:
             if sort_by in ["last updated (installed only)", "last installed (installed only)"]:
                 show_only_installed = True
             
+            # "depot:<id>" / "manifest:<id>" searches go through the depot index
+            depot_query = parse_depot_query(search_term)
+            if depot_query:
+                if not self.ensure_depot_index(on_ready=lambda: self.current_perform_search() if self.current_search_var is search_var else None):
+                    update_game_display([], 0)
+                    stats_label.config(text="Indexing depots and manifests...")
+                    return
+                
+                matching_app_ids = self.depot_index.lookup_app_ids(*depot_query)
+                for game_data in self.steam_search_cache:
+                    if game_data['app_id'] in matching_app_ids:
+                        total_results_found += 1
+                        filtered_games.append({
+                            'app_id': game_data['app_id'],
+                            'game_name': game_data['game_name'],
+                            'lua_file': game_data['lua_file'],
+                            'is_installed': game_data['is_installed'],
+                            'is_disabled': game_data['is_disabled'],
+                            'file_mod_time': game_data['file_mod_time'],
+                            'file_creation_time': game_data['file_creation_time']
+                        })
+                filtered_games.sort(key=lambda x: x['game_name'].lower())
+                update_game_display(filtered_games[:max_results], total_results_found)
+                return
+            
             if search_term:
                 # Use pre-processed cache for faster searching
                 for game_data in self.steam_search_cache:
@@ -3804,7 +6155,7 @@ class SteamStyleApp:
         # Safety check: ensure download_queue and queued_games are initialized
         if not hasattr(self, 'download_queue'):
             print("[WARNING] download_queue not initialized, initializing now...")
-            self.download_queue = []
+            self.download_queue = DownloadQueue()
             self.completed_downloads = []
             self.failed_downloads = []
             self.current_download = None
@@ -3816,7 +6167,7 @@ class SteamStyleApp:
             self.queued_games = set()
         
         # Check if there are any active downloads
-        has_active_downloads = len(self.download_queue) > 0 or self.current_download is not None
+        has_active_downloads = self.downloads_in_progress()
         
         if has_active_downloads:
             # Show warning message with option to clear queue
@@ -3921,6 +6272,7 @@ class SteamStyleApp:
         
         # Save all current settings
         self.save_settings()
+        self.apply_rate_limit_settings()
         
         # Clean up mouse wheel binding
         self.root.unbind("<MouseWheel>")
@@ -4051,26 +6403,30 @@ class SteamStyleApp:
             credits_text.pack(fill=tk.BOTH, expand=True)
             
             # Load credits from GitHub
-            def load_credits():
-                try:
-                    import httpx
-                    response = httpx.get("https://raw.githubusercontent.com/madoiscool/lt_api_links/refs/heads/main/credits", timeout=10)
-                    if response.status_code == 200:
-                        credits_content = response.text
-                        credits_text.insert(tk.END, credits_content)
-                    else:
-                        credits_text.insert(tk.END, "Failed to load credits from GitHub.\n\nError: " + str(response.status_code))
-                except Exception as e:
-                    credits_text.insert(tk.END, f"Failed to load credits from GitHub.\n\nError: {str(e)}")
-                
+            def show_credits(content):
+                if not credits_text.winfo_exists():
+                    return  # Window closed while loading
+                credits_text.insert(tk.END, content)
                 credits_text.config(state=tk.DISABLED)  # Make read-only
                 
                 # Update scroll region after loading content
                 credits_scrollable_frame.update_idletasks()
                 credits_canvas.configure(scrollregion=credits_canvas.bbox("all"))
             
+            def load_credits():
+                # Network requests can wait on the rate limiter, so they stay off the UI thread
+                try:
+                    response = self.http.get("https://raw.githubusercontent.com/madoiscool/lt_api_links/refs/heads/main/credits", timeout=10)
+                    if response.status_code == 200:
+                        content = response.text
+                    else:
+                        content = "Failed to load credits from GitHub.\n\nError: " + str(response.status_code)
+                except Exception as e:
+                    content = f"Failed to load credits from GitHub.\n\nError: {str(e)}"
+                self.root.after(0, lambda: show_credits(content))
+            
             # Load credits in background
-            credits_window.after(100, load_credits)
+            threading.Thread(target=load_credits, daemon=True).start()
             
             # Bind mouse wheel to the credits text for scrolling
             def _on_credits_mousewheel(event):
@@ -4107,7 +6463,7 @@ class SteamStyleApp:
         # Safety check: ensure download_queue and queued_games are initialized
         if not hasattr(self, 'download_queue'):
             print("[WARNING] download_queue not initialized, initializing now...")
-            self.download_queue = []
+            self.download_queue = DownloadQueue()
             self.completed_downloads = []
             self.failed_downloads = []
             self.current_download = None
@@ -4119,7 +6475,7 @@ class SteamStyleApp:
             self.queued_games = set()
         
         # Check if there are any active downloads
-        has_active_downloads = len(self.download_queue) > 0 or self.current_download is not None
+        has_active_downloads = self.downloads_in_progress()
         
         if has_active_downloads:
             # Show warning message
@@ -4177,7 +6533,7 @@ class SteamStyleApp:
     def process_files(self, file_paths):
         """Process the selected files (lua files or archives)"""
         lua_files = []
-        temp_dirs = []  # Keep track of temp directories to clean up later
+        lua_blobs = []  # (filename, data) read straight out of archives
         
         for file_path in file_paths:
             file_path = file_path.strip('"{}')  # Clean up path
@@ -4190,18 +6546,12 @@ class SteamStyleApp:
                     lua_files.append(file_path)
             elif file_path.lower().endswith(('.zip', '.rar', '.7z')):
                 # Archive file
-                result = self.extract_lua_from_archive(file_path)
-                if isinstance(result, tuple) and len(result) == 2:
-                    archive_lua_files, temp_dir = result
-                    lua_files.extend(archive_lua_files)
-                    if temp_dir:
-                        temp_dirs.append(temp_dir)
-                else:
-                    # Handle case where extraction failed
-                    continue
+                archive_lua_blobs = self.extract_lua_from_archive(file_path)
+                if archive_lua_blobs:
+                    lua_blobs.extend(archive_lua_blobs)
         
-        if lua_files:
-            self.process_lua_files(lua_files, temp_dirs)
+        if lua_files or lua_blobs:
+            self.process_lua_files(lua_files, lua_blobs)
         else:
             messagebox.showwarning("No valid files", "No valid .lua files found in the selected files.")
     
@@ -4227,172 +6577,108 @@ class SteamStyleApp:
     
     def is_valid_lua_filename(self, filename):
         """Check if filename is valid (only numbers + .lua)"""
-        if not filename.lower().endswith('.lua'):
-            return False
-        
-        # Remove .lua extension
-        name_part = filename[:-4]
-        
-        # Check if name part contains only digits
-        return name_part.isdigit()
+        return is_app_lua_filename(filename)
     
     def extract_lua_from_archive(self, archive_path):
-        """Extract .lua files from archive"""
-        lua_files = []
-        temp_dir = tempfile.mkdtemp()
-        
+        """Read the .lua files from an archive into memory, returns [(filename, data)] or None on failure"""
         try:
-            archive_lower = archive_path.lower()
-            
-            if archive_lower.endswith('.zip'):
-                with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-                    zip_ref.extractall(temp_dir)
-                    
-            elif archive_lower.endswith('.rar'):
-                if rarfile:
-                    with rarfile.RarFile(archive_path, 'r') as rar_ref:
-                        rar_ref.extractall(temp_dir)
-                else:
+            lua_blobs = read_lua_archive(archive_path)
+            if lua_blobs is None:
+                if archive_path.lower().endswith('.rar'):
                     messagebox.showwarning("RAR Support", "RAR support not available. Install rarfile library.")
-                    return []
-                    
-            elif archive_lower.endswith('.7z'):
-                if py7zr:
-                    with py7zr.SevenZipFile(archive_path, 'r') as sz_ref:
-                        sz_ref.extractall(temp_dir)
                 else:
                     messagebox.showwarning("7Z Support", "7Z support not available. Install py7zr library.")
-                    return []
-            
-            # Find all .lua files in extracted directory
-            for root, dirs, files in os.walk(temp_dir):
-                for file in files:
-                    if file.lower().endswith('.lua'):
-                        if self.is_valid_lua_filename(file):
-                            lua_files.append(os.path.join(root, file))
+                return None
                         
         except Exception as e:
             messagebox.showerror("Archive Error", f"Error extracting archive: {e}")
-            # Clean up temp directory on error
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            return []
+            return None
         
-        return lua_files, temp_dir  # Return both files and temp directory
+        return lua_blobs
     
-    def process_lua_files(self, lua_files, temp_dirs=None, show_popup=True):
-        """Process the extracted/selected .lua files"""
-        if temp_dirs is None:
-            temp_dirs = []
-            
+    def process_lua_files(self, lua_files, lua_blobs=(), show_popup=True):
+        """Process the selected .lua files and in-memory (filename, data) pairs read from archives, returns how many were installed"""
         # Get Steam stplug-in directory
         steam_path = self.get_steam_install_path()
         if not steam_path:
             messagebox.showerror("Error", "Could not find Steam installation path")
-            return
+            return 0
         
         stplugin_path = os.path.join(steam_path, "config", "stplug-in")
         if not os.path.exists(stplugin_path):
             messagebox.showerror("Error", "stplug-in directory not found")
-            return
+            return 0
         
         # Process each .lua file
         processed_files = []
         app_ids = []
         invalid_files = []  # Track files without addappid
         
+        # Installs are staged and swapped into stplug-in together at the end
         try:
-            for lua_file in lua_files:
-                filename = os.path.basename(lua_file)
-                app_id = filename[:-4]  # Remove .lua extension
-                
-                # First, patch the file (add "--" to setManifestid lines)
-                patch_result = self.patch_lua_file(lua_file)
-                if patch_result == "updates_disabled":
-                    print(f"[INFO] Skipped {filename} - Updates disabled")
-                    continue  # Skip this file
-                elif patch_result == "updates_disabled_modified":
-                    print(f"[INFO] Skipped {filename} - Updates disabled (uncommented setManifestid)")
-                    continue  # Skip this file
-                elif patch_result == "no_addappid":
-                    invalid_files.append(app_id)
-                    continue  # Skip this file
-                elif patch_result:
-                    # Copy patched file to stplug-in directory
-                    dest_path = os.path.join(stplugin_path, filename)
-                    try:
-                        # Remove existing file if it exists to avoid copy conflicts
-                        if os.path.exists(dest_path):
-                            os.remove(dest_path)
-                        
-                        # Also remove any disabled version of the same file (e.g., 500.lua.disabled)
-                        disabled_path = dest_path + ".disabled"
-                        if os.path.exists(disabled_path):
-                            os.remove(disabled_path)
-                            print(f"[INFO] Removed disabled file: {os.path.basename(disabled_path)}")
-                        
-                        shutil.copy2(lua_file, dest_path)
-                        processed_files.append(filename)
-                        app_ids.append(app_id)
-                    except Exception as e:
-                        messagebox.showerror("Error", f"Error copying {filename}: {e}")
-                else:
-                    # File was patched but no changes were needed
-                    # Still copy it to stplug-in directory
-                    dest_path = os.path.join(stplugin_path, filename)
-                    try:
-                        # Remove existing file if it exists to avoid copy conflicts
-                        if os.path.exists(dest_path):
-                            os.remove(dest_path)
-                        
-                        # Also remove any disabled version of the same file (e.g., 500.lua.disabled)
-                        disabled_path = dest_path + ".disabled"
-                        if os.path.exists(disabled_path):
-                            os.remove(disabled_path)
-                            print(f"[INFO] Removed disabled file: {os.path.basename(disabled_path)}")
-                        
-                        shutil.copy2(lua_file, dest_path)
-                        processed_files.append(filename)
-                        app_ids.append(app_id)
-                    except Exception as e:
-                        messagebox.showerror("Error", f"Error copying {filename}: {e}")
-            
-            if processed_files:
-                # Get app names from Steam API
-                self.get_app_names_and_show_results(app_ids, invalid_files, show_popup)
-            elif invalid_files:
-                # Show error for invalid files
-                error_msg = f"The following files were skipped (no addappid line found):\n\n"
-                for app_id in invalid_files:
-                    error_msg += f"• {app_id}.lua\n"
-                messagebox.showwarning("Invalid Files", error_msg)
-                
-        finally:
-            # Clean up temp directories after copying is complete
-            for temp_dir in temp_dirs:
-                try:
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-                except:
-                    pass
+            with self.own_stplugin_writes(stplugin_path):
+                with AtomicFileWriter() as writer:
+                    install_results = install_lua_files(lua_files, stplugin_path, writer, lua_blobs)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error installing .lua files: {e}")
+            return 0
+        
+        # Installed files, and the .disabled copies they replaced, are re-indexed for depot search
+        self.depot_index.update_files(stplugin_path, [
+            name for filename, _, status, detail in install_results if status == "installed" for name in (filename, detail) if name
+        ])
+        
+        for filename, app_id, status, detail in install_results:
+            if status == "installed":
+                if detail:
+                    print(f"[INFO] Removed disabled file: {detail}")
+                processed_files.append(filename)
+                app_ids.append(app_id)
+            elif status == "updates_disabled":
+                print(f"[INFO] Skipped {filename} - Updates disabled")
+            elif status == "updates_disabled_modified":
+                print(f"[INFO] Skipped {filename} - Updates disabled (uncommented setManifestid)")
+            elif status == "no_addappid":
+                invalid_files.append(app_id)
+            else:
+                messagebox.showerror("Error", f"Error copying {filename}: {detail}")
+        
+        if processed_files:
+            # Get app names from Steam API
+            self.get_app_names_and_show_results(app_ids, invalid_files, show_popup)
+        elif invalid_files:
+            # Show error for invalid files
+            error_msg = f"The following files were skipped (no addappid line found):\n\n"
+            for app_id in invalid_files:
+                error_msg += f"• {app_id}.lua\n"
+            messagebox.showwarning("Invalid Files", error_msg)
+        
+        return len(processed_files)
     
     def get_app_names_and_show_results(self, app_ids, invalid_files=None, show_popup=True):
         """Get app names from Steam API and show results"""
         if invalid_files is None:
             invalid_files = []
-            
-        results = []
+        
+        # The names are only for the popup, so there is nothing to look up without one
+        if not show_popup:
+            return
         
         # Check if API timeout is set to 0 (skip API calls)
         if self.settings.get('api_timeout', 10) == 0:
-            for app_id in app_ids:
-                results.append((app_id, f"App ID: {app_id}"))
-        else:
+            results = [(app_id, f"App ID: {app_id}") for app_id in app_ids]
+            self.show_added_results(results, invalid_files)
+            return
+        
+        def lookup_thread():
+            # The lookups can wait on the rate limiter, so they never run on the UI thread
+            results = []
             for app_id in app_ids:
                 app_name, app_type = self.get_steam_app_info(app_id)
                 results.append((app_id, app_name))
+            self.root.after(0, lambda: self.show_added_results(results, invalid_files))
         
-        # Show results popup only if requested
-        if show_popup:
-            self.show_added_results(results, invalid_files)
+        threading.Thread(target=lookup_thread, daemon=True).start()
     
     def show_added_results(self, results, invalid_files=None):
         """Show results popup for added files"""
@@ -4514,9 +6800,169 @@ class SteamStyleApp:
             self.log_message(f"Error creating download directory: {e}", self.colors['error'])
             return None
 
-    def download_manifest(self, app_id, game_name):
-        """Download manifest for a specific game using the modular API system.
-        Tries each enabled API in sequence until one succeeds."""
+    def prompt_for_free_apis(self, app_id):
+        """No APIs are enabled: offer to fetch the free ones.
+        Returns None once APIs are ready, otherwise the (False, message) download result."""
+        print(f"[DOWNLOAD] No enabled APIs configured for {app_id}")
+        
+        # Ask user if they want to fetch free APIs
+        result = messagebox.askyesno(
+            "No APIs Found",
+            "No API's Found, Fetch Free Ones?",
+            icon='question'
+        )
+        
+        if not result:
+            # User chose not to fetch free APIs
+            print(f"[DOWNLOAD] User declined to fetch free APIs for {app_id}")
+            return False, "No enabled APIs configured"
+        
+        print(f"[DOWNLOAD] User chose to fetch free APIs for {app_id}")
+        try:
+            # Run the auto-fetch free APIs script (non-UI version)
+            if self.load_free_apis_from_download():
+                api_list = self.settings.get('api_list', [])
+                enabled_apis = [api for api in api_list if api.get('enabled', True)]
+                if enabled_apis:
+                    print(f"[DOWNLOAD] Successfully loaded {len(enabled_apis)} free APIs, retrying download")
+                    return None
+            print(f"[DOWNLOAD] Failed to load free APIs for {app_id}")
+            return False, "Failed to load free APIs"
+        except Exception as e:
+            print(f"[DOWNLOAD] Error loading free APIs: {e}")
+            return False, f"Error loading free APIs: {str(e)}"
+
+    def save_download_state(self):
+        """Save the API statistics and the unavailable cache if they changed"""
+        self.api_stats.save()
+        self.negative_cache.save()
+
+    def record_api_outcome(self, api_url, app_id, outcome, elapsed):
+        """Feed one API attempt into the statistics, the unavailable cache and the circuit breaker"""
+        self.api_stats.record(api_url, outcome, elapsed)
+        if outcome == 'unavailable':
+            self.negative_cache.add(api_url, app_id)
+        elif outcome == 'success':
+            self.negative_cache.discard(api_url, app_id)
+        if outcome in ('timeout', 'network_error'):
+            self.api_breakers.record_failure(api_url)
+        else:
+            self.api_breakers.record_success(api_url)
+
+    def purge_negative_cache(self, button=None):
+        """Forget every cached "not available" answer"""
+        count = self.negative_cache.purge()
+        print(f"[DOWNLOAD] Purged {count} unavailable cache entries")
+        if button is not None and button.winfo_exists():
+            button.config(text="Purge Unavailable Cache (0)")
+        messagebox.showinfo("Cache Purged", f"Forgot {count} cached unavailable result(s). All APIs will be asked again.")
+
+    def apply_rate_limit_settings(self):
+        """Push the rate limit settings into the HTTP layer"""
+        try:
+            self.http.configure_rate_limit(
+                self.settings.get('rate_limit_per_second', 5),
+                self.settings.get('rate_limit_burst', 10)
+            )
+        except (TypeError, ValueError) as e:
+            print(f"[DOWNLOAD] Invalid rate limit settings: {e}")
+
+    def order_download_apis(self, enabled_apis):
+        """Return the enabled APIs in the order downloads should try them"""
+        self.api_breakers.configure(
+            self.settings.get('breaker_failure_threshold', 3),
+            self.settings.get('breaker_cooldown_seconds', 60)
+        )
+        self.negative_cache.set_ttl(self.settings.get('negative_cache_ttl_hours', 24))
+        if not self.settings.get('api_auto_order', False):
+            return enabled_apis
+        ranked = self.api_stats.rank(enabled_apis)
+        print(f"[DOWNLOAD] Auto order: {', '.join(api.get('name', '?') for api in ranked)}")
+        return ranked
+
+    def install_downloaded_file(self, file_path, filename, app_id, game_name, api_name, total_bytes, download_time):
+        """Check, install and clean up a finished download, returns the download result or None to try the next API"""
+        file_size_mb, speed_mbps = self.log_download_speed(app_id, api_name, total_bytes, download_time)
+        
+        # Check if downloaded file is supported
+        if not self.is_downloaded_file_supported(file_path):
+            print(f"[DOWNLOAD] ERROR: Unsupported file type for {app_id}")
+            # Clean up the unsupported file
+            try:
+                os.remove(file_path)
+            except:
+                pass
+            return None  # Try next API
+        
+        # Process the downloaded file
+        print(f"[DOWNLOAD] Processing downloaded file for {app_id}...")
+        processing_success, processing_message = self.process_downloaded_file(file_path, app_id, game_name)
+        
+        if not processing_success:
+            print(f"[DOWNLOAD] ERROR: Failed to process file for {app_id}: {processing_message}")
+            # Clean up the file if processing failed
+            try:
+                os.remove(file_path)
+            except:
+                pass
+            return None  # Try next API
+        
+        # If backup is disabled, clean up the original file
+        if not self.settings.get('backup_downloads', False):
+            try:
+                os.remove(file_path)
+                print(f"[DOWNLOAD] Cleaned up original file (backup disabled)")
+            except Exception as e:
+                print(f"[DOWNLOAD] Warning: Could not clean up original file: {e}")
+        
+        # Return success with statistics
+        stats = {
+            'file_size_mb': file_size_mb,
+            'speed_mbps': speed_mbps,
+            'time_taken': download_time,
+            'filename': filename,
+            'api_used': api_name
+        }
+        
+        return True, f"Successfully downloaded via {api_name}: {processing_message}", stats
+        
+    def install_streamed_lua(self, data, filename, app_id, game_name, api_name, total_bytes, download_time):
+        """Install a plain .lua download straight from memory, returns the download result"""
+        file_size_mb, speed_mbps = self.log_download_speed(app_id, api_name, total_bytes, download_time)
+        
+        # Patched in memory and swapped into stplug-in/<appid>.lua in one atomic write
+        print(f"[DOWNLOAD] Installing streamed lua for {app_id}...")
+        if not self.process_lua_files([], [(f"{app_id}.lua", data)], show_popup=False):
+            print(f"[DOWNLOAD] ERROR: {api_name} sent a lua file for {app_id} that was not installed")
+            return None  # Try next API
+        
+        # Only keep a copy on disk when backups are on
+        if self.settings.get('backup_downloads', False):
+            self.save_download_backup(app_id, game_name, '.lua', data=data)
+        
+        self.update_game_card_after_download(app_id, game_name)
+        
+        stats = {
+            'file_size_mb': file_size_mb,
+            'speed_mbps': speed_mbps,
+            'time_taken': download_time,
+            'filename': filename,
+            'api_used': api_name
+        }
+        
+        return True, f"Successfully downloaded via {api_name}: Successfully processed 1 lua files", stats
+    
+    def log_download_speed(self, app_id, api_name, total_bytes, download_time):
+        """Print the download statistics, returns (file_size_mb, speed_mbps)"""
+        file_size_mb = total_bytes / (1024 * 1024)  # Convert to MB
+        speed_mbps = file_size_mb / download_time if download_time > 0 else 0
+        
+        print(f"[DOWNLOAD] SUCCESS: {app_id} via {api_name} - {file_size_mb:.2f} MB in {download_time:.1f}s ({speed_mbps:.2f} MB/s)")
+        return file_size_mb, speed_mbps
+        
+    async def download_manifest_async(self, http, app_id, game_name):
+        """Download manifest for a specific game, trying the enabled APIs in order (or hedged).
+        Returns (success, message[, stats])."""
         try:
             print(f"[DOWNLOAD] Starting download for {game_name} (App ID: {app_id})")
             
@@ -4525,189 +6971,44 @@ class SteamStyleApp:
             enabled_apis = [api for api in api_list if api.get('enabled', True)]
             
             if not enabled_apis:
-                print(f"[DOWNLOAD] No enabled APIs configured for {app_id}")
-                
-                # Ask user if they want to fetch free APIs
-                result = messagebox.askyesno(
-                    "No APIs Found",
-                    "No API's Found, Fetch Free Ones?",
-                    icon='question'
-                )
-                
-                if result:
-                    # User chose to fetch free APIs
-                    print(f"[DOWNLOAD] User chose to fetch free APIs for {app_id}")
-                    try:
-                        # Run the auto-fetch free APIs script (non-UI version)
-                        success = self.load_free_apis_from_download()
-                        
-                        if success:
-                            # Check if APIs were successfully loaded
-                            api_list = self.settings.get('api_list', [])
-                            enabled_apis = [api for api in api_list if api.get('enabled', True)]
-                            
-                            if enabled_apis:
-                                print(f"[DOWNLOAD] Successfully loaded {len(enabled_apis)} free APIs, retrying download")
-                                # Retry the download with the new APIs
-                                return self.download_manifest(app_id, game_name)
-                            else:
-                                print(f"[DOWNLOAD] Failed to load free APIs for {app_id}")
-                                return False, "Failed to load free APIs"
-                        else:
-                            print(f"[DOWNLOAD] Failed to load free APIs for {app_id}")
-                            return False, "Failed to load free APIs"
-                    except Exception as e:
-                        print(f"[DOWNLOAD] Error loading free APIs: {e}")
-                        return False, f"Error loading free APIs: {str(e)}"
-                else:
-                    # User chose not to fetch free APIs
-                    print(f"[DOWNLOAD] User declined to fetch free APIs for {app_id}")
-                    return False, "No enabled APIs configured"
+                # The "fetch free APIs?" prompt blocks, so it runs on the worker pool
+                failure = await self.download_engine.run_blocking(self.prompt_for_free_apis, app_id)
+                if failure:
+                    return failure
+                api_list = self.settings.get('api_list', [])
+                enabled_apis = [api for api in api_list if api.get('enabled', True)]
+            
+            enabled_apis = self.order_download_apis(enabled_apis)
             
-            # Get timeout setting
-            api_timeout = self.settings.get('api_request_timeout', 15)
-
             download_dir = self.create_download_directory()
             if not download_dir:
                 print(f"[DOWNLOAD] ERROR: Failed to create download directory for {app_id}")
                 return False, "Failed to create download directory"
-
-            # Safety check: ensure http_client is initialized and valid
-            if not hasattr(self, 'http_client') or self.http_client is None:
-                print("[WARNING] http_client not initialized or None, initializing now...")
-                try:
-                    self.http_client = httpx.Client(
-                        http2=True,
-                        follow_redirects=True,
-                        headers={"User-Agent": "Mozilla/5.0"}
-                    )
-                    print("[WARNING] http_client initialized successfully")
-                except Exception as e:
-                    print(f"[WARNING] Failed to initialize http_client: {e}")
-                    self.http_client = None
-            
-            # Ensure we have a client; fall back to a transient one if needed
-            client = self.http_client or httpx.Client(http2=True, follow_redirects=True, headers={"User-Agent": "Mozilla/5.0"})
-
-            # Try each API in sequence
-            for api_index, api in enumerate(enabled_apis):
-                api_name = api.get('name', f'API {api_index + 1}')
-                api_url = api.get('url', '').strip() 
-                success_code = api.get('success_code', 200)
-                unavailable_code = api.get('unavailable_code', 404)
-                
-                if not api_url:
-                    print(f"[DOWNLOAD] Skipping {api_name}: No URL configured")
-                    continue
-                
-                download_url = api_url.replace('<appid>', str(app_id))
-                print(f"[DOWNLOAD] Trying {api_name} ({api_index + 1}/{len(enabled_apis)}): {download_url}")
-                
-                # Configure timeout - faster connection timeout, longer read timeout
-                timeout = httpx.Timeout(connect=3.0, read=float(api_timeout), write=5.0, pool=3.0)
-                
-                try:
-                    print(f"[DOWNLOAD] Checking {api_name}...")
-                    with client.stream("GET", download_url, timeout=timeout) as response:
-                        status_code = response.status_code
-                        print(f"[DOWNLOAD] {api_name} status: {status_code}")
-
-                        if status_code == unavailable_code:
-                            print(f"[DOWNLOAD] {api_name}: Not available")
-                            continue  # Try next API immediately
-                        elif status_code != success_code:
-                            print(f"[DOWNLOAD] {api_name}: Error {status_code}")
-                            continue  # Try next API immediately
-
-                        # SUCCESS! Start download immediately
-                        print(f"[DOWNLOAD] {api_name}: SUCCESS! Starting download...")
-                        
-                        # Quick file extension detection (no complex processing)
-                        content_type = response.headers.get('content-type', '').lower()
-                        if 'zip' in content_type:
-                            file_extension = '.zip'
-                        elif 'rar' in content_type:
-                            file_extension = '.rar'
-                        elif '7z' in content_type:
-                            file_extension = '.7z'
-                        else:
-                            file_extension = '.lua'  # Default
-                        
-                        # Generate filename quickly
-                        safe_game_name = game_name.replace(' ', '_').replace('/', '_').replace('\\', '_')
-                        filename = f"{app_id}_{safe_game_name}{file_extension}"
-                        file_path = os.path.join(download_dir, filename)
-                    
-                        # NOW start timing the actual download
-                        download_start_time = time.time()
-                        total_bytes = 0
-
-                        print(f"[DOWNLOAD] Streaming {filename}...")
-                        with open(file_path, "wb") as out_file:
-                            for chunk in response.iter_bytes(chunk_size=8192):  # Larger chunks for speed
-                                if chunk:
-                                    out_file.write(chunk)
-                                    total_bytes += len(chunk)
-
-                        # Calculate download statistics (only actual download time)
-                        download_end_time = time.time()
-                        download_time = download_end_time - download_start_time
-                        file_size_mb = total_bytes / (1024 * 1024)  # Convert to MB
-                        speed_mbps = file_size_mb / download_time if download_time > 0 else 0
-                        
-                        print(f"[DOWNLOAD] SUCCESS: {app_id} via {api_name} - {file_size_mb:.2f} MB in {download_time:.1f}s ({speed_mbps:.2f} MB/s)")
-                        
-                        # Check if downloaded file is supported
-                        if not self.is_downloaded_file_supported(file_path):
-                            print(f"[DOWNLOAD] ERROR: Unsupported file type for {app_id}")
-                            # Clean up the unsupported file
-                            try:
-                                os.remove(file_path)
-                            except:
-                                pass
-                            continue  # Try next API
-                        
-                        # Process the downloaded file
-                        print(f"[DOWNLOAD] Processing downloaded file for {app_id}...")
-                        processing_success, processing_message = self.process_downloaded_file(file_path, app_id, game_name)
-                        
-                        if not processing_success:
-                            print(f"[DOWNLOAD] ERROR: Failed to process file for {app_id}: {processing_message}")
-                            # Clean up the file if processing failed
-                            try:
-                                os.remove(file_path)
-                            except:
-                                pass
-                            continue  # Try next API
-                        
-                        # If backup is disabled, clean up the original file
-                        if not self.settings.get('backup_downloads', False):
-                            try:
-                                os.remove(file_path)
-                                print(f"[DOWNLOAD] Cleaned up original file (backup disabled)")
-                            except Exception as e:
-                                print(f"[DOWNLOAD] Warning: Could not clean up original file: {e}")
-                        
-                        # Return success with statistics
-                        stats = {
-                            'file_size_mb': file_size_mb,
-                            'speed_mbps': speed_mbps,
-                            'time_taken': download_time,
-                            'filename': filename,
-                            'api_used': api_name
-                        }
-                        
-                        return True, f"Successfully downloaded via {api_name}: {processing_message}", stats
-                    
-                except httpx.TimeoutException:
-                    print(f"[DOWNLOAD] {api_name}: TIMEOUT")
-                    continue  # Try next API immediately
-                except httpx.RequestError as e:
-                    print(f"[DOWNLOAD] {api_name}: NETWORK ERROR - {str(e)}")
-                    continue  # Try next API immediately
-                except Exception as e:
-                    print(f"[DOWNLOAD] {api_name}: ERROR - {str(e)}")
-                    continue  # Try next API immediately
+            
+            attempt = {
+                'http': http,
+                'app_id': app_id,
+                'game_name': game_name,
+                'download_dir': download_dir,
+                'api_count': len(enabled_apis),
+                'api_timeout': self.settings.get('api_request_timeout', 15),
+                'install_lock': asyncio.Lock(),  # Only one attempt installs at a time
+                'streaming': 0,  # Attempts that got success_code and are receiving the file
+                'won': False
+            }
+            
+            if self.settings.get('hedged_downloads', False) and len(enabled_apis) > 1:
+                result = await self.download_hedged_async(attempt, enabled_apis)
+            else:
+                # Try each API in sequence
+                result = None
+                for api_index, api in enumerate(enabled_apis):
+                    result = await self.download_from_api_async(attempt, api_index, api)
+                    if result:
+                        break
+            
+            if result:
+                return result
             
             # If we get here, all APIs failed
             print(f"[DOWNLOAD] FAILED: All {len(enabled_apis)} APIs failed for {app_id}")
@@ -4716,6 +7017,214 @@ class SteamStyleApp:
         except Exception as e:
             print(f"[DOWNLOAD] CRITICAL ERROR: {app_id} - {str(e)}")
             return False, f"Download error: {str(e)}"
+        finally:
+            # Both are atomic file writes - keep them off the event loop
+            await self.download_engine.run_blocking(self.save_download_state)
+
+    async def download_hedged_async(self, attempt, enabled_apis):
+        """Start the top API now and the next one every hedge delay (or as soon as one fails); first working file wins"""
+        hedge_delay = max(0.0, float(self.settings.get('hedge_delay_ms', 1000)) / 1000.0)
+        remaining = list(enumerate(enabled_apis))
+        pending = set()
+        
+        def launch_next():
+            api_index, api = remaining.pop(0)
+            if pending:
+                print(f"[DOWNLOAD] Hedging: also trying {api.get('name', f'API {api_index + 1}')} for {attempt['app_id']}")
+            pending.add(asyncio.ensure_future(self.download_from_api_async(attempt, api_index, api)))
+        
+        launch_next()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=hedge_delay if remaining else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                pending.difference_update(done)
+                
+                for task in done:
+                    result = task.result()
+                    if result:
+                        return result
+                
+                # An API came back empty, or the hedge delay ran out with nobody answering yet: bring in the next one
+                if remaining and (done or not attempt['streaming']):
+                    launch_next()
+            return None
+        finally:
+            # Cancel the losers and wait for them to clean up their partial files
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def download_from_api_async(self, attempt, api_index, api):
+        """Try one API for a download, returns the download result or None to try the next API"""
+        app_id = attempt['app_id']
+        game_name = attempt['game_name']
+        api_name = api.get('name', f'API {api_index + 1}')
+        api_url = api.get('url', '').strip() 
+        success_code = api.get('success_code', 200)
+        unavailable_code = api.get('unavailable_code', 404)
+        
+        if not api_url:
+            print(f"[DOWNLOAD] Skipping {api_name}: No URL configured")
+            return None
+        
+        if self.negative_cache.is_unavailable(api_url, app_id):
+            print(f"[DOWNLOAD] Skipping {api_name}: recently not available")
+            return None
+        
+        if not self.api_breakers.allow(api_url):
+            print(f"[DOWNLOAD] Skipping {api_name}: circuit open")
+            return None
+        
+        download_url = api_url.replace('<appid>', str(app_id))
+        print(f"[DOWNLOAD] Trying {api_name} ({api_index + 1}/{attempt['api_count']}): {download_url}")
+        
+        # Configure timeout - faster connection timeout, longer read timeout
+        timeout = httpx.Timeout(connect=3.0, read=float(attempt['api_timeout']), write=5.0, pool=3.0)
+        
+        # Archives stream into a partial file keyed by source, so hedged attempts never collide and retries can resume
+        partial = PartialDownload(attempt['download_dir'], api_url, app_id)
+        partial_open = False
+        streaming = False
+        attempt_start = time.time()
+        
+        try:
+            # Wait for the host's rate limiter before the attempt clock starts
+            self.api_stats.record_queue_delay(api_url, await attempt['http'].async_throttle(download_url))
+            attempt_start = time.time()
+            
+            async with attempt['http'].async_stream("GET", download_url, throttle=False, timeout=timeout, headers=partial.request_headers()) as response:
+                status_code = response.status_code
+                print(f"[DOWNLOAD] {api_name} status: {status_code}")
+
+                if status_code == unavailable_code:
+                    print(f"[DOWNLOAD] {api_name}: Not available")
+                    self.record_api_outcome(api_url, app_id, 'unavailable', time.time() - attempt_start)
+                    return None  # Try next API immediately
+                elif status_code != success_code and not (status_code == 206 and partial.offset):
+                    print(f"[DOWNLOAD] {api_name}: Error {status_code}")
+                    self.record_api_outcome(api_url, app_id, 'error', time.time() - attempt_start)
+                    return None  # Try next API immediately
+
+                print(f"[DOWNLOAD] {api_name}: SUCCESS! Starting download...")
+                streaming = True
+                attempt['streaming'] += 1
+                
+                # NOW start timing the actual download
+                download_start_time = time.time()
+                body = response.aiter_bytes(chunk_size=65536)
+                head = b''
+                
+                if partial.start(response):
+                    print(f"[DOWNLOAD] {api_name}: Resuming at {partial.offset} of {partial.expected_total} bytes")
+                    file_extension = partial.meta['extension']
+                else:
+                    # The payload type comes from its first bytes - mislabelled junk is rejected before anything is written
+                    async for chunk in body:
+                        if chunk:
+                            head = chunk
+                            break
+                    file_extension = sniff_download_extension(head)
+                if file_extension is None:
+                    print(f"[DOWNLOAD] {api_name}: Rejected - not an archive or lua file")
+                    self.record_api_outcome(api_url, app_id, 'error', time.time() - attempt_start)
+                    return None  # Try next API immediately
+                
+                safe_game_name = game_name.replace(' ', '_').replace('/', '_').replace('\\', '_')
+                filename = f"{app_id}_{safe_game_name}{file_extension}"
+                file_path = os.path.join(attempt['download_dir'], filename)
+                total_bytes = len(head)
+                chunks = [head]
+
+                print(f"[DOWNLOAD] Streaming {filename}...")
+                if file_extension == '.lua':
+                    # Plain lua never touches the download directory - it is patched and installed from memory
+                    async for chunk in body:
+                        if chunk:
+                            chunks.append(chunk)
+                            total_bytes += len(chunk)
+                else:
+                    # Disk writes go to the worker pool in batches so the loop keeps serving the other downloads
+                    run_blocking = self.download_engine.run_blocking
+                    partial_open = True
+                    out_file = await run_blocking(partial.open, file_extension)
+                    batch = [head]
+                    batch_bytes = len(head)
+                    try:
+                        async for chunk in body:
+                            if chunk:
+                                batch.append(chunk)
+                                batch_bytes += len(chunk)
+                                total_bytes += len(chunk)
+                                if batch_bytes >= DOWNLOAD_WRITE_BATCH:
+                                    pending, batch, batch_bytes = batch, [], 0
+                                    await run_blocking(out_file.writelines, pending)
+                    finally:
+                        # Whatever arrived is written out even when the stream fails, so it can be resumed
+                        try:
+                            if batch:
+                                await run_blocking(out_file.writelines, batch)
+                        finally:
+                            await run_blocking(out_file.close)
+
+                download_time = time.time() - download_start_time
+            
+            attempt['streaming'] -= 1
+            streaming = False
+            
+            if partial_open and not await self.download_engine.run_blocking(partial.is_complete):
+                print(f"[DOWNLOAD] {api_name}: Incomplete download, expected {partial.expected_total} bytes")
+                self.record_api_outcome(api_url, app_id, 'error', time.time() - attempt_start)
+                return None  # Try next API immediately
+            
+            async with attempt['install_lock']:
+                if attempt['won']:
+                    # Another API already delivered this game - give back a half-open probe this attempt holds
+                    self.api_breakers.release(api_url)
+                    return None
+                
+                # Extracting/patching/installing is blocking work - keep it off the event loop
+                if not partial_open:
+                    result = await self.download_engine.run_blocking(
+                        self.install_streamed_lua, b''.join(chunks), filename, app_id, game_name, api_name, total_bytes, download_time
+                    )
+                else:
+                    await self.download_engine.run_blocking(partial.finish, file_path)
+                    partial_open = False
+                    result = await self.download_engine.run_blocking(
+                        self.install_downloaded_file, file_path, filename, app_id, game_name, api_name, total_bytes, download_time
+                    )
+                if result:
+                    attempt['won'] = True
+                    await self.download_engine.run_blocking(PartialDownload.discard_all, attempt['download_dir'], app_id)
+                self.record_api_outcome(api_url, app_id, 'success' if result else 'error', time.time() - attempt_start)
+                return result
+            
+        except asyncio.CancelledError:
+            print(f"[DOWNLOAD] {api_name}: cancelled (another API won)")
+            self.api_breakers.release(api_url)
+            raise
+        except httpx.TimeoutException:
+            print(f"[DOWNLOAD] {api_name}: TIMEOUT")
+            self.record_api_outcome(api_url, app_id, 'timeout', time.time() - attempt_start)
+            return None  # Try next API immediately
+        except httpx.RequestError as e:
+            print(f"[DOWNLOAD] {api_name}: NETWORK ERROR - {str(e)}")
+            self.record_api_outcome(api_url, app_id, 'network_error', time.time() - attempt_start)
+            return None  # Try next API immediately
+        except Exception as e:
+            print(f"[DOWNLOAD] {api_name}: ERROR - {str(e)}")
+            self.record_api_outcome(api_url, app_id, 'error', time.time() - attempt_start)
+            return None  # Try next API immediately
+        finally:
+            if streaming:
+                attempt['streaming'] -= 1
+            if partial_open:
+                await self.download_engine.run_blocking(partial.release)
 
     def handle_download_result(self, success, message, button):
         """Handle the result of a download operation"""
@@ -4783,6 +7292,23 @@ class SteamStyleApp:
         )
         clear_finished_button.pack(side=tk.LEFT, padx=(0, 10))
         
+        # Bulk add button (AppID lists from a file or the clipboard)
+        bulk_add_button = tk.Button(
+            button_frame,
+            text="📋 Bulk Add",
+            font=('Segoe UI', 9),
+            bg=self.colors['secondary_bg'],
+            fg=self.colors['text'],
+            activebackground=self.colors['button_hover'],
+            activeforeground=self.colors['text'],
+            relief=tk.FLAT,
+            padx=10,
+            pady=5,
+            cursor='hand2',
+            command=self.open_bulk_enqueue_dialog
+        )
+        bulk_add_button.pack(side=tk.LEFT, padx=(0, 10))
+        
         # Restart Steam button
         restart_steam_button = tk.Button(
             button_frame,
@@ -4831,6 +7357,20 @@ class SteamStyleApp:
         )
         self.queue_title_label.pack(anchor='w', padx=15, pady=(15, 10))
         
+        # Circuit breaker state of each enabled API
+        self.api_breaker_label = tk.Label(
+            queue_frame,
+            text="",
+            font=('Segoe UI', 9),
+            fg=self.colors['text_secondary'],
+            bg=self.colors['secondary_bg'],
+            anchor='w',
+            justify=tk.LEFT,
+            wraplength=700
+        )
+        self.api_breaker_label.pack(anchor='w', padx=15, pady=(0, 10))
+        self.update_api_breaker_status()
+        
         # Create scrollable queue list
         queue_canvas = tk.Canvas(queue_frame, bg=self.colors['secondary_bg'], highlightthickness=0)
         queue_scrollbar = ttk.Scrollbar(queue_frame, orient="vertical", command=queue_canvas.yview)
@@ -4890,6 +7430,10 @@ class SteamStyleApp:
                 self.current_batch_failed = []
                 self.process_download_queue()
 
+    def downloads_in_progress(self):
+        """Check for downloads that are running or waiting to run (paused ones don't count)"""
+        return self.download_queue.runnable_count() > 0 or self.current_download is not None
+
     def update_god_mode_back_button(self):
         """Update the God Mode back button state based on queue status"""
         if not hasattr(self, 'god_mode_back_button') or not self.god_mode_back_button:
@@ -4905,7 +7449,7 @@ class SteamStyleApp:
         # Safety check: ensure download_queue and queued_games are initialized
         if not hasattr(self, 'download_queue'):
             print("[WARNING] download_queue not initialized, initializing now...")
-            self.download_queue = []
+            self.download_queue = DownloadQueue()
             self.completed_downloads = []
             self.failed_downloads = []
             self.current_download = None
@@ -4917,7 +7461,7 @@ class SteamStyleApp:
             self.queued_games = set()
         
         # Check if there are any active downloads (queued or in progress)
-        has_active_downloads = len(self.download_queue) > 0 or self.current_download is not None
+        has_active_downloads = self.downloads_in_progress()
         
         if has_active_downloads:
             # Disable button and gray it out
@@ -4955,7 +7499,7 @@ class SteamStyleApp:
         # Safety check: ensure download_queue and queued_games are initialized
         if not hasattr(self, 'download_queue'):
             print("[WARNING] download_queue not initialized, initializing now...")
-            self.download_queue = []
+            self.download_queue = DownloadQueue()
             self.completed_downloads = []
             self.failed_downloads = []
             self.current_download = None
@@ -4967,7 +7511,7 @@ class SteamStyleApp:
             self.queued_games = set()
         
         # Check if there are any active downloads (queued or in progress)
-        has_active_downloads = len(self.download_queue) > 0 or self.current_download is not None
+        has_active_downloads = self.downloads_in_progress()
         
         if has_active_downloads:
             # Disable button and gray it out
@@ -4998,12 +7542,32 @@ class SteamStyleApp:
         if hasattr(self, 'god_mode_game_list') and hasattr(self, 'god_mode_steam_data'):
             self.show_god_mode_games(self.god_mode_game_list, self.god_mode_steam_data)
 
-    def add_to_download_queue(self, app_id, game_name):
-        """Add a download to the queue"""
+    def restore_download_queue(self):
+        """Replay the queue journal from the last session, then compact it"""
+        items = self.queue_journal.replay()
+        for item in items:
+            if item['status'] == 'completed':
+                self.completed_downloads.append(item)
+            elif item['status'] == 'failed':
+                self.failed_downloads.append(item)
+            else:
+                self.download_queue.push(item, item.get('priority', 0))
+                if item['status'] == 'paused':
+                    self.download_queue.pause(item['app_id'])
+                self.queued_games.add(str(item['app_id']))
+        self.queue_journal.rewrite(items)
+        
+        if self.download_queue:
+            print(f"[QUEUE] Restored {len(self.download_queue)} queued downloads from the last session")
+            if not self.settings.get('dont_start_downloads_until_button_pressed', False):
+                self.root.after(1000, self.process_download_queue)
+
+    def add_to_download_queue(self, app_id, game_name, priority=0):
+        """Add a download to the queue (lower priority numbers start first)"""
         # Safety check: ensure download_queue and queued_games are initialized
         if not hasattr(self, 'download_queue'):
             print("[WARNING] download_queue not initialized, initializing now...")
-            self.download_queue = []
+            self.download_queue = DownloadQueue()
             self.completed_downloads = []
             self.failed_downloads = []
             self.current_download = None
@@ -5014,6 +7578,10 @@ class SteamStyleApp:
             print("[WARNING] queued_games not initialized, initializing now...")
             self.queued_games = set()
         
+        if app_id in self.download_queue or str(app_id) in self.active_downloads:
+            print(f"[QUEUE] {game_name} (App ID: {app_id}) is already queued")
+            return
+        
         print(f"[QUEUE] Adding {game_name} (App ID: {app_id}) to download queue")
         download_item = {
             'app_id': app_id,
@@ -5021,7 +7589,8 @@ class SteamStyleApp:
             'status': 'queued',
             'progress': 0
         }
-        self.download_queue.append(download_item)
+        self.download_queue.push(download_item, priority)
+        self.queue_journal.record({'op': 'add', 'app_id': app_id, 'game_name': game_name, 'priority': priority})
         
         # Track this game as queued for persistent state
         self.queued_games.add(str(app_id))
@@ -5052,193 +7621,142 @@ class SteamStyleApp:
         else:
             print(f"[QUEUE] Downloads paused until download button is pressed, {game_name} queued")
 
-    def process_download_queue(self):
-        """Process the download queue"""
-        # Safety check: ensure download_queue and queued_games are initialized
-        if not hasattr(self, 'download_queue'):
-            print("[WARNING] download_queue not initialized, initializing now...")
-            self.download_queue = []
-            self.completed_downloads = []
-            self.failed_downloads = []
-            self.current_download = None
-            self.active_downloads = {}
-            self.download_threads = {}
-            self.queued_games = set()
-        elif not hasattr(self, 'queued_games'):
-            print("[WARNING] queued_games not initialized, initializing now...")
-            self.queued_games = set()
-        
-        if not self.download_queue:
-            return
-            
-        max_threads = int(self.settings.get('max_download_threads', 3))
-        current_active = len(self.active_downloads)
+    def bulk_add_to_download_queue(self, app_ids):
+        """Queue many AppIDs at once, skipping queued and installed games, with one journal write and one UI refresh"""
+        # Installed games (enabled or disabled) from the cached stplug-in index
+        installed = set()
+        steam_path = self.get_steam_install_path()
+        stplugin_path = os.path.join(steam_path, 'config', 'stplug-in') if steam_path else None
+        if stplugin_path and os.path.exists(stplugin_path):
+            installed = {entry['app_id'] for entry in self.stplugin_index.snapshot(stplugin_path).values()}
+        
+        to_queue = []
+        skipped_queued = 0
+        skipped_installed = 0
+        for app_id in app_ids:
+            app_id_str = str(app_id)
+            if app_id_str in self.queued_games or app_id_str in self.download_queue or app_id_str in self.active_downloads:
+                skipped_queued += 1
+            elif app_id_str in installed:
+                skipped_installed += 1
+            else:
+                to_queue.append(app_id_str)
         
-        print(f"[QUEUE] Processing queue: {len(self.download_queue)} queued, {current_active}/{max_threads} active downloads")
+        events = []
+        for app_id_str in to_queue:
+            game_name = self.get_cached_game_name(app_id_str)  # Dict lookup, built once per app list
+            self.download_queue.push({
+                'app_id': app_id_str,
+                'game_name': game_name,
+                'status': 'queued',
+                'progress': 0
+            })
+            self.queued_games.add(app_id_str)
+            events.append({'op': 'add', 'app_id': app_id_str, 'game_name': game_name, 'priority': 0})
+        self.queue_journal.record(*events)
         
-        # Legacy single-threaded fallback if max_threads is 1
-        if max_threads == 1:
-            # Use original single-threaded logic
-            if self.current_download:
-                return
+        print(f"[QUEUE] Bulk queued {len(to_queue)} games ({skipped_queued} already queued, {skipped_installed} already installed)")
         
-        # Multi-threaded processing
-        # Start new downloads up to the thread limit
-        if max_threads > 1:
-            while self.download_queue and current_active < max_threads:
-                # Get next item from queue
-                download_item = self.download_queue.pop(0)
-                app_id = download_item['app_id']
-                
-                # Mark as downloading and add to active downloads
-                download_item['status'] = 'downloading'
-                self.active_downloads[str(app_id)] = download_item
-                
-                print(f"[QUEUE] Starting download: {download_item['game_name']} (App ID: {app_id})")
-                
-                # Start download in separate thread
-                def download_thread(item=download_item):
-                    app_id_str = str(item['app_id'])
-                    print(f"[QUEUE] Download thread started for {item['game_name']}")
-                    
-                    try:
-                        result = self.download_manifest(item['app_id'], item['game_name'])
-                        
-                        # Handle different return values
-                        if len(result) == 3:  # Success case: (success, message, stats)
-                            success, message, stats = result
-                        else:  # Failure case: (success, message)
-                            success, message = result
-                            stats = None
-                        
-                        # Schedule the finish function to run on main thread
-                        self.root.after(0, lambda: self.finish_single_download(app_id_str, success, message, stats))
-                        
-                    except Exception as e:
-                        print(f"[QUEUE] Download thread error for {item['game_name']}: {e}")
-                        # Schedule error handling on main thread
-                        self.root.after(0, lambda: self.finish_single_download(app_id_str, False, f"Thread error: {str(e)}", None))
-                
-                # Create and start thread
-                thread = threading.Thread(target=download_thread, daemon=True)
-                self.download_threads[str(app_id)] = thread
-                thread.start()
-                
-                current_active += 1
-            
-            # Update the display and return early for multi-threaded mode
+        if to_queue:
             self.update_download_queue_display()
             self.update_queue_title_text()
-            return
-        
-        # Continue with original single-threaded logic if max_threads is 1
-        
-        # Get next item from queue
-        self.current_download = self.download_queue.pop(0)
-        self.current_download['status'] = 'downloading'
-        print(f"[QUEUE] Processing: {self.current_download['game_name']} (App ID: {self.current_download['app_id']})")
-        print(f"[QUEUE] Remaining in queue: {len(self.download_queue)} items")
-        
-        # Update the display immediately
-        self.update_download_queue_display()
-        self.update_queue_title_text()
-        
-        # Start download in separate thread
-        def download_thread():
-            print(f"[QUEUE] Starting download thread for {self.current_download['game_name']}")
-            result = self.download_manifest(self.current_download['app_id'], self.current_download['game_name'])
-            
-            # Handle different return values
-            if len(result) == 3:  # Success case: (success, message, stats)
-                success, message, stats = result
-            else:  # Failure case: (success, message)
-                success, message = result
-                stats = None
-            
-            # Update UI on main thread
-            self.root.after(0, lambda: self.finish_download(success, message, stats))
+            self.update_god_mode_buttons()
+            
+            if not self.settings.get('dont_start_downloads_until_button_pressed', False):
+                if not self.active_downloads:
+                    print(f"[QUEUE] Starting queue processing")
+                    # Initialize batch tracking for this queue
+                    self.current_batch_completed = []
+                    self.current_batch_failed = []
+                self.process_download_queue()
         
-        thread = threading.Thread(target=download_thread, daemon=True)
-        thread.start()
+        return len(to_queue), skipped_queued, skipped_installed
 
-    def finish_download(self, success, message, stats=None):
-        """Finish a download and process next in queue"""
-        # Safety check: ensure queued_games is initialized
-        if not hasattr(self, 'queued_games'):
+    def open_bulk_enqueue_dialog(self):
+        """Queue a list of AppIDs or store links from a file, the clipboard or typed in"""
+        def on_apply(app_ids):
+            queued, skipped_queued, skipped_installed = self.bulk_add_to_download_queue(app_ids)
+            message = f"Queued {queued} game(s) for download."
+            if skipped_queued or skipped_installed:
+                message += f"\n\nSkipped {skipped_queued} already queued and {skipped_installed} already installed."
+            messagebox.showinfo("Bulk Add", message)
+        
+        self.open_app_id_list_dialog(self.root, "Bulk Add Downloads", "Add to Queue", on_apply)
+
+    def process_download_queue(self):
+        """Process the download queue"""
+        # Safety check: ensure download_queue and queued_games are initialized
+        if not hasattr(self, 'download_queue'):
+            print("[WARNING] download_queue not initialized, initializing now...")
+            self.download_queue = DownloadQueue()
+            self.completed_downloads = []
+            self.failed_downloads = []
+            self.current_download = None
+            self.active_downloads = {}
+            self.download_threads = {}
+            self.queued_games = set()
+        elif not hasattr(self, 'queued_games'):
             print("[WARNING] queued_games not initialized, initializing now...")
             self.queued_games = set()
         
-        print(f"[QUEUE] Finishing download: {self.current_download['game_name']} - Success: {success}")
-        
-        # Update current download status
-        if success:
-            self.current_download['status'] = 'completed'
-            # Store download statistics
-            if stats:
-                self.current_download['file_size_mb'] = stats['file_size_mb']
-                self.current_download['speed_mbps'] = stats['speed_mbps']
-                self.current_download['time_taken'] = stats['time_taken']
-                self.current_download['filename'] = stats['filename']
-                self.current_download['api_used'] = stats.get('api_used', 'Unknown API')  # Store API name
-                print(f"[QUEUE] Download completed: {stats['filename']} ({stats['file_size_mb']:.2f} MB) via {self.current_download['api_used']}")
+        if not self.download_queue.runnable_count():
+            return
             
-            # Remove from queued games set (now installed)
-            app_id_str = str(self.current_download['app_id'])
-            if app_id_str in self.queued_games:
-                self.queued_games.remove(app_id_str)
-                print(f"[QUEUE] Removed {app_id_str} from queued games (now installed)")
+        max_threads = int(self.settings.get('max_download_threads', 3))
+        current_active = len(self.active_downloads)
+        
+        print(f"[QUEUE] Processing queue: {len(self.download_queue)} queued, {current_active}/{max_threads} active downloads")
+        
+        # One concurrency limit for the engine, the same one the queue schedules against
+        self.download_engine.set_max_concurrent(max_threads)
+        
+        # Start new downloads up to the limit
+        started_events = []
+        while current_active < max_threads:
+            # Get next item from queue (paused items are skipped)
+            download_item = self.download_queue.pop()
+            if download_item is None:
+                break
+            app_id = download_item['app_id']
+            app_id_str = str(app_id)
             
-            # Move to completed downloads list
-            self.completed_downloads.append(self.current_download)
-            # Add to current batch
-            if hasattr(self, 'current_batch_completed'):
-                self.current_batch_completed.append(self.current_download)
-            print(f"[QUEUE] Added to completed downloads list")
+            # Mark as downloading and add to active downloads
+            download_item['status'] = 'downloading'
+            self.active_downloads[app_id_str] = download_item
+            started_events.append({'op': 'start', 'app_id': app_id})
             
-            # Immediately update the game card to show installed status
-            self.update_game_card_after_download(
-                self.current_download['app_id'], 
-                self.current_download['game_name']
-            )
-        else:
-            self.current_download['status'] = 'failed'
-            self.current_download['error_message'] = message  # Store error message
-            print(f"[QUEUE] Download failed: {message}")
+            print(f"[QUEUE] Starting download: {download_item['game_name']} (App ID: {app_id})")
             
-            # Remove from queued games set (failed download)
-            app_id_str = str(self.current_download['app_id'])
-            if app_id_str in self.queued_games:
-                self.queued_games.remove(app_id_str)
-                print(f"[QUEUE] Removed {app_id_str} from queued games (download failed)")
+            # Run the download as a coroutine on the shared engine loop
+            future = self.download_engine.submit(self.download_manifest_async, app_id, download_item['game_name'])
+            future.add_done_callback(lambda f, app_id_str=app_id_str: self.on_engine_download_done(app_id_str, f))
+            self.download_threads[app_id_str] = future
             
-            # Move to failed downloads list
-            self.failed_downloads.append(self.current_download)
-            # Add to current batch
-            if hasattr(self, 'current_batch_failed'):
-                self.current_batch_failed.append(self.current_download)
-            print(f"[QUEUE] Added to failed downloads list")
+            current_active += 1
         
-        # Clear current download reference
-        self.current_download = None
+        self.queue_journal.record(*started_events)
         
-        # Update the display immediately
+        # Update the display
         self.update_download_queue_display()
-        
-        # Update button states
-        self.update_god_mode_buttons()
-        
-        # Update queue title text immediately
         self.update_queue_title_text()
-        
-        # Process next item in queue
-        if self.download_queue:
-            print(f"[QUEUE] Processing next item in queue ({len(self.download_queue)} remaining)")
-            self.process_download_queue()
-        else:
-            print(f"[QUEUE] Queue empty, no more downloads to process")
+
+    def on_engine_download_done(self, app_id_str, future):
+        """Engine callback (loop thread): hand the result to finish_single_download on the main thread"""
+        try:
+            result = future.result()
             
-            # Show completion popup based on queue results
-            self.show_completion_popup()
+            # Handle different return values
+            if len(result) == 3:  # Success case: (success, message, stats)
+                success, message, stats = result
+            else:  # Failure case: (success, message)
+                success, message = result
+                stats = None
+        except Exception as e:
+            print(f"[QUEUE] Download task error for {app_id_str}: {e}")
+            success, message, stats = False, f"Download task error: {str(e)}", None
+        
+        # Schedule the finish function to run on main thread
+        self.root.after(0, lambda: self.finish_single_download(app_id_str, success, message, stats))
 
     def finish_single_download(self, app_id_str, success, message, stats=None):
         """Finish a single download in multi-threaded mode"""
@@ -5306,6 +7824,8 @@ class SteamStyleApp:
                 self.current_batch_failed.append(download_item)
             print(f"[QUEUE] Added to failed downloads list")
         
+        self.queue_journal.record(self.queue_journal.done_event(download_item, success))
+        
         # Remove from active downloads and threads
         del self.active_downloads[app_id_str]
         if app_id_str in self.download_threads:
@@ -5324,7 +7844,7 @@ class SteamStyleApp:
         self.process_download_queue()
         
         # Check if all downloads are complete
-        if not self.download_queue and not self.active_downloads:
+        if not self.download_queue.runnable_count() and not self.active_downloads:
             print(f"[QUEUE] All downloads complete")
             
             # Show completion popup based on queue results
@@ -5410,7 +7930,7 @@ class SteamStyleApp:
         # Safety check: ensure download_queue and queued_games are initialized
         if not hasattr(self, 'download_queue'):
             print("[WARNING] download_queue not initialized, initializing now...")
-            self.download_queue = []
+            self.download_queue = DownloadQueue()
             self.completed_downloads = []
             self.failed_downloads = []
             self.current_download = None
@@ -5434,50 +7954,114 @@ class SteamStyleApp:
             self.queue_scrollable_frame = None
             return
         
-        # Clear existing items with error handling
+        parent = self.queue_scrollable_frame
+        if getattr(self, 'queue_rows_parent', None) is not parent:
+            # Rows belong to the frame they were made in (the download manager was reopened)
+            self.queue_rows = {}  # {id(item): (item, signature, row frame)}
+            self.queue_more_label = None
+            self.queue_rows_parent = parent
+        
+        # Long lists are cut short (next queued, latest finished) - the queue can hold thousands of items
+        limit = QUEUE_DISPLAY_LIMIT
+        items = []
+        if self.current_download:
+            # Legacy single-threaded mode
+            items.append(self.current_download)
+        items.extend(self.active_downloads.values())
+        queued = self.download_queue.head(limit)
+        items.extend(queued)
+        items.extend(self.completed_downloads[-limit:])
+        items.extend(self.failed_downloads[-limit:])
+        hidden_count = (
+            len(self.download_queue) - len(queued)
+            + max(0, len(self.completed_downloads) - limit)
+            + max(0, len(self.failed_downloads) - limit)
+        )
+        
+        # Reuse rows whose item looks the same, only build rows that are new or changed
         try:
-            for widget in self.queue_scrollable_frame.winfo_children():
-                widget.destroy()
-        except (tk.TclError, AttributeError):
-            # Frame became invalid during iteration, clear reference and return
-            self.queue_scrollable_frame = None
-            return
-        
-        # Add items to display with error handling
-        try:
-            # Add current download to display if exists (legacy single-threaded mode)
-            if self.current_download:
-                self.create_queue_item(self.current_download, self.queue_scrollable_frame)
-            
-            # Add active downloads (multi-threaded mode)
-            for item in self.active_downloads.values():
-                self.create_queue_item(item, self.queue_scrollable_frame)
-            
-            # Add queued items
-            for item in self.download_queue:
-                self.create_queue_item(item, self.queue_scrollable_frame)
-            
-            # Add completed downloads
-            for item in self.completed_downloads:
-                self.create_queue_item(item, self.queue_scrollable_frame)
-            
-            # Add failed downloads
-            for item in self.failed_downloads:
-                self.create_queue_item(item, self.queue_scrollable_frame)
+            old_rows = self.queue_rows
+            rows = {}
+            for item in items:
+                key = id(item)
+                if key in rows:
+                    continue
+                signature = self.queue_item_signature(item)
+                row = old_rows.pop(key, None)
+                if row is not None and (row[0] is not item or row[1] != signature or not row[2].winfo_exists()):
+                    row[2].destroy()
+                    row = None
+                if row is None:
+                    item_frame = self.create_queue_item(item, parent)
+                    if item_frame is None:
+                        continue
+                    row = (item, signature, item_frame)
+                rows[key] = row
+            
+            for _, _, item_frame in old_rows.values():
+                item_frame.destroy()
+            self.queue_rows = rows
+            
+            # Re-pack in display order, which is cheap next to creating the widgets
+            for _, _, item_frame in rows.values():
+                item_frame.pack_forget()
+            for _, _, item_frame in rows.values():
+                item_frame.pack(fill=tk.X, padx=10, pady=5)
+            
+            if self.queue_more_label is None:
+                self.queue_more_label = tk.Label(
+                    parent,
+                    font=('Segoe UI', 9),
+                    fg=self.colors['text_secondary'],
+                    bg=self.colors['bg']
+                )
+            self.queue_more_label.pack_forget()
+            if hidden_count:
+                self.queue_more_label.config(text=f"… and {hidden_count} more not shown")
+                self.queue_more_label.pack(fill=tk.X, padx=10, pady=5)
         except (tk.TclError, AttributeError):
             # Frame became invalid during item creation, clear reference
             self.queue_scrollable_frame = None
+            self.queue_rows = {}
             return
         
         # Update the queue title text
         self.update_queue_title_text()
     
+    def update_api_breaker_status(self):
+        """Show each enabled API's circuit breaker state in the download manager (refreshes while open)"""
+        label = getattr(self, 'api_breaker_label', None)
+        try:
+            if not label or not label.winfo_exists():
+                return
+        except (tk.TclError, AttributeError):
+            return
+        
+        parts = []
+        for index, api in enumerate(self.settings.get('api_list', [])):
+            if not api.get('enabled', True):
+                continue
+            api_name = api.get('name', f'API {index + 1}')
+            state, remaining = self.api_breakers.status(api.get('url', '').strip())
+            if state == 'open':
+                parts.append(f"⛔ {api_name} (skipped, retry in {remaining:.0f}s)")
+            elif state == 'half_open':
+                parts.append(f"⚠ {api_name} (probing)")
+            else:
+                parts.append(f"✅ {api_name}")
+        label.config(text=("APIs: " + "   ".join(parts)) if parts else "APIs: none enabled")
+        
+        # Keep the cool-down countdown ticking (one timer, however often this is called)
+        if getattr(self, 'api_breaker_after_id', None):
+            self.root.after_cancel(self.api_breaker_after_id)
+        self.api_breaker_after_id = self.root.after(1000, self.update_api_breaker_status)
+
     def update_queue_title_text(self):
         """Update the queue title text to show current status"""
         # Safety check: ensure download_queue and queued_games are initialized
         if not hasattr(self, 'download_queue'):
             print("[WARNING] download_queue not initialized, initializing now...")
-            self.download_queue = []
+            self.download_queue = DownloadQueue()
             self.completed_downloads = []
             self.failed_downloads = []
             self.current_download = None
@@ -5523,8 +8107,16 @@ class SteamStyleApp:
             self.queue_title_label = None
             return
         
+    @staticmethod
+    def queue_item_signature(item):
+        """What a queue row shows for an item - the row is rebuilt only when this changes"""
+        return (
+            item['status'], item['game_name'], item.get('api_used'), item.get('file_size_mb'),
+            item.get('speed_mbps'), item.get('time_taken'), item.get('error_message')
+        )
+
     def create_queue_item(self, item, parent_frame):
-        """Create a queue item display"""
+        """Create a queue item display, returns its frame or None"""
         try:
             item_frame = tk.Frame(parent_frame, bg=self.colors['bg'])
             item_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -5532,6 +8124,7 @@ class SteamStyleApp:
             # Status icon
             status_icons = {
                 'queued': '⏳',
+                'paused': '⏸',
                 'downloading': '⬇',
                 'completed': '✅',
                 'failed': '❌'
@@ -5628,6 +8221,7 @@ class SteamStyleApp:
             
             status_text = {
                 'queued': 'Queued',
+                'paused': 'Paused',
                 'downloading': 'Downloading...',
                 'completed': 'Completed',
                 'failed': 'Failed'
@@ -5656,10 +8250,38 @@ class SteamStyleApp:
                     command=lambda: self.retry_download(item)
                 )
                 retry_button.pack(side=tk.BOTTOM, pady=(2, 0))
+            
+            # Per-item controls for anything that hasn't finished
+            if item['status'] in ('queued', 'paused', 'downloading'):
+                controls_frame = tk.Frame(status_frame, bg=self.colors['bg'])
+                controls_frame.pack(side=tk.BOTTOM, pady=(2, 0))
+                
+                controls = []
+                if item['status'] == 'queued':
+                    controls.append(("⏫", self.colors['button_secondary'], lambda: self.move_download_to_front(item)))
+                if item['status'] == 'paused':
+                    controls.append(("Resume", self.colors['success'], lambda: self.resume_download(item)))
+                else:
+                    controls.append(("Pause", self.colors['button_secondary'], lambda: self.pause_download(item)))
+                controls.append(("Cancel", '#ff6b6b', lambda: self.cancel_download(item)))
+                
+                for text, color, command in controls:
+                    tk.Button(
+                        controls_frame,
+                        text=text,
+                        font=('Segoe UI', 8),
+                        bg=color,
+                        fg='white',
+                        relief=tk.FLAT,
+                        cursor='hand2',
+                        command=command
+                    ).pack(side=tk.LEFT, padx=(2, 0))
+            
+            return item_frame
                 
         except (tk.TclError, AttributeError):
             # Parent frame is invalid or widget creation failed, skip creating this item
-            return
+            return None
 
     def retry_download(self, item):
         """Retry a failed download"""
@@ -5676,7 +8298,9 @@ class SteamStyleApp:
             del item['error_message']
         
         # Add back to queue
-        self.download_queue.append(item)
+        self.download_queue.push(item, item.get('priority', 0))
+        self.queued_games.add(str(item['app_id']))
+        self.queue_journal.record({'op': 'add', 'app_id': item['app_id'], 'game_name': item['game_name'], 'priority': item.get('priority', 0)})
         print(f"[RETRY] Added back to queue (Queue size: {len(self.download_queue)})")
         self.update_download_queue_display()
         self.update_queue_title_text()
@@ -5691,6 +8315,72 @@ class SteamStyleApp:
         else:
             print(f"[RETRY] Download in progress, retry queued")
 
+
+    def move_download_to_front(self, item):
+        """Start a queued download next"""
+        if self.download_queue.move_to_front(item['app_id']):
+            self.queue_journal.record({'op': 'front', 'app_id': item['app_id']})
+            print(f"[QUEUE] Moved {item['game_name']} (App ID: {item['app_id']}) to the front")
+            self.update_download_queue_display()
+
+    def pause_download(self, item):
+        """Hold a download back - an active one is stopped and requeued paused (archives resume where they left off)"""
+        app_id_str = str(item['app_id'])
+        if app_id_str in self.active_downloads:
+            self.stop_active_download(app_id_str)
+            self.download_queue.push(item, item.get('priority', 0), front=True)
+        if not self.download_queue.pause(app_id_str):
+            return
+        item['status'] = 'paused'
+        self.queue_journal.record({'op': 'front', 'app_id': item['app_id']}, {'op': 'pause', 'app_id': item['app_id']})
+        print(f"[QUEUE] Paused {item['game_name']} (App ID: {item['app_id']})")
+        
+        self.update_download_queue_display()
+        self.update_god_mode_buttons()
+        self.update_queue_title_text()
+        self.process_download_queue()
+
+    def resume_download(self, item):
+        """Let a paused download start again, ahead of the rest of the queue"""
+        if not self.download_queue.resume(item['app_id'], front=True):
+            return
+        item['status'] = 'queued'
+        self.queue_journal.record({'op': 'resume', 'app_id': item['app_id']}, {'op': 'front', 'app_id': item['app_id']})
+        print(f"[QUEUE] Resumed {item['game_name']} (App ID: {item['app_id']})")
+        
+        self.update_download_queue_display()
+        self.update_god_mode_buttons()
+        if not self.settings.get('dont_start_downloads_until_button_pressed', False):
+            self.process_download_queue()
+
+    def cancel_download(self, item):
+        """Drop a queued or active download"""
+        app_id_str = str(item['app_id'])
+        if app_id_str in self.active_downloads:
+            self.stop_active_download(app_id_str)
+        elif self.download_queue.remove(app_id_str) is None:
+            return
+        self.queue_journal.record({'op': 'remove', 'app_id': item['app_id']})
+        print(f"[QUEUE] Cancelled {item['game_name']} (App ID: {item['app_id']})")
+        
+        self.queued_games.discard(app_id_str)
+        self.update_game_card_button_after_failed_download(item['app_id'], item['game_name'])
+        
+        self.update_download_queue_display()
+        self.update_god_mode_buttons()
+        self.update_queue_title_text()
+        self.process_download_queue()
+        
+        if not self.download_queue.runnable_count() and not self.active_downloads:
+            print(f"[QUEUE] All downloads complete")
+            self.show_completion_popup()
+
+    def stop_active_download(self, app_id_str):
+        """Cancel an active download's engine task; its done callback finds nothing to finish"""
+        del self.active_downloads[app_id_str]
+        future = self.download_threads.pop(app_id_str, None)
+        if future is not None:
+            future.cancel()
     def is_downloaded_file_supported(self, file_path):
         """Check if a downloaded file is supported (lua, zip, rar, 7z)"""
         if not os.path.exists(file_path):
@@ -5700,6 +8390,22 @@ class SteamStyleApp:
         return (file_lower.endswith('.lua') or 
                 file_lower.endswith(('.zip', '.rar', '.7z')))
 
+    def save_download_backup(self, app_id, game_name, extension, file_path=None, data=None):
+        """Keep a copy of a download in melly-downloads, from a file or from memory"""
+        backup_dir = os.path.join(os.path.dirname(self.settings_file), 'melly-downloads')
+        os.makedirs(backup_dir, exist_ok=True)
+        
+        safe_game_name = game_name.replace(' ', '_').replace('/', '_').replace('\\', '_')
+        backup_filename = f"{app_id}_{safe_game_name}{extension}"
+        backup_path = os.path.join(backup_dir, backup_filename)
+        
+        if file_path is not None:
+            shutil.copy2(file_path, backup_path)
+        else:
+            with AtomicFileWriter(sync=False) as writer:
+                writer.write(backup_path, data)
+        print(f"[DOWNLOAD] Saved backup: {backup_path}")
+
     def process_downloaded_file(self, file_path, app_id, game_name):
         """Process a downloaded file - extract lua files and optionally save backup"""
         try:
@@ -5710,56 +8416,33 @@ class SteamStyleApp:
                 print(f"[DOWNLOAD] ERROR: Unsupported file type for {app_id}")
                 return False, f"Unsupported download: {os.path.basename(file_path)}"
             
-            # Create temporary directory for processing
-            temp_dir = tempfile.mkdtemp()
-            lua_files = []
+            # Process the file based on its type
+            if file_path.lower().endswith('.lua'):
+                # Direct lua file - installed as <appid>.lua whatever the download was called
+                with open(file_path, 'rb') as f:
+                    lua_blobs = [(f"{app_id}.lua", f.read())]
+            else:
+                # Archive file - lua files are read straight into memory
+                lua_blobs = self.extract_lua_from_archive(file_path)
+                if lua_blobs is None:
+                    return False, f"Failed to extract lua files from {os.path.basename(file_path)}"
+            
+            if not lua_blobs:
+                return False, f"No lua files found in {os.path.basename(file_path)}"
             
-            try:
-                # Process the file based on its type
-                if file_path.lower().endswith('.lua'):
-                    # Direct lua file
-                    lua_files.append(file_path)
-                else:
-                    # Archive file - extract lua files
-                    result = self.extract_lua_from_archive(file_path)
-                    if isinstance(result, tuple) and len(result) == 2:
-                        archive_lua_files, archive_temp_dir = result
-                        lua_files.extend(archive_lua_files)
-                        if archive_temp_dir:
-                            temp_dir = archive_temp_dir  # Use the archive's temp dir
-                    else:
-                        return False, f"Failed to extract lua files from {os.path.basename(file_path)}"
-                
-                if not lua_files:
-                    return False, f"No lua files found in {os.path.basename(file_path)}"
-                
-                # Process the lua files (same as drag & drop) - but don't show popup for downloads
-                self.process_lua_files(lua_files, [temp_dir] if temp_dir else None, show_popup=False)
-                
-                # Save backup if setting is enabled
-                if self.settings.get('backup_downloads', False):
-                    backup_dir = os.path.join(os.path.dirname(self.settings_file), 'melly-downloads')
-                    os.makedirs(backup_dir, exist_ok=True)
-                    
-                    safe_game_name = game_name.replace(' ', '_').replace('/', '_').replace('\\', '_')
-                    backup_filename = f"{app_id}_{safe_game_name}{os.path.splitext(file_path)[1]}"
-                    backup_path = os.path.join(backup_dir, backup_filename)
-                    
-                    shutil.copy2(file_path, backup_path)
-                    print(f"[DOWNLOAD] Saved backup: {backup_path}")
-                
-                # Immediately update the game card to show installed status
-                self.update_game_card_after_download(app_id, game_name)
-                
-                return True, f"Successfully processed {len(lua_files)} lua files"
-                
-            finally:
-                # Clean up temporary directory
-                if temp_dir and os.path.exists(temp_dir):
-                    try:
-                        shutil.rmtree(temp_dir)
-                    except Exception as e:
-                        print(f"[DOWNLOAD] Warning: Could not clean up temp dir {temp_dir}: {e}")
+            # Process the lua files (same as drag & drop) - but don't show popup for downloads
+            installed = self.process_lua_files([], lua_blobs, show_popup=False)
+            if not installed:
+                return False, f"No lua files were installed from {os.path.basename(file_path)}"
+            
+            # Save backup if setting is enabled
+            if self.settings.get('backup_downloads', False):
+                self.save_download_backup(app_id, game_name, os.path.splitext(file_path)[1], file_path=file_path)
+            
+            # Immediately update the game card to show installed status
+            self.update_game_card_after_download(app_id, game_name)
+            
+            return True, f"Successfully processed {installed} lua files"
                         
         except Exception as e:
             print(f"[DOWNLOAD] ERROR: Failed to process downloaded file: {e}")
@@ -5961,52 +8644,57 @@ class SteamStyleApp:
 
     def update_game_card_in_ui(self, app_id, game_data):
         """Find and update a specific game card in the UI"""
+        self.update_game_cards_in_ui({app_id: game_data})
+
+    def find_god_mode_games_canvas(self):
+        """Find the God Mode games canvas and the scrollable frame holding the cards"""
+        if hasattr(self, 'god_mode_frame') and self.god_mode_frame.winfo_exists():
+            for widget in self.god_mode_frame.winfo_children():
+                if widget.winfo_name() == '!frame2':  # Games frame
+                    for child in widget.winfo_children():
+                        if isinstance(child, tk.Canvas):
+                            for item in child.find_all():
+                                if child.type(item) == 'window':
+                                    # itemcget returns the Tk path name; convert to widget
+                                    try:
+                                        return child, self.root.nametowidget(child.itemcget(item, 'window'))
+                                    except Exception:
+                                        return child, None
+                    break
+        return None, None
+
+    def update_game_cards_in_ui(self, games):
+        """Update many game cards in the UI at once ({app_id: game_data}), adding cards that aren't shown"""
         try:
-            # Find the scrollable frame that contains the game cards
-            if hasattr(self, 'god_mode_frame') and self.god_mode_frame.winfo_exists():
-                for widget in self.god_mode_frame.winfo_children():
-                    if widget.winfo_name() == '!frame2':  # Games frame
-                        games_frame = widget
-                        
-                        # Find the canvas and scrollable frame
-                        for child in games_frame.winfo_children():
-                            if isinstance(child, tk.Canvas):
-                                canvas = child
-                                # Get the scrollable frame from the canvas
-                                scrollable_frame = None
-                                for item in canvas.find_all():
-                                    if canvas.type(item) == 'window':
-                                        # itemcget returns the Tk path name; convert to widget
-                                        window_path = canvas.itemcget(item, 'window')
-                                        try:
-                                            scrollable_frame = self.root.nametowidget(window_path)
-                                        except Exception:
-                                            scrollable_frame = None
-                                        break
-                                
-                                if scrollable_frame:
-                                    # Find the specific game card
-                                    for card in scrollable_frame.winfo_children():
-                                        if isinstance(card, tk.Frame):
-                                            # Check if this card contains the app_id we're looking for
-                                            if self.card_contains_app_id(card, app_id):
-                                                print(f"[UPDATE] Found game card for {app_id}, updating...")
-                                                # Update the card in place
-                                                self.update_game_card_in_place(game_data, card)
-                                                return
-                                    
-                                    # If we didn't find the card, it might be a new game
-                                    # We need to add it to the display
-                                    print(f"[UPDATE] Game card not found for {app_id}, adding new card...")
-                                    self.create_game_card(game_data, scrollable_frame)
-                                    
-                                    # Update canvas scroll region
-                                    canvas.configure(scrollregion=canvas.bbox("all"))
-                                    break
-                        break
+            canvas, scrollable_frame = self.find_god_mode_games_canvas()
+            if not scrollable_frame:
+                return
+            
+            # Look the cards up once for the whole batch
+            cards = {}
+            for card in scrollable_frame.winfo_children():
+                if isinstance(card, tk.Frame) and hasattr(card, 'app_id'):
+                    cards.setdefault(str(card.app_id), card)
+            
+            added = False
+            for app_id, game_data in games.items():
+                card = cards.get(str(app_id))
+                if card:
+                    print(f"[UPDATE] Found game card for {app_id}, updating...")
+                    # Update the card in place
+                    self.update_game_card_in_place(game_data, card)
+                else:
+                    # If we didn't find the card, it might be a new game
+                    print(f"[UPDATE] Game card not found for {app_id}, adding new card...")
+                    self.create_game_card(game_data, scrollable_frame)
+                    added = True
+            
+            if added:
+                # Update canvas scroll region
+                canvas.configure(scrollregion=canvas.bbox("all"))
                         
         except Exception as e:
-            print(f"[UPDATE] Error updating game card in UI: {e}")
+            print(f"[UPDATE] Error updating game cards in UI: {e}")
 
     def card_contains_app_id(self, card, app_id):
         """Check if a game card contains the specified app_id"""
@@ -6137,6 +8825,54 @@ class SteamStyleApp:
             print(f"[DELETE] ERROR: Failed to delete {app_id}: {e}")
             return False, f"Error deleting game: {str(e)}"
 
+    def batch_game_action(self, app_ids, action):
+        """Enable, disable or delete many games in one pass, then update the indexes and cards once"""
+        steam_path = self.get_steam_install_path()
+        if not steam_path:
+            return {app_id: (False, "Could not find Steam installation path") for app_id in app_ids}
+        
+        stplugin_path = os.path.join(steam_path, 'config', 'stplug-in')
+        if not os.path.exists(stplugin_path):
+            return {app_id: (False, "Could not find stplug-in directory") for app_id in app_ids}
+        
+        start_time = time.time()
+        app_ids = [str(app_id) for app_id in app_ids]
+        with self.own_stplugin_writes(stplugin_path):
+            results, changed_files = batch_lua_file_action(
+                stplugin_path, self.stplugin_index.snapshot(stplugin_path), app_ids, action
+            )
+            
+            # One bulk mutation of the directory, depot and updates-disabled indexes
+            changed_app_ids = self.stplugin_index.apply_changes(stplugin_path, changed_files)
+            self.depot_index.update_files(stplugin_path, changed_files)
+            self.sync_updates_disabled_files(stplugin_path, changed_files)
+        
+        changes = {}
+        for app_id in changed_app_ids:
+            entry = self.stplugin_index.peek(app_id)
+            changes[app_id] = (entry is not None, entry['is_disabled'] if entry else False, entry['filename'] if entry else None)
+        self.update_search_cache_for_games(changes)
+        
+        # Update the game list entries (or the search results they came from) and repaint those cards once
+        games_by_id = {}
+        if hasattr(self, 'god_mode_game_list'):
+            games_by_id = {game['app_id']: game for game in self.god_mode_game_list}
+        search_cache_by_id = getattr(self, '_steam_search_cache_by_id', {})
+        
+        updated_games = {}
+        for app_id, (is_installed, is_disabled, lua_file) in changes.items():
+            game = games_by_id.get(app_id) or dict(search_cache_by_id.get(app_id) or {'app_id': app_id, 'game_name': self.get_cached_game_name(app_id)})
+            game['is_installed'] = is_installed
+            game['is_disabled'] = is_disabled
+            game['lua_file'] = lua_file
+            updated_games[app_id] = game
+        if updated_games:
+            self.update_game_cards_in_ui(updated_games)
+        
+        failed = sum(1 for success, _ in results.values() if not success)
+        print(f"[{action.upper()}] Batch {action} of {len(app_ids)} games: {len(changed_app_ids)} changed, {failed} failed in {time.time() - start_time:.2f}s")
+        return results
+
     def is_game_disabled(self, app_id):
         """Check if a game is disabled by looking for .disabled file"""
         try:
@@ -6148,8 +8884,7 @@ class SteamStyleApp:
             if not os.path.exists(stplugin_path):
                 return False
             
-            disabled_file = os.path.join(stplugin_path, f"{app_id}.lua.disabled")
-            return os.path.exists(disabled_file)
+            return f"{app_id}.lua.disabled" in self.stplugin_index.snapshot(stplugin_path)
             
         except Exception as e:
             print(f"[DISABLE] ERROR: Could not check disabled status for {app_id}: {e}")
@@ -6157,17 +8892,31 @@ class SteamStyleApp:
 
     def update_search_cache_for_game(self, app_id, is_installed, is_disabled, lua_file):
         """Update the search cache for a specific game after disable/enable/delete operations"""
-        app_id_str = str(app_id)
-        
+        self.update_search_cache_for_games({str(app_id): (is_installed, is_disabled, lua_file)})
+
+    def update_search_cache_for_games(self, changes):
+        """Update the search cache for many games at once ({app_id: (is_installed, is_disabled, lua_file)})"""
         # Update the cache if it exists (only when god mode is active)
-        if hasattr(self, 'steam_search_cache') and hasattr(self, 'installed_games_dict'):
-            # Update steam_search_cache
+        if not changes or not (hasattr(self, 'steam_search_cache') and hasattr(self, 'installed_games_dict')):
+            return
+        
+        # Index steam_search_cache once per cache (first entry wins, like the old linear scan)
+        if getattr(self, '_steam_search_cache_source', None) is not self.steam_search_cache:
+            by_app_id = {}
             for game_data in self.steam_search_cache:
-                if game_data['app_id'] == app_id_str:
-                    game_data['is_installed'] = is_installed
-                    game_data['is_disabled'] = is_disabled
-                    game_data['lua_file'] = lua_file
-                    break
+                by_app_id.setdefault(game_data['app_id'], game_data)
+            self._steam_search_cache_by_id = by_app_id
+            self._steam_search_cache_source = self.steam_search_cache
+        
+        for app_id, (is_installed, is_disabled, lua_file) in changes.items():
+            app_id_str = str(app_id)
+            
+            # Update steam_search_cache
+            game_data = self._steam_search_cache_by_id.get(app_id_str)
+            if game_data:
+                game_data['is_installed'] = is_installed
+                game_data['is_disabled'] = is_disabled
+                game_data['lua_file'] = lua_file
             
             # Update installed_games_dict
             if is_installed:
@@ -6183,13 +8932,233 @@ class SteamStyleApp:
                         'is_disabled': is_disabled,
                         'lua_file': lua_file
                     }
-            else:
-                # Game was deleted, remove from installed_games_dict
-                if app_id_str in self.installed_games_dict:
-                    del self.installed_games_dict[app_id_str]
+            else:
+                # Game was deleted, remove from installed_games_dict
+                if app_id_str in self.installed_games_dict:
+                    del self.installed_games_dict[app_id_str]
+        
+        if len(changes) == 1:
+            app_id, (is_installed, is_disabled, lua_file) = next(iter(changes.items()))
+            print(f"[CACHE] Updated cache for game {app_id}: installed={is_installed}, disabled={is_disabled}, file={lua_file}")
+        else:
+            print(f"[CACHE] Updated cache for {len(changes)} games")
+
+    def start_stplugin_watcher(self):
+        """Start watching the stplug-in directory for changes"""
+        self.stplugin_watcher = None
+        try:
+            steam_path = self.get_steam_install_path()
+            if not steam_path:
+                return
+            
+            stplugin_path = os.path.join(steam_path, 'config', 'stplug-in')
+            if not os.path.exists(stplugin_path):
+                return
+            
+            self.stplugin_watcher = StplugInWatcher(
+                stplugin_path,
+                lambda filenames: self.on_stplugin_files_changed(stplugin_path, filenames)
+            )
+            self.stplugin_watcher.start()
+        except Exception as e:
+            print(f"[WATCHER] Could not start stplug-in watcher: {e}")
+    
+    def on_stplugin_files_changed(self, stplugin_path, filenames):
+        """Watcher callback (background thread): update the index, then the UI on the main thread"""
+        if filenames is None:
+            # Watcher lost track of events - fall back to one rescan
+            print("[WATCHER] Change events overflowed, rescanning stplug-in")
+            self.stplugin_index.invalidate()
+            self.depot_index.invalidate()
+            self.root.after(0, self.update_game_list_locally)
+            return
+        
+        app_ids = self.stplugin_index.apply_changes(stplugin_path, filenames)
+        self.depot_index.update_files(stplugin_path, filenames)
+        
+        # The watcher saw every change, so the set matches the directory as it is now
+        self.sync_updates_disabled_files(stplugin_path, filenames)
+        self.mark_updates_disabled_checked(stplugin_path)
+        self.updates_disabled_apps.save()
+        if app_ids:
+            print(f"[WATCHER] stplug-in changed for {len(app_ids)} app(s)")
+            self.root.after(0, lambda: self.apply_stplugin_changes(app_ids))
+    
+    def sync_updates_disabled_files(self, stplugin_path, filenames):
+        """Keep the updates-disabled set in step with changed enabled .lua files (call updates_disabled_apps.save() after)"""
+        for file in filenames:
+            parsed = parse_lua_filename(file)
+            if parsed and not parsed[1]:
+                file_path = os.path.join(stplugin_path, file)
+                model = self.lua_models.get(file_path) if os.path.exists(file_path) else None
+                self.record_updates_disabled_state(file_path, bool(model and model['updates_disabled']))
+    
+    def mark_updates_disabled_checked(self, stplugin_path):
+        """Record that the updates-disabled set matches stplug-in as it is now"""
+        try:
+            self.updates_disabled_apps.mark_checked(os.stat(stplugin_path).st_mtime_ns)
+        except OSError:
+            pass
+    
+    @contextlib.contextmanager
+    def own_stplugin_writes(self, stplugin_path):
+        """Wrap LuaTools' own changes to stplug-in - the caller keeps the updates-disabled set in step for the files it touches.
+        A set that matched the directory before the changes still matches it after, so only outside changes make the
+        disabled apps list rescan. The set is saved once at the end, even if the changes fail partway."""
+        try:
+            was_current = self.updates_disabled_apps.is_current(os.stat(stplugin_path).st_mtime_ns)
+        except OSError:
+            was_current = False
+        try:
+            yield
+        finally:
+            if was_current:
+                self.mark_updates_disabled_checked(stplugin_path)
+            self.updates_disabled_apps.save()
+    
+    def apply_stplugin_changes(self, app_ids):
+        """Push changed .lua files into the game list, search cache and God Mode cards"""
+        try:
+            games_by_id = {}
+            if hasattr(self, 'god_mode_game_list'):
+                games_by_id = {game['app_id']: game for game in self.god_mode_game_list}
+            
+            changes = {}
+            updated_games = {}
+            for app_id in app_ids:
+                entry = self.stplugin_index.peek(app_id)
+                is_installed = entry is not None
+                is_disabled = entry['is_disabled'] if entry else False
+                lua_file = entry['filename'] if entry else None
+                
+                game = games_by_id.get(app_id)
+                if game and (game.get('is_installed'), game.get('is_disabled'), game.get('lua_file')) == (is_installed, is_disabled, lua_file):
+                    continue  # Already up to date (e.g. change made from inside LuaTools)
+                
+                changes[app_id] = (is_installed, is_disabled, lua_file)
+                
+                if not hasattr(self, 'god_mode_game_list'):
+                    continue
+                
+                if game:
+                    game['is_installed'] = is_installed
+                    game['is_disabled'] = is_disabled
+                    game['lua_file'] = lua_file
+                elif is_installed:
+                    # New file dropped in by another tool
+                    game = {
+                        'app_id': app_id,
+                        'game_name': self.get_cached_game_name(app_id),
+                        'lua_file': lua_file,
+                        'is_installed': True,
+                        'is_disabled': is_disabled
+                    }
+                    self.god_mode_game_list.append(game)
+                else:
+                    continue
+                
+                updated_games[app_id] = game
             
-            print(f"[CACHE] Updated cache for game {app_id_str}: installed={is_installed}, disabled={is_disabled}, file={lua_file}")
-
+            # One bulk cache update and one pass over the cards
+            self.update_search_cache_for_games(changes)
+            if updated_games:
+                self.update_game_cards_in_ui(updated_games)
+                
+        except Exception as e:
+            print(f"[WATCHER] Error applying stplug-in changes: {e}")
+    
+    def record_updates_disabled_state(self, file_path, is_disabled):
+        """Update the persistent updates-disabled set for a .lua file (call updates_disabled_apps.save() after)"""
+        try:
+            stat = os.stat(file_path) if is_disabled else None
+        except OSError:
+            stat, is_disabled = None, False
+        self.updates_disabled_apps.set_state(self.extract_app_id(file_path), is_disabled, stat)
+    
+    def get_cached_game_name(self, app_id, default="Unknown Game"):
+        """Look up a game name in the cached Steam app list"""
+        steam_data = getattr(self, '_steam_api_cache', None)
+        if not steam_data:
+            return default
+        
+        # Build the lookup dict once per app list (first entry wins, like the old linear scan)
+        if getattr(self, '_steam_app_names_source', None) is not steam_data:
+            names = {}
+            for app in steam_data.get('applist', {}).get('apps', []):
+                names.setdefault(str(app.get('appid')), app.get('name', default))
+            self._steam_app_names = names
+            self._steam_app_names_source = steam_data
+        return self._steam_app_names.get(str(app_id), default)
+    
+    def ensure_depot_index(self, on_ready=None):
+        """Build the depot/manifest index in the background if needed, returns True if it's ready now"""
+        steam_path = self.get_steam_install_path()
+        if not steam_path:
+            return False
+        stplugin_path = os.path.join(steam_path, 'config', 'stplug-in')
+        if not os.path.exists(stplugin_path):
+            return False
+        
+        if self.depot_index.is_built(stplugin_path):
+            return True
+        if getattr(self, '_depot_index_building', False):
+            return False
+        
+        self._depot_index_building = True
+        
+        def build_thread():
+            try:
+                self.depot_index.build(stplugin_path, self.stplugin_index.snapshot(stplugin_path))
+            except Exception as e:
+                print(f"[CACHE] Error building depot index: {e}")
+            finally:
+                self._depot_index_building = False
+            if on_ready:
+                self.root.after(0, on_ready)
+        
+        threading.Thread(target=build_thread, daemon=True).start()
+        return False
+    
+    def export_depot_index(self):
+        """Export the depot/manifest -> .lua index as JSON"""
+        filename = filedialog.asksaveasfilename(
+            title="Save Depot Index",
+            defaultextension=".json",
+            filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")],
+            initialfile="depot-index.json"
+        )
+        
+        # Check if user cancelled the dialog
+        if not filename:
+            print("[EXPORT] User cancelled file save dialog")
+            return
+        
+        def export_thread():
+            try:
+                steam_path = self.get_steam_install_path()
+                if not steam_path:
+                    raise Exception("Could not find Steam installation path")
+                stplugin_path = os.path.join(steam_path, 'config', 'stplug-in')
+                
+                if not self.depot_index.is_built(stplugin_path):
+                    self.depot_index.build(stplugin_path, self.stplugin_index.snapshot(stplugin_path))
+                
+                data = self.depot_index.to_dict()
+                with open(filename, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                
+                print(f"[EXPORT] Exported depot index to {filename}")
+                self.root.after(0, lambda: messagebox.showinfo(
+                    "Export Complete",
+                    f"Exported {len(data['depots'])} depots and {len(data['manifests'])} manifests to {os.path.basename(filename)}"
+                ))
+            except Exception as e:
+                print(f"[EXPORT] Error exporting depot index: {e}")
+                error_msg = f"Failed to export depot index:\n{str(e)}"
+                self.root.after(0, lambda: messagebox.showerror("Export Error", error_msg))
+        
+        threading.Thread(target=export_thread, daemon=True).start()
+    
     def refresh_game_list(self):
         """Update the game list to show updated status after downloads or changes (no full API refresh)"""
         try:
@@ -6220,8 +9189,8 @@ class SteamStyleApp:
                 print("[UPDATE] Steam plugin directory not found")
                 return
             
-            # Recheck .lua files locally
-            lua_files, disabled_files = self.find_lua_files(stplugin_path)
+            # Recheck .lua files locally (cached unless the directory changed)
+            self.stplugin_index.snapshot(stplugin_path)
             
             # Update the existing game list with new information
             if hasattr(self, 'god_mode_game_list'):
@@ -6230,23 +9199,10 @@ class SteamStyleApp:
                 for game in self.god_mode_game_list:
                     app_id = game['app_id']
                     
-                    # Check if this game is now installed
-                    lua_file = None
-                    is_disabled = False
-                    
-                    # Check for regular .lua file
-                    for lua_file_path in lua_files:
-                        if os.path.basename(lua_file_path).startswith(f"{app_id}."):
-                            lua_file = os.path.basename(lua_file_path)
-                            break
-                    
-                    # Check for disabled .lua file
-                    if not lua_file:
-                        for disabled_file_path in disabled_files:
-                            if os.path.basename(disabled_file_path).startswith(f"{app_id}."):
-                                lua_file = os.path.basename(disabled_file_path)
-                                is_disabled = True
-                                break
+                    # Check if this game is now installed (regular .lua first, then disabled)
+                    entry = self.stplugin_index.get(stplugin_path, app_id)
+                    lua_file = entry['filename'] if entry else None
+                    is_disabled = entry['is_disabled'] if entry else False
                     
                     # Update game status
                     game['is_installed'] = lua_file is not None
@@ -6395,6 +9351,9 @@ class SteamStyleApp:
                             # Ensure consistent dimensions
                             ensure_frame_dimensions(top_frame)
                             
+                            # Multi-select checkbox only for installed games
+                            self.sync_game_select_checkbox(top_frame, game, is_installed, bg_color)
+                            
                             # Update game name label
                             for name_widget in top_frame.winfo_children():
                                 if isinstance(name_widget, tk.Label) and name_widget.cget('text') and ('✅' in name_widget.cget('text') or '🔴' in name_widget.cget('text') or '❌' in name_widget.cget('text') or '🟢' in name_widget.cget('text')):
@@ -6659,7 +9618,7 @@ class SteamStyleApp:
         # Safety check: ensure download_queue and queued_games are initialized
         if not hasattr(self, 'download_queue'):
             print("[WARNING] download_queue not initialized, initializing now...")
-            self.download_queue = []
+            self.download_queue = DownloadQueue()
             self.completed_downloads = []
             self.failed_downloads = []
             self.current_download = None
@@ -6679,6 +9638,7 @@ class SteamStyleApp:
         # Clear multi-threaded downloads (note: threads will complete naturally)
         self.active_downloads.clear()
         self.download_threads.clear()
+        self.queue_journal.rewrite([])
         
         print("[QUEUE] Download queue cleared")
         
@@ -6693,7 +9653,7 @@ class SteamStyleApp:
         # Safety check: ensure download_queue and queued_games are initialized
         if not hasattr(self, 'download_queue'):
             print("[WARNING] download_queue not initialized, initializing now...")
-            self.download_queue = []
+            self.download_queue = DownloadQueue()
             self.completed_downloads = []
             self.failed_downloads = []
             self.current_download = None
@@ -6706,6 +9666,7 @@ class SteamStyleApp:
         
         self.completed_downloads.clear()
         self.failed_downloads.clear()
+        self.queue_journal.record({'op': 'clear_finished'})
         
         # Update the display
         self.update_download_queue_display()
@@ -6931,6 +9892,9 @@ class SteamStyleApp:
         )
         game_name_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 10))
         
+        # Multi-select checkbox for batch actions (installed games only)
+        self.sync_game_select_checkbox(top_frame, game, is_installed, bg_color)
+        
         # Add hover effect to show it's clickable
         def on_enter(event):
             game_name_label.configure(fg=self.colors['accent'])
@@ -7063,6 +10027,103 @@ class SteamStyleApp:
         
         return outer_frame
 
+    def sync_game_select_checkbox(self, top_frame, game, is_installed, bg_color):
+        """Add or remove a card's multi-select checkbox to match its install state"""
+        app_id = str(game['app_id'])
+        checkboxes = [widget for widget in top_frame.winfo_children() if isinstance(widget, tk.Checkbutton)]
+        
+        if not is_installed:
+            # Nothing left to batch-manage for this game
+            for checkbox in checkboxes:
+                checkbox.destroy()
+            self.god_mode_select_boxes.pop(app_id, None)
+            if app_id in self.god_mode_selected:
+                self.god_mode_selected.discard(app_id)
+                self.update_god_mode_selection_label()
+            return
+        
+        if checkboxes:
+            for checkbox in checkboxes:
+                checkbox.configure(bg=bg_color, activebackground=bg_color)
+            return
+        
+        select_var = tk.BooleanVar(value=app_id in self.god_mode_selected)
+        
+        def toggle_selected():
+            if select_var.get():
+                self.god_mode_selected.add(app_id)
+            else:
+                self.god_mode_selected.discard(app_id)
+            self.update_god_mode_selection_label()
+        
+        checkbox = tk.Checkbutton(
+            top_frame,
+            variable=select_var,
+            command=toggle_selected,
+            bg=bg_color,
+            activebackground=bg_color,
+            selectcolor=self.colors['secondary_bg'],
+            relief=tk.FLAT,
+            bd=0,
+            highlightthickness=0,
+            cursor='hand2'
+        )
+        checkbox.select_var = select_var
+        
+        # Pack first so it sits at the far left of the card
+        packed = top_frame.pack_slaves()
+        if packed:
+            checkbox.pack(side=tk.LEFT, padx=(0, 8), before=packed[0])
+        else:
+            checkbox.pack(side=tk.LEFT, padx=(0, 8))
+        self.god_mode_select_boxes[app_id] = checkbox
+
+    def update_god_mode_selection_label(self):
+        """Show how many games are selected for batch actions"""
+        try:
+            if hasattr(self, 'god_mode_selection_label') and self.god_mode_selection_label.winfo_exists():
+                self.god_mode_selection_label.config(text=f"{len(self.god_mode_selected)} selected")
+        except Exception as e:
+            print(f"[SELECT] Error updating selection label: {e}")
+
+    def set_all_games_selected(self, selected):
+        """Select or clear every installed game card currently shown"""
+        if not selected:
+            self.god_mode_selected.clear()
+        for app_id, checkbox in list(self.god_mode_select_boxes.items()):
+            if not checkbox.winfo_exists():
+                del self.god_mode_select_boxes[app_id]
+                continue
+            checkbox.select_var.set(selected)
+            if selected:
+                self.god_mode_selected.add(app_id)
+        self.update_god_mode_selection_label()
+
+    def run_batch_game_action(self, action):
+        """Apply enable/disable/delete to all selected games"""
+        app_ids = sorted(self.god_mode_selected, key=int)
+        if not app_ids:
+            messagebox.showinfo("No Games Selected", "Tick the checkboxes on the game cards to select games first")
+            return
+        
+        if action == "delete":
+            result = messagebox.askyesno(
+                "Confirm Deletion",
+                f"Are you sure you want to DELETE the lua files for {len(app_ids)} selected game(s)?\n\n"
+                "This will permanently remove the files and cannot be undone!",
+                icon='warning'
+            )
+            if not result:
+                return
+        
+        results = self.batch_game_action(app_ids, action)
+        self.update_god_mode_selection_label()
+        
+        failures = [message for success, message in results.values() if not success]
+        if failures:
+            preview = "\n".join(failures[:10]) + (f"\n...and {len(failures) - 10} more" if len(failures) > 10 else "")
+            messagebox.showerror("Error", f"Could not {action} {len(failures)} of {len(app_ids)} game(s):\n\n{preview}")
+
     def open_game_list_settings(self):
         """Open the game list settings menu"""
         # Create a new top-level window for game list settings
@@ -7667,6 +10728,22 @@ class SteamStyleApp:
         )
         export_selected_button.pack(side=tk.RIGHT)
         
+        # Export depot/manifest index button
+        export_index_button = self.create_modern_button(
+            bottom_frame,
+            text="🗂 Export Depot Index",
+            command=self.export_depot_index,
+            font=('Segoe UI', 10),
+            bg=self.colors['button_secondary'],
+            hover_bg=self.colors['button_secondary_hover'],
+            padx=25,
+            pady=10,
+            width=20,
+            height=1,
+            disable_scaling=True
+        )
+        export_index_button.pack(side=tk.RIGHT, padx=(0, 10))
+        
         # Load depot keys and populate games list
         self.load_depot_keys_and_populate_export_games()
         
@@ -8084,6 +11161,27 @@ class SteamStyleApp:
         )
         close_button.pack(side=tk.LEFT)
         
+        # Bulk actions row
+        bulk_frame = tk.Frame(popup, bg=self.colors['bg'])
+        bulk_frame.pack(pady=(0, 15))
+        
+        for bulk_text, bulk_disable in (("Bulk Disable...", True), ("Bulk Enable...", False)):
+            bulk_button = tk.Button(
+                bulk_frame,
+                text=bulk_text,
+                font=('Segoe UI', 10),
+                bg=self.colors['button_secondary'],
+                fg=self.colors['text'],
+                activebackground=self.colors['button_secondary_hover'],
+                activeforeground=self.colors['text'],
+                relief=tk.FLAT,
+                padx=15,
+                pady=5,
+                cursor='hand2',
+                command=lambda disable=bulk_disable: self.open_bulk_update_dialog(popup, disable)
+            )
+            bulk_button.pack(side=tk.LEFT, padx=5)
+        
         # Separator
         separator = tk.Frame(popup, height=2, bg=self.colors['secondary_bg'])
         separator.pack(fill=tk.X, padx=20, pady=(0, 20))
@@ -8154,37 +11252,53 @@ class SteamStyleApp:
         if not os.path.exists(stplugin_path):
             return
         
-        # Find all .lua files
-        lua_files, disabled_files = self.find_lua_files(stplugin_path)
-        
-        # Check which files have the updates disabled marker
-        disabled_apps = []
+        try:
+            dir_mtime_ns = os.stat(stplugin_path).st_mtime_ns
+        except OSError:
+            return
         
-        for lua_file in lua_files:
-            try:
-                with open(lua_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
+        # No saved set, or stplug-in changed since it was checked (LuaTools closed, or another tool) -
+        # find the marked files again and remember them
+        if not self.updates_disabled_apps.is_current(dir_mtime_ns):
+            lua_files, disabled_files = self.find_lua_files(stplugin_path)
+            found_apps = {}
+            for lua_file in lua_files:
+                model = self.lua_models.get(lua_file)
                 
                 # Check if file contains LUATOOLS: UPDATES DISABLED! line
-                if '-- LUATOOLS: UPDATES DISABLED!' in content:
-                    app_id = self.extract_app_id(lua_file)
-                    if app_id:
-                        # Get game name from Steam API cache if available
-                        game_name = "Unknown Game"
-                        if hasattr(self, '_steam_api_cache'):
-                            for app in self._steam_api_cache.get('applist', {}).get('apps', []):
-                                if str(app.get('appid')) == str(app_id):
-                                    game_name = app.get('name', 'Unknown Game')
-                                    break
-                        
-                        disabled_apps.append({
-                            'app_id': app_id,
-                            'game_name': game_name,
-                            'file_path': lua_file
-                        })
-            except Exception as e:
-                print(f"Error reading {lua_file}: {e}")
+                if model and model['updates_disabled']:
+                    try:
+                        stat = os.stat(lua_file)
+                        found_apps[self.extract_app_id(lua_file)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+                    except OSError:
+                        continue
+            self.updates_disabled_apps.replace_all(found_apps)
+        
+        # Check the saved set against the directory index (no file reads unless a file changed)
+        disabled_apps = []
+        self.stplugin_index.snapshot(stplugin_path)
+        for app_id, state in self.updates_disabled_apps.items():
+            # Restat the file - an in-place edit doesn't show up in the directory snapshot
+            entry = self.stplugin_index.refresh(app_id)
+            if not entry or entry['is_disabled']:
+                self.updates_disabled_apps.set_state(app_id, False)
                 continue
+            
+            if (entry['size'], entry['mtime_ns']) != (state.get('size'), state.get('mtime_ns')):
+                # File changed since it was recorded - recheck it
+                model = self.lua_models.get(entry['path'])
+                is_disabled = bool(model and model['updates_disabled'])
+                self.record_updates_disabled_state(entry['path'], is_disabled)
+                if not is_disabled:
+                    continue
+            
+            disabled_apps.append({
+                'app_id': app_id,
+                'game_name': self.get_cached_game_name(app_id),
+                'file_path': entry['path']
+            })
+        self.updates_disabled_apps.mark_checked(dir_mtime_ns)
+        self.updates_disabled_apps.save()
         
         # Sort by game name
         disabled_apps.sort(key=lambda x: x['game_name'].lower())
@@ -8281,38 +11395,24 @@ class SteamStyleApp:
             return
         
         try:
-            # Read the file
-            with open(lua_file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            lines = content.split('\n')
-            
             # Check if updates are already disabled
-            if '-- LUATOOLS: UPDATES DISABLED!' in content:
+            model = self.lua_models.get(lua_file_path)
+            if model and model['updates_disabled']:
                 messagebox.showinfo("Already Disabled", f"Updates for {app_id} are already disabled")
                 return
             
-            # Add the updates disabled marker at the beginning
-            lines.insert(0, '-- LUATOOLS: UPDATES DISABLED!')
-            
-            # Uncomment all setManifestid lines (remove -- prefix)
-            modified = False
-            for i, line in enumerate(lines):
-                if line.strip().startswith('--setManifestid'):
-                    lines[i] = line[2:]  # Remove the -- prefix
-                    modified = True
-            
-            # Write the modified file
-            with open(lua_file_path, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(lines))
+            # Add the marker, uncomment setManifestid lines and write the file
+            with self.own_stplugin_writes(stplugin_path):
+                with AtomicFileWriter() as writer:
+                    status = set_lua_updates_disabled(lua_file_path, True, writer)
+                self.record_updates_disabled_state(lua_file_path, True)
+            self.depot_index.update_files(stplugin_path, [f"{app_id}.lua"])
+            if status == "already_disabled":
+                messagebox.showinfo("Already Disabled", f"Updates for {app_id} are already disabled")
+                return
             
             # Get game name for display
-            game_name = "Unknown Game"
-            if hasattr(self, '_steam_api_cache'):
-                for app in self._steam_api_cache.get('applist', {}).get('apps', []):
-                    if str(app.get('appid')) == str(app_id):
-                        game_name = app.get('name', 'Unknown Game')
-                        break
+            game_name = self.get_cached_game_name(app_id)
             
             # Show success message
             messagebox.showinfo(
@@ -8350,22 +11450,12 @@ class SteamStyleApp:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
-            lines = content.split('\n')
-            
-            # Remove the updates disabled marker
-            if '-- LUATOOLS: UPDATES DISABLED!' in lines:
-                lines.remove('-- LUATOOLS: UPDATES DISABLED!')
-            
-            # Comment all setManifestid lines (add -- prefix)
-            modified = False
-            for i, line in enumerate(lines):
-                if line.strip().startswith('setManifestid'):
-                    lines[i] = '--' + line
-                    modified = True
-            
-            # Write the modified file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(lines))
+            # Remove the marker, comment setManifestid lines and write the file
+            with self.own_stplugin_writes(os.path.dirname(file_path)):
+                with AtomicFileWriter() as writer:
+                    writer.write_text(file_path, enable_updates_text(content))
+                self.record_updates_disabled_state(file_path, False)
+            self.depot_index.update_files(os.path.dirname(file_path), [os.path.basename(file_path)])
             
             # Show success message
             messagebox.showinfo(
@@ -8384,6 +11474,214 @@ class SteamStyleApp:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to enable updates for {app_id}: {str(e)}")
 
+    def open_bulk_update_dialog(self, popup, disable):
+        """Ask for a list of AppIDs (pasted or from a file) to disable/enable updates for in one go"""
+        action_title = "Bulk Disable Updates" if disable else "Bulk Enable Updates"
+        self.open_app_id_list_dialog(
+            popup,
+            action_title,
+            "Apply",
+            lambda app_ids: self.bulk_set_updates_disabled(app_ids, disable, popup)
+        )
+    
+    def open_app_id_list_dialog(self, parent, title, apply_text, on_apply):
+        """Modal dialog that collects AppIDs or store links (typed, pasted or loaded from a file) and hands them to on_apply"""
+        dialog = tk.Toplevel(parent)
+        dialog.title(title)
+        dialog.geometry("420x400")
+        dialog.configure(bg=self.colors['bg'])
+        self.set_window_icon(dialog)
+        self.center_popup(dialog)
+        dialog.transient(parent)
+        dialog.grab_set()
+        
+        def close_dialog():
+            dialog.destroy()
+            # Hand the modal grab back to a parent popup
+            if parent is not self.root and parent.winfo_exists():
+                parent.grab_set()
+        
+        dialog.protocol("WM_DELETE_WINDOW", close_dialog)
+        
+        tk.Label(
+            dialog,
+            text=title,
+            font=('Segoe UI', 14, 'bold'),
+            fg=self.colors['text'],
+            bg=self.colors['bg']
+        ).pack(pady=(15, 5))
+        
+        tk.Label(
+            dialog,
+            text="Paste AppIDs or Steam store links (one per line, or separated by commas/spaces)",
+            font=('Segoe UI', 9),
+            fg=self.colors['text_secondary'],
+            bg=self.colors['bg'],
+            wraplength=380
+        ).pack(pady=(0, 10))
+        
+        ids_text = scrolledtext.ScrolledText(
+            dialog,
+            font=('Consolas', 10),
+            bg=self.colors['secondary_bg'],
+            fg=self.colors['text'],
+            insertbackground=self.colors['text'],
+            relief=tk.FLAT,
+            height=12
+        )
+        ids_text.pack(fill=tk.BOTH, expand=True, padx=15)
+        
+        def load_from_file():
+            filename = filedialog.askopenfilename(
+                parent=dialog,
+                title="Select AppID List",
+                filetypes=[("Text/CSV files", "*.txt;*.csv"), ("All files", "*.*")]
+            )
+            if not filename:
+                return
+            try:
+                with open(filename, 'r', encoding='utf-8', errors='replace') as f:
+                    ids_text.insert(tk.END, f.read() + '\n')
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not read {os.path.basename(filename)}: {e}", parent=dialog)
+        
+        def paste_clipboard():
+            try:
+                ids_text.insert(tk.END, self.root.clipboard_get() + '\n')
+            except tk.TclError:
+                messagebox.showwarning("Clipboard", "The clipboard has no text in it", parent=dialog)
+        
+        def apply():
+            app_ids, skipped_lines = parse_app_id_list(ids_text.get('1.0', tk.END))
+            if not app_ids:
+                messagebox.showwarning("Invalid AppID", "No AppIDs found in the list", parent=dialog)
+                return
+            if skipped_lines:
+                # Say which rows were not understood instead of dropping them silently
+                shown = "\n".join(f"• {line[:60]}" for line in skipped_lines[:10])
+                if len(skipped_lines) > 10:
+                    shown += f"\n... and {len(skipped_lines) - 10} more"
+                if not messagebox.askyesno(
+                    "Lines Without AppIDs",
+                    f"No AppID found on {len(skipped_lines)} line(s):\n\n{shown}\n\nContinue with the {len(app_ids)} AppID(s) that were found?",
+                    parent=dialog
+                ):
+                    return
+            close_dialog()
+            on_apply(app_ids)
+        
+        button_frame = tk.Frame(dialog, bg=self.colors['bg'])
+        button_frame.pack(pady=15)
+        
+        for button_text, button_command in (("📂 Load From File", load_from_file), ("📋 Paste", paste_clipboard), (apply_text, apply), ("Cancel", close_dialog)):
+            tk.Button(
+                button_frame,
+                text=button_text,
+                font=('Segoe UI', 10),
+                bg=self.colors['button_bg'],
+                fg=self.colors['text'],
+                activebackground=self.colors['button_hover'],
+                activeforeground=self.colors['text'],
+                relief=tk.FLAT,
+                padx=15,
+                pady=5,
+                cursor='hand2',
+                command=button_command
+            ).pack(side=tk.LEFT, padx=5)
+    
+    def bulk_set_updates_disabled(self, app_ids, disable, popup=None):
+        """Disable or enable updates for many AppIDs in parallel, with one result and one UI refresh"""
+        action = "disable" if disable else "enable"
+        
+        # Get Steam installation path (once for the whole batch)
+        steam_path = self.get_steam_install_path()
+        if not steam_path:
+            messagebox.showerror("Error", "Could not find Steam installation path")
+            return
+        
+        stplugin_path = os.path.join(steam_path, 'config', 'stplug-in')
+        if not os.path.exists(stplugin_path):
+            messagebox.showerror("Error", "Could not find stplug-in directory")
+            return
+        
+        print(f"[UPDATE] Bulk {action} updates for {len(app_ids)} apps...")
+        
+        def bulk_thread():
+            start_time = time.time()
+            
+            def apply_one(app_id):
+                file_path = os.path.join(stplugin_path, f"{app_id}.lua")
+                try:
+                    return app_id, file_path, set_lua_updates_disabled(file_path, disable, writer)
+                except Exception as e:
+                    print(f"[UPDATE] Failed to {action} updates for {app_id}: {e}")
+                    return app_id, file_path, "error"
+            
+            outcomes = [(app_id, None, "error") for app_id in app_ids]
+            error_msg = None
+            with self.own_stplugin_writes(stplugin_path):
+                writer = AtomicFileWriter()
+                try:
+                    # All rewrites land together with one batch of fsyncs
+                    with writer:
+                        with ThreadPoolExecutor(max_workers=8) as executor:
+                            outcomes = list(executor.map(apply_one, app_ids))
+                except Exception as e:
+                    print(f"[UPDATE] Bulk {action} write failed: {e}")
+                    error_msg = f"Failed to {action} updates: {e}"
+                
+                # One bulk update of the updates-disabled set, only for the rewrites that reached disk
+                committed = set(writer.committed)
+                results = {}
+                for app_id, file_path, status in outcomes:
+                    if status in ("disabled", "enabled") and file_path not in committed:
+                        status = "error"
+                    results.setdefault(status, []).append(app_id)
+                    if status in ("disabled", "already_disabled"):
+                        self.record_updates_disabled_state(file_path, True)
+                    elif status in ("enabled", "not_disabled"):
+                        self.record_updates_disabled_state(file_path, False)
+                self.depot_index.update_files(stplugin_path, [os.path.basename(file_path) for file_path in committed])
+            
+            time_taken = time.time() - start_time
+            print(f"[UPDATE] Bulk {action} finished in {time_taken:.2f}s: " +
+                  ", ".join(f"{status}={len(ids)}" for status, ids in results.items()))
+            self.root.after(0, lambda: self.finish_bulk_update_change(results, disable, time_taken, popup, error_msg))
+        
+        threading.Thread(target=bulk_thread, daemon=True).start()
+    
+    def finish_bulk_update_change(self, results, disable, time_taken, popup=None, error_msg=None):
+        """Show the aggregated bulk result and refresh the UI once"""
+        changed = results.get("disabled" if disable else "enabled", [])
+        unchanged = results.get("already_disabled" if disable else "not_disabled", [])
+        missing = results.get("missing", [])
+        errors = results.get("error", [])
+        
+        message = f"Updates {'disabled' if disable else 'enabled'} for {len(changed)} app(s) in {time_taken:.2f}s"
+        if unchanged:
+            message += f"\n\nAlready {'disabled' if disable else 'enabled'}: {len(unchanged)}"
+        if missing:
+            preview = ", ".join(missing[:10]) + ("..." if len(missing) > 10 else "")
+            message += f"\n\nNo .lua file found for {len(missing)} AppID(s): {preview}"
+        if errors:
+            preview = ", ".join(errors[:10]) + ("..." if len(errors) > 10 else "")
+            message += f"\n\nFailed for {len(errors)} AppID(s): {preview}"
+        if error_msg:
+            message += f"\n\n{error_msg}"
+        
+        if errors or error_msg:
+            messagebox.showwarning("Bulk Update Finished", message)
+        else:
+            messagebox.showinfo("Bulk Update Finished", message)
+        
+        # Refresh the disabled apps list
+        if popup is not None and popup.winfo_exists():
+            self.populate_disabled_apps_list(popup)
+        
+        # Refresh the main game list if God Mode is open
+        if changed and hasattr(self, 'god_mode_frame') and hasattr(self, 'god_mode_game_list'):
+            self.refresh_game_display_only()
+    
     def _on_update_disabler_mousewheel(self, event, popup):
         """Handle mouse wheel scrolling in the Update Disabler popup"""
         try:
@@ -8418,7 +11716,7 @@ class SteamStyleApp:
             # GitHub API endpoint for latest release
             api_url = f"https://api.github.com/repos/{__github_repo__}/releases/latest"
             
-            response = httpx.get(api_url, timeout=10)
+            response = self.http.get(api_url, timeout=10)
             if response.status_code == 200:
                 latest_release = response.json()
                 latest_version = latest_release['tag_name']  # Gets "6.5" from tag
@@ -9237,6 +12535,14 @@ exit
     
     def exit_from_tray(self):
         """Exit the application cleanly from the tray."""
+        if getattr(self, 'stplugin_watcher', None):
+            self.stplugin_watcher.stop()
+        if getattr(self, 'download_engine', None):
+            self.download_engine.stop()
+        if getattr(self, 'http', None):
+            self.http.close()
+        if getattr(self, 'queue_journal', None):
+            self.queue_journal.close()
         try:
             print("Exiting from system tray...")
             if hasattr(self, "tray_icon") and self.tray_icon:
@@ -9376,9 +12682,185 @@ exit
         except Exception as e:
             print(f"Error restoring from simple minimize: {e}")
 
+# Commands that run without the GUI
+HEADLESS_COMMANDS = ('patch', 'import', 'list', 'depots')
+
+def describe_patch_result(patch_result):
+    """Turn a patch result into a stable string for machine-readable output"""
+    if patch_result is True:
+        return "patched"
+    if patch_result is False:
+        return "no_change"
+    return patch_result
+
+def headless_patch(stplugin_path):
+    """Patch every .lua in stplug-in, returns a JSON-ready dict"""
+    lua_files, disabled_files = list_lua_files(stplugin_path)
+    files = []
+    
+    with AtomicFileWriter() as writer:
+        for file_path in sorted(lua_files):
+            entry = {'app_id': os.path.basename(file_path)[:-4], 'file': os.path.basename(file_path)}
+            try:
+                entry['result'] = describe_patch_result(patch_lua_path(file_path, writer))
+            except Exception as e:
+                entry['result'] = "error"
+                entry['error'] = str(e)
+            files.append(entry)
+    
+    summary = {}
+    for entry in files:
+        summary[entry['result']] = summary.get(entry['result'], 0) + 1
+    
+    return {
+        'ok': not summary.get("error"),
+        'files': files,
+        'summary': summary,
+        'disabled_files': len(disabled_files)
+    }
+
+def headless_list(stplugin_path):
+    """List the .lua files in stplug-in, returns a JSON-ready dict"""
+    entries = scan_stplugin_dir(stplugin_path)
+    models = LuaModelCache()
+    files = []
+    
+    for filename in sorted(entries):
+        entry = entries[filename]
+        file_info = {
+            'app_id': entry['app_id'],
+            'file': filename,
+            'enabled': not entry['is_disabled'],
+            'size': entry['size'],
+            'modified': entry['mtime_ns'] / 1e9
+        }
+        model = models.get(entry['path'])
+        if model is None:
+            file_info['error'] = "Could not read or parse file"
+        else:
+            file_info['updates_disabled'] = model['updates_disabled']
+            file_info['depots'] = [item['depot_id'] for item in model['addappid'] if item['depot_id'] and not item['commented']]
+            file_info['manifests'] = [
+                {'depot_id': item['depot_id'], 'manifest_id': item['manifest_id'], 'commented': item['commented']}
+                for item in model['manifests']
+            ]
+        files.append(file_info)
+    
+    return {'ok': True, 'files': files}
+
+def headless_import(stplugin_path, file_paths):
+    """Patch and install .lua files or archives into stplug-in, returns a JSON-ready dict"""
+    lua_files = []
+    lua_blobs = []
+    errors = []
+    
+    for file_path in file_paths:
+        if not os.path.exists(file_path):
+            errors.append({'file': file_path, 'error': "File not found"})
+            continue
+        
+        if file_path.lower().endswith('.lua'):
+            if is_app_lua_filename(os.path.basename(file_path)):
+                lua_files.append(file_path)
+            else:
+                errors.append({'file': file_path, 'error': "Not an <appid>.lua file"})
+        elif file_path.lower().endswith(('.zip', '.rar', '.7z')):
+            try:
+                archive_lua_blobs = read_lua_archive(file_path)
+                if archive_lua_blobs is None:
+                    errors.append({'file': file_path, 'error': "Archive support library not installed"})
+                else:
+                    lua_blobs.extend(archive_lua_blobs)
+            except Exception as e:
+                errors.append({'file': file_path, 'error': f"Error extracting archive: {e}"})
+        else:
+            errors.append({'file': file_path, 'error': "Unsupported file type"})
+    
+    if not lua_files and not lua_blobs:
+        return {'ok': False, 'error': "No valid .lua files found", 'errors': errors, 'files': []}
+    
+    with AtomicFileWriter() as writer:
+        install_results = install_lua_files(lua_files, stplugin_path, writer, lua_blobs)
+    
+    files = []
+    for filename, app_id, status, detail in install_results:
+        entry = {'app_id': app_id, 'file': filename, 'status': status}
+        if status == "installed" and detail:
+            entry['removed_disabled'] = detail
+        elif status == "error":
+            entry['error'] = detail
+        files.append(entry)
+    
+    return {
+        'ok': not errors and all(entry['status'] != "error" for entry in files),
+        'files': files,
+        'errors': errors
+    }
+
+def headless_depots(stplugin_path, depot_id=None, manifest_id=None):
+    """Build the depot/manifest index, returns the whole index or a lookup as a JSON-ready dict"""
+    index = DepotIndex(LuaModelCache())
+    index.build(stplugin_path, scan_stplugin_dir(stplugin_path))
+    
+    if depot_id or manifest_id:
+        output = {'ok': True}
+        if depot_id:
+            output['depot'] = {'id': depot_id, 'files': index.lookup('depot', depot_id)}
+        if manifest_id:
+            output['manifest'] = {'id': manifest_id, 'files': index.lookup('manifest', manifest_id)}
+        return output
+    
+    return {'ok': True, **index.to_dict()}
+
+def run_headless_command(args):
+    """Dispatch a parsed headless command"""
+    if args.command == 'patch':
+        return headless_patch(args.stplugin)
+    if args.command == 'list':
+        return headless_list(args.stplugin)
+    if args.command == 'depots':
+        return headless_depots(args.stplugin, args.depot, args.manifest)
+    return headless_import(args.stplugin, args.files)
+
+def run_headless(argv):
+    """Run a command without the GUI, e.g. LuaTools.py patch --stplugin PATH"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='LuaTools.py', description="LuaTools headless mode (prints JSON)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    patch_parser = subparsers.add_parser('patch', help="Comment out setManifestid lines in every .lua")
+    list_parser = subparsers.add_parser('list', help="List the .lua files in stplug-in")
+    import_parser = subparsers.add_parser('import', help="Patch and install .lua files or .zip/.rar/.7z archives")
+    import_parser.add_argument('files', nargs='+', help=".lua files or archives to import")
+    depots_parser = subparsers.add_parser('depots', help="Show which .lua files reference each depot and manifest ID")
+    depots_parser.add_argument('--depot', help="Only list the files referencing this depot ID")
+    depots_parser.add_argument('--manifest', help="Only list the files referencing this manifest ID")
+    for command_parser in (patch_parser, list_parser, import_parser, depots_parser):
+        command_parser.add_argument('--stplugin', required=True, help="Path to Steam's config/stplug-in directory")
+    
+    args = parser.parse_args(argv)
+    start_time = time.time()
+    
+    if not os.path.isdir(args.stplugin):
+        output = {'ok': False, 'error': f"stplug-in directory not found: {args.stplugin}"}
+    else:
+        try:
+            # Log lines go to stderr so stdout carries only the JSON result
+            with contextlib.redirect_stdout(sys.stderr):
+                output = run_headless_command(args)
+        except Exception as e:
+            output = {'ok': False, 'error': str(e)}
+    
+    output = {'command': args.command, 'stplugin': os.path.abspath(args.stplugin), **output}
+    output['time_taken'] = round(time.time() - start_time, 3)
+    print(json.dumps(output, indent=2, ensure_ascii=False))
+    return 0 if output['ok'] else 1
+
 def main():
     try:
         print("Starting LuaTools application...")
+        load_app_modules()
         root = tk.Tk()
         print("Tkinter root window created successfully")
         
@@ -9396,4 +12878,6 @@ def main():
         input("Press Enter to exit...")  # Keep console open to see error
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in HEADLESS_COMMANDS:
+        sys.exit(run_headless(sys.argv[1:]))
     main() 